@@ -561,44 +561,32 @@ def map_candidates(frame: pd.DataFrame, device: str, batch_size: int) -> pd.Data
     os.environ.setdefault("DGLBACKEND", "pytorch")
     from localmapper import localmapper
 
+    from uspto_revisit.atom_mapping import map_localmapper_records
+
     mapper = localmapper(device=device, model_version="202403")
     mapped_records: list[dict[str, Any]] = [
         {"mapped_rxn": "", "template": "", "confident": False, "error": ""}
         for _ in range(len(frame))
     ]
-    valid_indices = [
-        index
+    pending = {
+        index: {
+            "localmapper_rxn": row["localmapper_input"],
+            "mapped_rxn": None,
+            "template": None,
+            "confident": None,
+            "error": "",
+        }
         for index, row in frame.iterrows()
         if row["localmapper_input"] and not row["pre_mapping_error"]
-    ]
-    for start in range(0, len(valid_indices), batch_size):
-        indices = valid_indices[start : start + batch_size]
-        reactions = [frame.at[index, "localmapper_input"] for index in indices]
-        try:
-            results = mapper.get_atom_map(reactions, return_dict=True)
-            if isinstance(results, dict):
-                results = [results]
-            if len(results) != len(indices):
-                raise ValueError("LocalMapper returned the wrong batch size")
-            for index, result in zip(indices, results):
-                mapped_records[index] = {
-                    "mapped_rxn": str(result.get("mapped_rxn", "") or ""),
-                    "template": str(result.get("template", "") or ""),
-                    "confident": bool(result.get("confident", False)),
-                    "error": "",
-                }
-        except Exception:
-            for index, reaction in zip(indices, reactions):
-                try:
-                    result = mapper.get_atom_map(reaction, return_dict=True)
-                    mapped_records[index] = {
-                        "mapped_rxn": str(result.get("mapped_rxn", "") or ""),
-                        "template": str(result.get("template", "") or ""),
-                        "confident": bool(result.get("confident", False)),
-                        "error": "",
-                    }
-                except Exception as exc:
-                    mapped_records[index]["error"] = f"{type(exc).__name__}: {exc}"
+    }
+    map_localmapper_records(mapper, list(pending.values()), batch_size)
+    for index, record in pending.items():
+        mapped_records[index] = {
+            "mapped_rxn": str(record["mapped_rxn"] or ""),
+            "template": str(record["template"] or ""),
+            "confident": bool(record["confident"]),
+            "error": record["error"],
+        }
 
     audits = []
     for index, row in frame.iterrows():
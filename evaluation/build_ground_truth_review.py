@@ -13,6 +13,8 @@ from typing import Any
 import pandas as pd
 from rdkit import Chem, RDLogger
 
+from uspto_revisit.file_io import read_model_output
+
 RDLogger.DisableLog("rdApp.*")
 
 
@@ -78,24 +80,30 @@ def parse_list(value: Any) -> list[str]:
 
 def unresolved_nosmi_compounds(value: Any) -> list[str]:
     """Extract unresolved named compounds retained in the model's SMILES dictionary."""
-    if is_blank(value):
-        return []
-    try:
-        parsed = ast.literal_eval(str(value))
-    except (SyntaxError, ValueError):
+    if isinstance(value, dict):
         parsed = value
+    elif is_blank(value):
+        return []
+    else:
+        try:
+            parsed = ast.literal_eval(str(value))
+        except (SyntaxError, ValueError):
+            parsed = value
     values = parsed.values() if isinstance(parsed, dict) else parse_list(parsed)
     return [str(item) for item in values if "nosmi" in str(item).lower()]
 
 
 def unresolved_nosmi_labels(value: Any) -> dict[str, str]:
     """Return entity labels for unresolved compounds, e.g. ``G(NoSmi)``."""
-    if is_blank(value):
-        return {}
-    try:
-        parsed = ast.literal_eval(str(value))
-    except (SyntaxError, ValueError):
+    if isinstance(value, dict):
+        parsed = value
+    elif is_blank(value):
         return {}
+    else:
+        try:
+            parsed = ast.literal_eval(str(value))
+        except (SyntaxError, ValueError):
+            return {}
     if not isinstance(parsed, dict):
         return {}
     return {str(label): str(name) for label, name in parsed.items() if "nosmi" in str(name).lower()}
@@ -394,10 +402,7 @@ def build_queue(
 ) -> pd.DataFrame:
     frames: dict[str, pd.DataFrame] = {}
     for model in models:
-        path = result_dir / f"{model}_reaction_smiles_final.csv"
-        if not path.exists():
-            raise FileNotFoundError(path)
-        frames[model] = pd.read_csv(path, encoding="utf-8-sig")
+        frames[model] = read_model_output(result_dir, model)[1]
 
     row_count = len(next(iter(frames.values())))
     if any(len(frame) != row_count for frame in frames.values()):
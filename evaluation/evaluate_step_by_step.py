@@ -34,6 +34,8 @@ try:
 except ModuleNotFoundError:
     from evaluate_table3 import build_ground_truth_manifest, signature_text
 
+from uspto_revisit.file_io import read_model_output, read_table
+
 
 NO_VALUE = {"", "none", "null", "nan", "nosmi", "not found", "not_found"}
 ATOM_MAP = re.compile(r":\d+\]")
@@ -50,6 +52,9 @@ def truthy(value: Any) -> bool:
 
 
 def parse_literal(value: Any, expected: type) -> Any:
+    # Parquet outputs hold lists and dictionaries natively.
+    if isinstance(value, expected):
+        return value
     raw = text(value)
     if not raw:
         return expected()
@@ -403,10 +408,6 @@ def main() -> int:
         args.ground_truth
         or root / "evaluation" / "benchmark_all_configurations.csv"
     )
-    pipeline_csv = (
-        args.pipeline_csv
-        or root / "result" / "model_outputs" / f"{args.model}_reaction_smiles_final.csv"
-    )
     table2_flags = (
         args.table2_flags
         or root / "evaluation" / "results" / "table2" / "table2_flags.csv"
@@ -418,7 +419,11 @@ def main() -> int:
     output_dir = args.output_dir or root / "evaluation" / "results" / "step_by_step"
 
     review = pd.read_csv(ground_truth, encoding="utf-8-sig").fillna("")
-    pipeline = pd.read_csv(pipeline_csv, encoding="utf-8-sig", low_memory=False).fillna("")
+    if args.pipeline_csv:
+        pipeline = read_table(args.pipeline_csv, low_memory=False)
+    else:
+        _path, pipeline = read_model_output(root / "result" / "model_outputs", args.model)
+    pipeline = pipeline.fillna("")
     table2 = pd.read_csv(table2_flags, encoding="utf-8-sig", low_memory=False).fillna("")
     table3 = pd.read_csv(table3_flags, encoding="utf-8-sig", low_memory=False).fillna("")
 
@@ -13,6 +13,8 @@ from typing import Any
 import pandas as pd
 from rdkit import Chem, RDLogger
 
+from uspto_revisit.file_io import read_model_output
+
 RDLogger.DisableLog("rdApp.*")
 
 MODELS = (
@@ -453,8 +455,7 @@ def evaluate_model_heuristics(
 
 
 def infer_model(path: Path, frame: pd.DataFrame) -> str:
-    suffix = "_reaction_smiles_final.csv"
-    model = path.name.removesuffix(suffix)
+    model = path.name.removesuffix(path.suffix).removesuffix("_reaction_smiles_final")
     required = (
         f"{model}_rxn",
         f"{model}_mapped_rxn",
@@ -478,10 +479,8 @@ def build_flags(
     rows = []
 
     for model in models:
-        path = results_dir / f"{model}_reaction_smiles_final.csv"
-        if not path.is_file():
-            raise FileNotFoundError(path)
-        result = pd.read_csv(path, encoding="utf-8-sig").fillna("")
+        path, result = read_model_output(results_dir, model)
+        result = result.fillna("")
         inferred = infer_model(path, result)
         if inferred != model:
             raise ValueError(f"Model mismatch for {path.name}: {inferred}")
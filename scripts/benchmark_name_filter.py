@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Time name screening and cleaning on compound names from model outputs.
+
+Every compound-name occurrence in the ``prediction`` column of the given
+tables is screened, aliased, and fixed twice: once with the former per-call
+implementations kept below for reference, and once with ``classify_name``.
+The script fails if the two disagree on any name.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import re
+import time
+
+import pandas as pd
+
+from uspto_revisit.json_utils import FIX_NAME_REMOVALS, fix_name, parse_json_object
+from uspto_revisit.smiles_fetch import (
+    AMBIGUOUS_EXACT_NAMES,
+    AMBIGUOUS_NAME_PATTERNS,
+    _chemical_sections,
+    _clean_compound_name,
+    classify_name,
+    resolve_name_alias,
+)
+
+
+def legacy_fix_name(compound_name: str) -> str:
+    pattern = f"({'|'.join(FIX_NAME_REMOVALS)})"
+    return re.sub(pattern, "", compound_name, flags=re.I).strip()
+
+
+def legacy_should_skip(compound_name: str) -> bool:
+    cleaned = _clean_compound_name(compound_name)
+    if cleaned.casefold() in AMBIGUOUS_EXACT_NAMES:
+        return True
+    return any(pattern.search(cleaned) for pattern in AMBIGUOUS_NAME_PATTERNS)
+
+
+def legacy_classify(compound_name: str) -> tuple[str, str, str, bool]:
+    cleaned = _clean_compound_name(compound_name)
+    alias = resolve_name_alias(cleaned)
+    fixed = resolve_name_alias(legacy_fix_name(alias))
+    return cleaned, alias, fixed, legacy_should_skip(cleaned)
+
+
+def current_classify(compound_name: str) -> tuple[str, str, str, bool]:
+    classified = classify_name(compound_name)
+    return (
+        classified.cleaned,
+        classified.alias,
+        classified.fixed,
+        classified.skip_reason is not None,
+    )
+
+
+def load_names(patterns: list[str], column: str) -> list[str]:
+    names = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            frame = pd.read_csv(path, usecols=[column])
+            for value in frame[column].dropna():
+                response = parse_json_object(value)
+                if response is None:
+                    continue
+                for chemicals, _category in _chemical_sections(response):
+                    names.extend(str(name) for name in chemicals.values())
+    return names
+
+
+def time_calls(function, names: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        classify_name.cache_clear()
+        started = time.perf_counter()
+        for name in names:
+            function(name)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "tables",
+        nargs="*",
+        default=["result/model_outputs/*.csv"],
+        help="Model output CSV paths or globs. Default: result/model_outputs/*.csv",
+    )
+    parser.add_argument(
+        "--column",
+        default="prediction",
+        help="Column holding model JSON responses. Default: prediction",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats. Default: 5")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    names = load_names(args.tables, args.column)
+    if not names:
+        print("Error: no compound names found.")
+        return 1
+    mismatches = [
+        name
+        for name in dict.fromkeys(names)
+        if legacy_classify(name) != current_classify(name)
+        or legacy_fix_name(name) != fix_name(name)
+    ]
+    if mismatches:
+        print(f"Error: {len(mismatches)} names classify differently, e.g. {mismatches[:5]}")
+        return 1
+    timings = {
+        "legacy_classify": time_calls(legacy_classify, names, args.repeat),
+        "classify_name": time_calls(current_classify, names, args.repeat),
+        "legacy_fix_name": time_calls(legacy_fix_name, names, args.repeat),
+        "fix_name": time_calls(fix_name, names, args.repeat),
+    }
+    print(
+        json.dumps(
+            {
+                "names": len(names),
+                "distinct_names": len(set(names)),
+                "skipped_names": sum(
+                    classify_name(name).skip_reason is not None for name in set(names)
+                ),
+                "microseconds_per_name": {
+                    label: round(1e6 * seconds / len(names), 2)
+                    for label, seconds in timings.items()
+                },
+                "classify_speedup": round(timings["legacy_classify"] / timings["classify_name"], 1),
+                "fix_name_speedup": round(timings["legacy_fix_name"] / timings["fix_name"], 1),
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
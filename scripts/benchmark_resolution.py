@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Measure NoSmi resolution throughput against the local resolver stand-in."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from uspto_revisit import host_limits, smiles_fetch
+from uspto_revisit.resolver_standin import StandinConfig, standin_base_urls, start_standin
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Resolve synthetic NoSmi names through a local stand-in server and "
+            "report names per second for the chosen concurrency settings."
+        )
+    )
+    parser.add_argument("--names", type=int, default=500, help="Distinct names. Default: 500")
+    parser.add_argument(
+        "--found-fraction",
+        type=float,
+        default=0.5,
+        help="Fraction of names the stand-in can resolve. Default: 0.5",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=40,
+        help="Global request concurrency. Default: 40",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Stand-in response latency in seconds. Default: 0.05",
+    )
+    parser.add_argument(
+        "--rate-429",
+        type=float,
+        default=0.0,
+        help="Fraction of stand-in responses that are 429. Default: 0",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of stand-in responses that are 503. Default: 0",
+    )
+    parser.add_argument(
+        "--host-limit",
+        action="append",
+        default=None,
+        metavar="SOURCE=RATE[:CONCURRENCY]",
+        help=(
+            "Per-source budget to benchmark. Without this option the stand-in "
+            "runs unthrottled instead of using PubChem's 5 requests/s default."
+        ),
+    )
+    parser.add_argument(
+        "--resolution-mode",
+        choices=("priority", "all"),
+        default="priority",
+        help="How resolver answers are combined. Default: priority",
+    )
+    parser.add_argument(
+        "--pubchem-batch-window",
+        type=float,
+        default=0.0,
+        help="PubChem coalescing window in seconds; 0 disables. Default: 0",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    names = [f"benchmark compound {index}" for index in range(args.names)]
+    found = int(len(names) * args.found_fraction)
+    config = StandinConfig(
+        fixtures={name: "C" * (index % 12 + 1) for index, name in enumerate(names[:found])},
+        latency=args.latency,
+        rate_429=args.rate_429,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    runner, base_url = await start_standin(config)
+    try:
+        smiles_fetch.configure_resolver_urls(standin_base_urls(base_url))
+        policies = {source: host_limits.HostPolicy() for source in host_limits.DEFAULT_POLICIES}
+        policies.update(
+            host_limits.parse_host_limit(value) for value in args.host_limit or []
+        )
+        host_limits.configure_host_limits(policies)
+        smiles_fetch.configure_resolution_policy(args.resolution_mode)
+        smiles_fetch.configure_negative_cache(0)
+        smiles_fetch.configure_pubchem_batching(args.pubchem_batch_window)
+        smiles_dicts = [{"A": f"[{name} (NoSmi)]"} for name in names]
+        started = time.perf_counter()
+        async with aiohttp.ClientSession() as session:
+            await smiles_fetch.process_batch_final(
+                smiles_dicts,
+                session,
+                asyncio.Semaphore(args.concurrency),
+            )
+        elapsed = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+    resolved = sum("(NoSmi)" not in item["A"] for item in smiles_dicts)
+    return {
+        "names": len(names),
+        "resolved": resolved,
+        "seconds": round(elapsed, 3),
+        "names_per_second": round(len(names) / elapsed, 1) if elapsed else None,
+        "hosts": host_limits.host_stats(),
+        "resolution": dict(smiles_fetch.resolution_stats),
+    }
+
+
+def main() -> int:
+    print(json.dumps(asyncio.run(run(parse_args())), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Convert final model-output CSV files to Parquet with native list and map columns."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from uspto_revisit.file_io import read_parquet_table, read_table, write_table
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Write a Parquet copy next to every *_reaction_smiles_final.csv file. "
+            "Evaluation scripts read the Parquet copy when it exists."
+        )
+    )
+    parser.add_argument(
+        "--results-dir",
+        type=Path,
+        default=Path("result/model_outputs"),
+        help="Directory containing model outputs. Default: result/model_outputs",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Replace existing Parquet files. Default: skip them.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    for csv_path in sorted(args.results_dir.glob("*_reaction_smiles_final.csv")):
+        parquet_path = csv_path.with_suffix(".parquet")
+        if parquet_path.exists() and not args.overwrite:
+            print(f"Skipping {parquet_path} (exists)")
+            continue
+        frame = read_table(csv_path)
+        write_table(frame, parquet_path)
+        if len(read_parquet_table(parquet_path)) != len(frame):
+            raise RuntimeError(f"Row count changed while converting {csv_path}")
+        print(
+            f"{csv_path.name}: {csv_path.stat().st_size:,} -> "
+            f"{parquet_path.stat().st_size:,} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,37 @@ import argparse
 import ast
 import asyncio
 import json
+import os
 from collections import Counter, defaultdict
 from pathlib import Path
 
 import aiohttp
 import pandas as pd
 
-from uspto_revisit.atom_mapping import add_atom_mapping_columns, create_localmapper
+from uspto_revisit.atom_mapping import (
+    DEFAULT_MAPPING_ATOM_BUDGET,
+    DEFAULT_MAPPING_CACHE_PATH,
+    add_atom_mapping_columns,
+    close_mapper,
+    configure_mapping_batches,
+    configure_mapping_cache,
+    configure_mapping_daemon,
+    create_mapper,
+    mapping_stats,
+)
+from uspto_revisit.mapping_daemon import default_socket_path
 from uspto_revisit.reaction_smiles import _coerce_mapping, process_smiles_data
 from uspto_revisit.smiles_fetch import (
+    canonical_cache_stats,
+    configure_local_opsin,
+    configure_negative_cache,
+    configure_synonym_index,
     load_cache,
+    load_known_aliases,
     load_resolution_overrides,
     normalize_name_key,
     process_batch_final,
+    resolution_stats,
     save_cache,
     should_skip_automatic_resolution,
 )
@@ -44,7 +62,11 @@ def parse_args() -> argparse.Namespace:
         default="config/nosmi_overrides.json",
         help="Auditable NoSmi override JSON. Default: config/nosmi_overrides.json",
     )
-    parser.add_argument("--cache", default=None, help="Shared successful-resolution cache.")
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="Shared SQLite name store; a legacy .pkl path is migrated once.",
+    )
     parser.add_argument(
         "--output-dir",
         default="result",
@@ -60,11 +82,60 @@ def parse_args() -> argparse.Namespace:
         default="result/nosmi_recovery_summary.json",
         help="Machine-readable recovery summary JSON.",
     )
+    parser.add_argument(
+        "--negative-cache-ttl-hours",
+        type=float,
+        default=168.0,
+        help=(
+            "Skip names that every resolver failed on within this many hours; "
+            "requires --cache to persist across runs. 0 disables. Default: 168"
+        ),
+    )
     parser.add_argument("--concurrency", type=int, default=4)
     parser.add_argument("--map-atoms", action="store_true")
     parser.add_argument("--mapping-device", default="cpu")
     parser.add_argument("--mapping-model-version", default="202403")
+    parser.add_argument(
+        "--mapping-cache",
+        default=DEFAULT_MAPPING_CACHE_PATH,
+        help="LocalMapper result cache; an empty string disables it.",
+    )
+    parser.add_argument(
+        "--mapping-atom-budget",
+        type=int,
+        default=DEFAULT_MAPPING_ATOM_BUDGET,
+        help="Heavy atoms per LocalMapper batch; 0 batches in input order.",
+    )
     parser.add_argument("--mapping-batch-size", type=int, default=32)
+    parser.add_argument(
+        "--mapping-workers",
+        type=int,
+        default=1,
+        help="LocalMapper worker processes, each loading the model once. Default: 1",
+    )
+    parser.add_argument(
+        "--mapping-socket",
+        default=default_socket_path(),
+        help="Mapping daemon socket used when it is running; an empty string disables it.",
+    )
+    parser.add_argument(
+        "--known-aliases",
+        default=None,
+        help="Versioned JSON file of extra KnownAlias names and SMILES.",
+    )
+    parser.add_argument(
+        "--opsin-jar",
+        default=os.getenv("OPSIN_JAR") or None,
+        help="Local OPSIN jar tried before network resolvers. Default: $OPSIN_JAR",
+    )
+    parser.add_argument(
+        "--synonym-index",
+        default=os.getenv("PUBCHEM_SYNONYM_INDEX") or None,
+        help=(
+            "PubChem synonym index consulted before network resolvers. "
+            "Default: $PUBCHEM_SYNONYM_INDEX"
+        ),
+    )
     return parser.parse_args()
 
 
@@ -234,6 +305,10 @@ async def run(args: argparse.Namespace) -> None:
     if args.cache:
         load_cache(args.cache)
     loaded_overrides = load_resolution_overrides(args.overrides)
+    configure_negative_cache(args.negative_cache_ttl_hours * 3600)
+    known_aliases = load_known_aliases(args.known_aliases)
+    configure_local_opsin(args.opsin_jar)
+    configure_synonym_index(args.synonym_index)
 
     resolution_cache = {}
     semaphore = asyncio.Semaphore(args.concurrency)
@@ -251,9 +326,13 @@ async def run(args: argparse.Namespace) -> None:
 
     mapper = None
     if args.map_atoms:
-        mapper = create_localmapper(
-            device=args.mapping_device,
-            model_version=args.mapping_model_version,
+        configure_mapping_cache(args.mapping_cache or None)
+        configure_mapping_batches(args.mapping_atom_budget)
+        configure_mapping_daemon(args.mapping_socket)
+        mapper = create_mapper(
+            args.mapping_device,
+            args.mapping_model_version,
+            args.mapping_workers,
         )
 
     union_after: dict[str, dict] = {}
@@ -281,6 +360,7 @@ async def run(args: argparse.Namespace) -> None:
                 f"{prefix}_rxn",
                 prefix,
                 mapper=mapper,
+                model_version=args.mapping_model_version,
                 batch_size=args.mapping_batch_size,
             )
         result.to_csv(csv_output, index=False, encoding="utf-8-sig")
@@ -297,6 +377,8 @@ async def run(args: argparse.Namespace) -> None:
             "after_no_smi_occurrences": count_reaction_no_smi(result, prefix),
             **mapping_counts(result, prefix),
         }
+    if mapper is not None:
+        close_mapper(mapper)
 
     audit_rows = []
     for key, before in sorted(
@@ -314,6 +396,8 @@ async def run(args: argparse.Namespace) -> None:
             status = "partially_resolved"
         elif should_skip_automatic_resolution(display_name) and not override:
             status = "retained_ambiguous_or_nonmolecular"
+        elif resolution[1] == "NegativeCache":
+            status = "skipped_negative_cache"
         else:
             status = "not_found"
         audit_rows.append(
@@ -372,6 +456,12 @@ async def run(args: argparse.Namespace) -> None:
             "include every literal (NoSmi), including nested-bracket names."
         ),
         "override_count": len(loaded_overrides),
+        "resolver_lookups": resolution_stats["resolver_lookups"],
+        "negative_cache_hits": resolution_stats["negative_cache_hits"],
+        "synonym_index_hits": resolution_stats["synonym_index_hits"],
+        "canonical_cache": canonical_cache_stats(),
+        "known_aliases": known_aliases.summary(),
+        "atom_mapping": dict(mapping_stats),
     }
     Path(args.summary).write_text(
         json.dumps(summary, ensure_ascii=False, indent=2),
@@ -5,14 +5,68 @@ from __future__ import annotations
 import ast
 import importlib.resources
 import math
+import multiprocessing
 import os
 import sys
 import types
-from collections.abc import Iterable
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
+from uspto_revisit.mapping_cache import (
+    MappingCache,
+    canonical_molecule,
+    canonical_reaction_key,
+    reaction_heavy_atoms,
+)
+
+DEFAULT_MAPPING_CACHE_PATH = "result/atom_mapping_cache.sqlite"
+DEFAULT_MAPPING_ATOM_BUDGET = 2048
+
+MAPPING_RESULT_FIELDS = ("mapped_rxn", "template", "confident", "error")
+
+_mapping_cache: MappingCache | None = None
+_atom_budget = DEFAULT_MAPPING_ATOM_BUDGET
+_daemon_socket: str | None = None
+mapping_stats = Counter()
+
+
+def configure_mapping_cache(path: str | Path | None = DEFAULT_MAPPING_CACHE_PATH) -> None:
+    """Open the persistent mapping cache at ``path``; None or "" disables it."""
+    global _mapping_cache
+    if _mapping_cache is not None:
+        _mapping_cache.close()
+    _mapping_cache = MappingCache(path) if path else None
+
+
+def configure_mapping_batches(atom_budget: int = DEFAULT_MAPPING_ATOM_BUDGET) -> None:
+    """Cap each LocalMapper batch at ``atom_budget`` heavy atoms; 0 disables."""
+    global _atom_budget
+    _atom_budget = max(0, int(atom_budget))
+
+
+def configure_mapping_daemon(socket_path: str | Path | None) -> None:
+    """Look for a mapping daemon at ``socket_path``; None or "" disables it."""
+    global _daemon_socket
+    _daemon_socket = str(socket_path) if socket_path else None
+
+
+def format_mapping_stats() -> str:
+    return (
+        f"{mapping_stats['reactions']} reactions, "
+        f"{mapping_stats['distinct_reactions']} distinct, "
+        f"{mapping_stats['cache_hits']} from the mapping cache, "
+        f"{mapping_stats['prescreen_rejections']} rejected by RDKit, "
+        f"{mapping_stats['model_reactions']} sent to LocalMapper "
+        f"in {mapping_stats['batches']} batches, "
+        f"{mapping_stats['batch_failures']} failed batches, "
+        f"{mapping_stats['isolation_passes']} isolation passes"
+    )
+
 
 def _legacy_resource_filename(package: str, resource: str) -> str:
     """Resolve package data for LocalMapper without setuptools.pkg_resources."""
@@ -104,6 +158,115 @@ def create_localmapper(device: str = "cpu", model_version: str = "202403"):
     return localmapper(device=device, model_version=model_version)
 
 
+_worker_mapper = None
+
+
+def _init_mapping_worker(mapper_factory, device: str, model_version: str, threads: int) -> None:
+    global _worker_mapper
+    # Set before torch is imported so OpenMP sizes its pool once.
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    _worker_mapper = mapper_factory(device=device, model_version=model_version)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+
+def _map_batch_in_worker(records: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], Counter]:
+    mapping_stats.clear()
+    _map_batch(_worker_mapper, records)
+    return records, Counter(mapping_stats)
+
+
+class LocalMapperPool:
+    """LocalMapper replicas in local worker processes.
+
+    Each worker loads the model once, with ``threads_per_worker`` intra-op
+    threads, and maps whole batches (including bisection of failed batches).
+    Workers are spawned processes on this host only; no DGL distributed or
+    RPC code is involved.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        device: str = "cpu",
+        model_version: str = "202403",
+        threads_per_worker: int | None = None,
+        mapper_factory=create_localmapper,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_mapping_worker,
+            initargs=(mapper_factory, device, model_version, self.threads_per_worker),
+        )
+
+    def __enter__(self) -> LocalMapperPool:
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.close()
+
+    def map_batches(self, batches: list[list[dict[str, Any]]]) -> Iterator[list[dict[str, Any]]]:
+        """Map batches concurrently and update their records as each finishes."""
+        futures = {
+            self._executor.submit(_map_batch_in_worker, batch): batch for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            mapped_records, stats = future.result()
+            for record, mapped in zip(batch, mapped_records):
+                record.update({field: mapped[field] for field in MAPPING_RESULT_FIELDS})
+            mapping_stats.update(stats)
+            yield batch
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+
+def _create_local_mapper(device: str, model_version: str, workers: int):
+    if workers > 1:
+        return LocalMapperPool(workers, device=device, model_version=model_version)
+    return create_localmapper(device=device, model_version=model_version)
+
+
+def create_mapper(
+    device: str = "cpu",
+    model_version: str = "202403",
+    workers: int = 1,
+):
+    """Return a mapper for ``model_version``.
+
+    A running mapping daemon at the configured socket is used when it serves
+    the same model version on the same device; otherwise LocalMapper is loaded
+    in process, or in a worker pool when ``workers`` > 1.
+    """
+    if _daemon_socket:
+        from uspto_revisit.mapping_daemon import connect_mapping_daemon
+
+        client = connect_mapping_daemon(
+            _daemon_socket,
+            model_version,
+            fallback=lambda: _create_local_mapper(device, model_version, workers),
+            device=device,
+        )
+        if client is not None:
+            return client
+    return _create_local_mapper(device, model_version, workers)
+
+
+def close_mapper(mapper) -> None:
+    """Release worker processes or daemon connections held by ``mapper``."""
+    close = getattr(mapper, "close", None)
+    if close is not None:
+        close()
+
+
 def _empty_mapping_record(
     localmapper_rxn: str | None = None,
     error: str = "",
@@ -134,7 +297,11 @@ def _map_one(mapper, record: dict[str, Any]) -> None:
 
 
 def _map_batch(mapper, records: list[dict[str, Any]]) -> None:
-    """Map a batch, falling back to one-by-one mapping if one item is invalid."""
+    """Map a batch, halving it until a failing reaction is isolated.
+
+    One bad reaction in a batch of n costs about 2 log2(n) extra passes
+    instead of n single-reaction passes.
+    """
     if not records:
         return
     reactions = [record["localmapper_rxn"] for record in records]
@@ -150,16 +317,135 @@ def _map_batch(mapper, records: list[dict[str, Any]]) -> None:
         for record, result in zip(records, results):
             _store_mapping_result(record, result)
     except Exception:
-        for record in records:
-            _map_one(mapper, record)
+        mapping_stats["batch_failures"] += 1
+        if len(records) == 1:
+            mapping_stats["isolation_passes"] += 1
+            _map_one(mapper, records[0])
+            return
+        middle = len(records) // 2
+        mapping_stats["isolation_passes"] += 2
+        _map_batch(mapper, records[:middle])
+        _map_batch(mapper, records[middle:])
+
+
+def _prescreen(record: dict[str, Any]) -> bool:
+    """Record an error for reactions RDKit cannot parse; return True if usable."""
+    for smiles in record["localmapper_rxn"].replace(">", ".").split("."):
+        if smiles and canonical_molecule(smiles) is None:
+            record["error"] = f"ValueError: RDKit could not parse {smiles!r}."
+            mapping_stats["prescreen_rejections"] += 1
+            return False
+    return True
+
+
+def _mapping_batches(records: list[dict[str, Any]], batch_size: int) -> list[list]:
+    """Split records into LocalMapper batches.
+
+    With an atom budget, reactions are sorted by heavy-atom count so each
+    graph batch holds reactions of similar size, and a batch closes once the
+    next reaction would exceed the budget or ``batch_size`` reactions. A
+    reaction larger than the budget is mapped on its own.
+    """
+    if not _atom_budget:
+        return [records[start : start + batch_size] for start in range(0, len(records), batch_size)]
+    sized = sorted(
+        ((reaction_heavy_atoms(record["localmapper_rxn"]), record) for record in records),
+        key=lambda pair: pair[0],
+    )
+    batches = []
+    batch = []
+    atoms = 0
+    for size, record in sized:
+        if batch and (len(batch) >= batch_size or atoms + size > _atom_budget):
+            batches.append(batch)
+            batch = []
+            atoms = 0
+        batch.append(record)
+        atoms += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _map_batches_in_process(mapper, batches: list[list[dict[str, Any]]]) -> Iterator[list]:
+    for batch in batches:
+        _map_batch(mapper, batch)
+        yield batch
+
+
+def _run_batches(mapper, batches: list[list[dict[str, Any]]], on_batch=None) -> None:
+    """Map every batch; pools and daemon clients map them out of process."""
+    mapping_stats["batches"] += len(batches)
+    if hasattr(mapper, "map_batches"):
+        completed = mapper.map_batches(batches)
+    else:
+        completed = _map_batches_in_process(mapper, batches)
+    for batch in completed:
+        if on_batch is not None:
+            on_batch(batch)
+
+
+def _map_with_cache(
+    mapper,
+    records: list[dict[str, Any]],
+    batch_size: int,
+    model_version: str,
+) -> None:
+    keys = {id(record): canonical_reaction_key(record["localmapper_rxn"]) for record in records}
+    cached = _mapping_cache.get_many(keys.values(), model_version)
+    pending = []
+    for record in records:
+        if keys[id(record)] in cached:
+            record.update(cached[keys[id(record)]])
+            mapping_stats["cache_hits"] += 1
+        else:
+            pending.append(record)
+    mapping_stats["model_reactions"] += len(pending)
+    _run_batches(
+        mapper,
+        _mapping_batches(pending, batch_size),
+        # Commit per batch so an interrupted run keeps what it already mapped.
+        # Failures are not cached: an out-of-memory error or a crashed worker
+        # should be retried on the next run, not replayed from the cache.
+        lambda batch: _mapping_cache.put_many(
+            [
+                (keys[id(record)], record)
+                for record in batch
+                if record["mapped_rxn"] and not record["error"]
+            ],
+            model_version,
+        ),
+    )
+
+
+def map_localmapper_records(
+    mapper,
+    records: list[dict[str, Any]],
+    batch_size: int = 32,
+    model_version: str | None = None,
+) -> None:
+    """Fill mapping records in place, skipping reactions RDKit cannot parse."""
+    records = [record for record in records if _prescreen(record)]
+    if _mapping_cache is not None and model_version:
+        _map_with_cache(mapper, records, batch_size, model_version)
+        return
+    mapping_stats["model_reactions"] += len(records)
+    _run_batches(mapper, _mapping_batches(records, batch_size))
 
 
 def map_reaction_values(
     values: Iterable[Any],
     mapper,
     batch_size: int = 32,
+    model_version: str | None = None,
 ) -> dict[str, list[list[Any]]]:
-    """Atom-map a reaction column while retaining per-reaction failures."""
+    """Atom-map a reaction column while retaining per-reaction failures.
+
+    Each distinct normalized reaction is mapped once and its result copied to
+    every occurrence. With a mapping cache configured and ``model_version``
+    given, reactions already mapped by that LocalMapper version are not sent
+    to ``mapper`` either. Counts accumulate in ``mapping_stats``.
+    """
     if batch_size < 1:
         raise ValueError("batch_size must be at least 1.")
 
@@ -186,8 +472,19 @@ def map_reaction_values(
             row_records.append(record)
         rows.append(row_records)
 
-    for start in range(0, len(valid_records), batch_size):
-        _map_batch(mapper, valid_records[start : start + batch_size])
+    distinct_records: dict[str, dict[str, Any]] = {}
+    for record in valid_records:
+        distinct_records.setdefault(record["localmapper_rxn"], record)
+    to_map = list(distinct_records.values())
+    mapping_stats["reactions"] += len(valid_records)
+    mapping_stats["distinct_reactions"] += len(to_map)
+
+    map_localmapper_records(mapper, to_map, batch_size, model_version)
+
+    for record in valid_records:
+        mapped = distinct_records[record["localmapper_rxn"]]
+        if mapped is not record:
+            record.update({field: mapped[field] for field in MAPPING_RESULT_FIELDS})
 
     return {
         "localmapper_rxn": [
@@ -213,17 +510,32 @@ def add_atom_mapping_columns(
     device: str = "cpu",
     model_version: str = "202403",
     batch_size: int = 32,
+    workers: int = 1,
 ) -> pd.DataFrame:
-    """Return a copy of a DataFrame with LocalMapper result columns added."""
+    """Return a copy of a DataFrame with LocalMapper result columns added.
+
+    Without ``mapper``, one is created with :func:`create_mapper` for this
+    call and released afterwards.
+    """
     if reaction_column not in frame.columns:
         available = ", ".join(frame.columns)
         raise ValueError(
             f"Column '{reaction_column}' was not found. Available columns: {available}"
         )
+    owned_mapper = None
     if mapper is None:
-        mapper = create_localmapper(device=device, model_version=model_version)
+        mapper = owned_mapper = create_mapper(device, model_version, workers)
 
-    mapped = map_reaction_values(frame[reaction_column].tolist(), mapper, batch_size)
+    try:
+        mapped = map_reaction_values(
+            frame[reaction_column].tolist(),
+            mapper,
+            batch_size,
+            model_version=model_version,
+        )
+    finally:
+        if owned_mapper is not None:
+            close_mapper(owned_mapper)
     result = frame.copy()
     for suffix, values in mapped.items():
         result[f"{output_prefix}_{suffix}"] = values
@@ -14,35 +14,82 @@ from pathlib import Path
 import pandas as pd
 from tqdm import tqdm
 
-from uspto_revisit.atom_mapping import add_atom_mapping_columns
-from uspto_revisit.file_io import ensure_directory, save_smiles_dict
+from uspto_revisit.atom_mapping import (
+    DEFAULT_MAPPING_ATOM_BUDGET,
+    DEFAULT_MAPPING_CACHE_PATH,
+    add_atom_mapping_columns,
+    configure_mapping_batches,
+    configure_mapping_cache,
+    configure_mapping_daemon,
+    format_mapping_stats,
+)
+from uspto_revisit.file_io import (
+    ensure_directory,
+    read_table,
+    save_smiles_dict,
+    write_table,
+)
 from uspto_revisit.gpt_extract import (
     DEFAULT_SYSTEM_PROMPT,
     load_prompt,
     results_to_frame,
     run_all_prompt_json,
 )
+from uspto_revisit.host_limits import (
+    configure_host_limits,
+    format_host_stats,
+    parse_host_limit,
+)
+from uspto_revisit.mapping_daemon import default_socket_path
 from uspto_revisit.nosmi_review import (
     apply_review,
     build_review_queue,
     model_specs_from_values,
 )
+from uspto_revisit.opsin_local import format_opsin_stats
 from uspto_revisit.reaction_smiles import process_smiles_data
+from uspto_revisit.sharding import (
+    SHARD_STRATEGIES,
+    merge_shards,
+    shard_batch_dir,
+    shard_output_path,
+    write_shard_input,
+)
 from uspto_revisit.smiles_fetch import (
     audit_name_smiles_consistency,
+    DEFAULT_CANONICAL_CACHE_SIZE,
+    NO_SMI_SOURCES,
+    configure_canonical_cache,
+    configure_local_opsin,
+    configure_negative_cache,
+    configure_pubchem_batching,
+    configure_resolution_policy,
+    configure_resolver_urls,
+    configure_synonym_index,
+    format_canonical_cache_stats,
+    format_known_alias_stats,
     load_cache,
+    load_known_aliases,
     load_resolution_overrides,
     process_batch,
     reprocess_no_smi,
+    resolution_stats,
     save_cache,
 )
+from uspto_revisit.stage_manifest import (
+    PIPELINE_STAGES,
+    StageManifest,
+    content_digest,
+    file_signature,
+    select_stages,
+)
+from uspto_revisit.streaming import stream_reaction_smiles
 
 
-def default_no_smi_overrides_path() -> str | None:
-    """Return the repository override file when it is available."""
+def _repository_config_path(filename: str) -> str | None:
     candidates = (
-        Path("config/nosmi_overrides.json"),
-        Path(__file__).resolve().parents[2] / "config" / "nosmi_overrides.json",
+        Path("config") / filename,
+        Path(__file__).resolve().parents[2] / "config" / filename,
     )
     for candidate in candidates:
         if candidate.is_file():
@@ -50,6 +97,16 @@ def default_no_smi_overrides_path() -> str | None:
     return None
 
 
+def default_no_smi_overrides_path() -> str | None:
+    """Return the repository override file when it is available."""
+    return _repository_config_path("nosmi_overrides.json")
+
+
+def default_known_aliases_path() -> str | None:
+    """Return the repository known-alias file when it is available."""
+    return _repository_config_path("known_aliases.json")
+
+
 def load_env_file(path: str | Path = ".env") -> None:
     """Load simple KEY=VALUE pairs from .env without overriding existing env vars."""
     env_path = Path(path)
@@ -77,6 +134,246 @@ def aiohttp_ssl_context() -> ssl.SSLContext:
     return ssl.create_default_context(cafile=certifi.where())
 
 
+def create_lookup_session(
+    connections_per_host: int = 20,
+    dns_cache_ttl: int = 300,
+    keepalive_timeout: float = 30.0,
+):
+    """Create the long-lived aiohttp session shared by every lookup in a run."""
+    import aiohttp
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            ssl=aiohttp_ssl_context(),
+            limit_per_host=connections_per_host,
+            ttl_dns_cache=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout,
+        )
+    )
+
+
+def add_connection_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--connections-per-host",
+        type=int,
+        default=20,
+        help="Open connections kept per resolver host. Default: 20",
+    )
+    parser.add_argument(
+        "--dns-cache-ttl",
+        type=int,
+        default=300,
+        help="Seconds a resolved host address is reused. Default: 300",
+    )
+    parser.add_argument(
+        "--keepalive-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds an idle keep-alive connection stays open. Default: 30",
+    )
+
+
+def add_canonical_cache_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--canonical-cache-size",
+        type=int,
+        default=DEFAULT_CANONICAL_CACHE_SIZE,
+        help=(
+            "Distinct SMILES strings whose RDKit canonical form is memoized. "
+            f"0 disables. Default: {DEFAULT_CANONICAL_CACHE_SIZE}"
+        ),
+    )
+
+
+def add_mapping_tuning_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--mapping-cache",
+        default=DEFAULT_MAPPING_CACHE_PATH,
+        help=(
+            "SQLite cache of LocalMapper results keyed by canonical reaction and "
+            f"model version. Pass an empty string to disable. Default: {DEFAULT_MAPPING_CACHE_PATH}"
+        ),
+    )
+    parser.add_argument(
+        "--mapping-atom-budget",
+        type=int,
+        default=DEFAULT_MAPPING_ATOM_BUDGET,
+        help=(
+            "Heavy atoms per LocalMapper batch; reactions are grouped by size and "
+            "the batch size still caps the reaction count. 0 batches in input "
+            f"order. Default: {DEFAULT_MAPPING_ATOM_BUDGET}"
+        ),
+    )
+    parser.add_argument(
+        "--mapping-workers",
+        type=int,
+        default=1,
+        help=(
+            "LocalMapper worker processes on this host, each with its own model "
+            "copy and an equal share of the CPU threads. Default: 1"
+        ),
+    )
+    parser.add_argument(
+        "--mapping-socket",
+        default=default_socket_path(),
+        help=(
+            "Use the mapping daemon listening on this Unix socket when it serves "
+            "the requested model version; otherwise map in process. Pass an empty "
+            "string to never use a daemon. Default: $USPTO_REVISIT_MAPPING_SOCKET "
+            f"or {default_socket_path()}"
+        ),
+    )
+
+
+def configure_mapping(args: argparse.Namespace) -> None:
+    configure_mapping_cache(args.mapping_cache)
+    configure_mapping_batches(args.mapping_atom_budget)
+    configure_mapping_daemon(args.mapping_socket)
+
+
+def add_negative_cache_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--negative-cache-ttl-hours",
+        type=float,
+        default=168.0,
+        help=(
+            "Skip names that every NoSmi resolver failed on for this many hours, "
+            "unless the override file changes. 0 disables. Default: 168"
+        ),
+    )
+
+
+def add_resolution_policy_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--resolution-mode",
+        choices=("priority", "all"),
+        default="priority",
+        help=(
+            "priority returns the best-ranked NoSmi answer and cancels slower "
+            "lookups; all waits for every resolver. Default: priority"
+        ),
+    )
+    parser.add_argument(
+        "--resolver-priority",
+        default=",".join(NO_SMI_SOURCES),
+        help=f"Comma-separated NoSmi resolver ranking. Default: {','.join(NO_SMI_SOURCES)}",
+    )
+    parser.add_argument(
+        "--resolution-quorum",
+        type=int,
+        default=0,
+        help=(
+            "Also accept a structure as soon as this many resolvers agree on it. "
+            "0 disables. Default: 0"
+        ),
+    )
+    parser.add_argument(
+        "--pubchem-batch-window",
+        type=float,
+        default=0.0,
+        help=(
+            "Seconds to coalesce NoSmi PubChem lookups across concurrent "
+            "reprocessing batches. 0 disables. Default: 0"
+        ),
+    )
+
+
+def add_offline_resolver_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--known-aliases",
+        default=default_known_aliases_path(),
+        help=(
+            "Versioned JSON file of solvent, reagent, and catalyst names with fixed "
+            "SMILES, added to the built-in KnownAlias table and reread between "
+            "batches when it changes. Default: config/known_aliases.json when present."
+        ),
+    )
+    parser.add_argument(
+        "--synonym-index",
+        default=os.getenv("PUBCHEM_SYNONYM_INDEX") or None,
+        help=(
+            "PubChem synonym index built by python -m uspto_revisit.synonym_index, "
+            "consulted before any network resolver during NoSmi reprocessing. "
+            "Default: $PUBCHEM_SYNONYM_INDEX, otherwise disabled"
+        ),
+    )
+    parser.add_argument(
+        "--opsin-jar",
+        default=os.getenv("OPSIN_JAR") or None,
+        help=(
+            "OPSIN command-line jar run as a local subprocess and tried before "
+            "any network resolver; needs java on PATH. Default: $OPSIN_JAR, "
+            "otherwise disabled"
+        ),
+    )
+
+
+def configure_no_smi_resolution(args: argparse.Namespace) -> None:
+    configure_canonical_cache(args.canonical_cache_size)
+    load_known_aliases(args.known_aliases)
+    configure_negative_cache(args.negative_cache_ttl_hours * 3600)
+    configure_resolution_policy(
+        args.resolution_mode,
+        [source.strip() for source in args.resolver_priority.split(",") if source.strip()],
+        args.resolution_quorum,
+    )
+    configure_pubchem_batching(args.pubchem_batch_window)
+    configure_local_opsin(args.opsin_jar)
+    configure_synonym_index(args.synonym_index)
+    configure_resolver_hosts(args)
+
+
+def add_host_limit_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--resolver-url",
+        action="append",
+        default=None,
+        metavar="SOURCE=URL",
+        help=(
+            "Base URL for PubChem, OPSIN, CIR, or ChEBI, for example a local "
+            "resolver_standin server. Repeatable."
+        ),
+    )
+    parser.add_argument(
+        "--host-limit",
+        action="append",
+        default=None,
+        metavar="SOURCE=RATE[:CONCURRENCY]",
+        help=(
+            "Requests per second and optional concurrency cap for one resolver "
+            "(PubChem, OPSIN, CIR, ChEBI, or a host name). Repeatable. "
+            "PubChem defaults to 5 requests per second."
+        ),
+    )
+    parser.add_argument(
+        "--circuit-failures",
+        type=int,
+        default=5,
+        help="Consecutive failures before a resolver host is paused. Default: 5",
+    )
+    parser.add_argument(
+        "--circuit-reset-seconds",
+        type=float,
+        default=60.0,
+        help="Seconds before a paused host is probed again. Default: 60",
+    )
+
+
+def configure_resolver_hosts(args: argparse.Namespace) -> None:
+    base_urls = {}
+    for value in args.resolver_url or []:
+        source, separator, url = value.partition("=")
+        if not separator or not url:
+            raise ValueError(f"Resolver URL {value!r} must look like SOURCE=URL.")
+        base_urls[source.strip()] = url.strip()
+    configure_resolver_urls(base_urls)
+    configure_host_limits(
+        dict(parse_host_limit(value) for value in args.host_limit or []),
+        failure_threshold=args.circuit_failures,
+        reset_seconds=args.circuit_reset_seconds,
+    )
+
+
 def build_parser() -> argparse.ArgumentParser:
     load_env_file()
     parser = argparse.ArgumentParser(
@@ -188,6 +485,7 @@ def build_parser() -> argparse.ArgumentParser:
         default=32,
         help="Number of reactions per LocalMapper inference batch. Default: 32",
     )
+    add_mapping_tuning_arguments(atom_map_parser)
 
     retry_parser = subparsers.add_parser(
         "retry-nosmi",
@@ -229,7 +527,10 @@ def build_parser() -> argparse.ArgumentParser:
     retry_parser.add_argument(
         "--cache",
         default=None,
-        help="Optional shared pickle cache for successful recovery lookups.",
+        help=(
+            "Optional shared SQLite name store for successful recovery lookups. "
+            "A legacy .pkl path is migrated to a sibling .sqlite store."
+        ),
     )
     retry_parser.add_argument(
         "--overrides",
@@ -256,6 +557,12 @@ def build_parser() -> argparse.ArgumentParser:
         default="result/nosmi_recovery.log",
         help="Recovery log file. Default: result/nosmi_recovery.log",
     )
+    add_negative_cache_argument(retry_parser)
+    add_canonical_cache_argument(retry_parser)
+    add_connection_arguments(retry_parser)
+    add_host_limit_arguments(retry_parser)
+    add_offline_resolver_arguments(retry_parser)
+    add_resolution_policy_arguments(retry_parser)
     retry_parser.add_argument(
         "--map-atoms",
         action="store_true",
@@ -277,6 +584,28 @@ def build_parser() -> argparse.ArgumentParser:
         default=32,
         help="LocalMapper inference batch size. Default: 32",
     )
+    add_mapping_tuning_arguments(retry_parser)
+
+    merge_parser = subparsers.add_parser(
+        "shard-merge",
+        help="Combine finished --shard-count runs into one output and name store.",
+    )
+    merge_parser.add_argument(
+        "--output",
+        required=True,
+        help="The --output path the shards were run with.",
+    )
+    merge_parser.add_argument(
+        "--batch-dir",
+        required=True,
+        help="The --batch-dir path the shards were run with.",
+    )
+    merge_parser.add_argument(
+        "--shard-count",
+        type=int,
+        required=True,
+        help="Number of shards to merge.",
+    )
 
     review_export_parser = subparsers.add_parser(
         "nosmi-review-export",
@@ -363,6 +692,7 @@ def build_parser() -> argparse.ArgumentParser:
         default=32,
         help="LocalMapper inference batch size. Default: 32",
     )
+    add_mapping_tuning_arguments(review_apply_parser)
 
     parser.add_argument(
         "--input",
@@ -431,6 +761,12 @@ def build_parser() -> argparse.ArgumentParser:
             "during final NoSmi recovery. Default: config/nosmi_overrides.json when present."
         ),
     )
+    add_negative_cache_argument(parser)
+    add_canonical_cache_argument(parser)
+    add_connection_arguments(parser)
+    add_host_limit_arguments(parser)
+    add_offline_resolver_arguments(parser)
+    add_resolution_policy_arguments(parser)
     parser.add_argument(
         "--fix-names",
         action="store_true",
@@ -462,25 +798,64 @@ def build_parser() -> argparse.ArgumentParser:
         default=32,
         help="LocalMapper inference batch size. Default: 32",
     )
+    add_mapping_tuning_arguments(parser)
+    parser.add_argument(
+        "--from-stage",
+        choices=PIPELINE_STAGES,
+        default=None,
+        help=(
+            "Rerun this stage and the ones after it, reusing earlier stage "
+            "outputs. Default: resume from the first stage that is not current"
+        ),
+    )
+    parser.add_argument(
+        "--to-stage",
+        choices=PIPELINE_STAGES,
+        default=None,
+        help="Stop after this stage. Default: mapping",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Stream --batch-size row chunks through resolution, reaction "
+            "building, and mapping with bounded memory. Stage manifests and "
+            "--from-stage/--to-stage do not apply."
+        ),
+    )
+    parser.add_argument(
+        "--stream-queue-size",
+        type=int,
+        default=4,
+        help="Chunks buffered between streaming stages. Default: 4",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=1,
+        help=(
+            "Split the input into this many shards and process only "
+            "--shard-index; combine finished shards with shard-merge. Default: 1"
+        ),
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=0,
+        help="Zero-based shard processed by this run. Default: 0",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=SHARD_STRATEGIES,
+        default="range",
+        help=(
+            "range assigns contiguous row blocks; hash groups rows by a hash of "
+            "the model response. Default: range"
+        ),
+    )
     return parser
 
 
-def read_table(path: str | Path) -> pd.DataFrame:
-    table_path = Path(path)
-    if table_path.suffix.lower() in {".xlsx", ".xls"}:
-        return pd.read_excel(table_path)
-    return pd.read_csv(table_path)
-
-
-def write_table(frame: pd.DataFrame, path: str | Path) -> None:
-    table_path = Path(path)
-    ensure_directory(table_path.parent)
-    if table_path.suffix.lower() in {".xlsx", ".xls"}:
-        frame.to_excel(table_path, index=False)
-    else:
-        frame.to_csv(table_path, index=False, encoding="utf-8-sig")
-
-
 def safe_model_filename(model_name: str) -> str:
     """Convert model names, including fine-tuned IDs, into safe filenames."""
     cleaned = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name.strip())
@@ -557,6 +932,7 @@ def run_atom_mapping(args: argparse.Namespace) -> Path:
         if args.output
         else default_atom_mapping_output_path(args.input)
     )
+    configure_mapping(args)
     mapped_frame = add_atom_mapping_columns(
         frame,
         reaction_column,
@@ -564,15 +940,15 @@ def run_atom_mapping(args: argparse.Namespace) -> Path:
         device=args.device,
         model_version=args.model_version,
         batch_size=args.batch_size,
+        workers=args.mapping_workers,
     )
     write_table(mapped_frame, output_path)
+    logging.info("Atom mapping: %s", format_mapping_stats())
     return output_path
 
 
 async def run_retry_no_smi(args: argparse.Namespace) -> Path:
     """Retry existing NoSmi entries without repeating GPT or all-name lookups."""
-    import aiohttp
-
     input_path = Path(args.input)
     smiles_dict_path = Path(args.smiles_dict)
     recovered_dict_path = (
@@ -613,10 +989,13 @@ async def run_retry_no_smi(args: argparse.Namespace) -> Path:
         cache_path = None
 
     load_resolution_overrides(args.overrides)
+    configure_no_smi_resolution(args)
 
     semaphore = asyncio.Semaphore(args.reprocess_concurrency)
-    async with aiohttp.ClientSession(
-        connector=aiohttp.TCPConnector(ssl=aiohttp_ssl_context())
+    async with create_lookup_session(
+        connections_per_host=args.connections_per_host,
+        dns_cache_ttl=args.dns_cache_ttl,
+        keepalive_timeout=args.keepalive_timeout,
     ) as session:
         await reprocess_no_smi(
             smiles_dict_path,
@@ -627,6 +1006,21 @@ async def run_retry_no_smi(args: argparse.Namespace) -> Path:
         )
     if cache_path:
         save_cache(cache_path)
+    logging.info(
+        "Negative-cache hits: %s; names sent to resolvers: %s",
+        resolution_stats["negative_cache_hits"],
+        resolution_stats["resolver_lookups"],
+    )
+    logging.info("Canonical SMILES memo: %s", format_canonical_cache_stats())
+    logging.info("KnownAlias: %s", format_known_alias_stats())
+    if args.opsin_jar:
+        logging.info("Local OPSIN: %s", format_opsin_stats())
+    if args.synonym_index:
+        logging.info(
+            "Synonym index: %s hits, %s ambiguous names resolved online",
+            resolution_stats["synonym_index_hits"],
+            resolution_stats["synonym_index_ambiguous"],
+        )
 
     with recovered_dict_path.open("r", encoding="utf-8-sig") as handle:
         smiles_dicts = json.load(handle)
@@ -647,6 +1041,7 @@ async def run_retry_no_smi(args: argparse.Namespace) -> Path:
     frame[f"{prefix}_skeleton"] = skeleton_smiles
     frame[reaction_column] = final_smiles
     if args.map_atoms:
+        configure_mapping(args)
         frame = add_atom_mapping_columns(
             frame,
             reaction_column,
@@ -654,7 +1049,9 @@ async def run_retry_no_smi(args: argparse.Namespace) -> Path:
             device=args.mapping_device,
             model_version=args.mapping_model_version,
             batch_size=args.mapping_batch_size,
+            workers=args.mapping_workers,
         )
+        logging.info("Atom mapping: %s", format_mapping_stats())
     write_table(frame, output_path)
     logging.info("NoSmi recovery completed. Output written to %s", output_path)
     return output_path
@@ -666,12 +1063,23 @@ async def make_smiles_dict(
     batch_size: int,
     fix_names: bool,
     lookup_concurrency: int,
+    session,
+    manifest: StageManifest | None = None,
+    settings_key: str = "",
 ):
+    """Resolve responses batch by batch into ``smiles_dict_initial.json``.
+
+    Each batch is saved to ``smiles_dict_batch_N.json``. With a manifest,
+    batches whose file was built from the same responses and resolver
+    ``settings_key`` are reloaded instead of resolved again. A batch that
+    fails is filled with ``"Error"`` rows and is not recorded.
+    """
     ensure_directory(batch_dir)
-    cache_path = batch_dir / "smiles_cache.pkl"
+    cache_path = batch_dir / "smiles_cache.sqlite"
     load_cache(cache_path)
 
     smiles_dicts = []
+    resolution_cache = {}
     semaphore = asyncio.Semaphore(lookup_concurrency)
     total_batches = (len(responses) + batch_size - 1) // batch_size
 
@@ -682,15 +1090,32 @@ async def make_smiles_dict(
     ):
         batch = responses[start : start + batch_size]
         batch_number = start // batch_size + 1
+        batch_path = batch_dir / f"smiles_dict_batch_{batch_number}.json"
+        batch_key = content_digest("resolve-batch", batch, fix_names, settings_key)
+        if manifest is not None and manifest.is_current(f"resolve:{batch_path.name}", batch_key):
+            with batch_path.open("r", encoding="utf-8-sig") as handle:
+                smiles_dicts.extend(json.load(handle))
+            logging.info("Reusing batch %s/%s from %s", batch_number, total_batches, batch_path)
+            continue
         try:
-            batch_smiles = await process_batch(batch, fix_name_bool=fix_names, semaphore=semaphore)
-            smiles_dicts.extend(batch_smiles)
-            logging.info("Completed batch %s/%s", batch_number, total_batches)
-            save_smiles_dict(smiles_dicts, batch_dir / f"smiles_dict_batch_{batch_number}.json")
-            save_cache(cache_path)
+            batch_smiles = await process_batch(
+                batch,
+                session,
+                fix_name_bool=fix_names,
+                semaphore=semaphore,
+                resolution_cache=resolution_cache,
+            )
         except Exception as exc:
             logging.error("Error in batch %s: %s", batch_number, exc)
             smiles_dicts.extend(["Error"] * len(batch))
+            continue
+        smiles_dicts.extend(batch_smiles)
+        logging.info("Completed batch %s/%s", batch_number, total_batches)
+        logging.info("Resolver hosts: %s", format_host_stats())
+        save_smiles_dict(batch_smiles, batch_path)
+        save_cache(cache_path)
+        if manifest is not None:
+            manifest.record(f"resolve:{batch_path.name}", batch_key, [batch_path])
 
     save_smiles_dict(smiles_dicts, batch_dir / "smiles_dict_initial.json")
     return smiles_dicts
@@ -702,9 +1127,8 @@ async def maybe_reprocess_no_smi(
     reprocess_concurrency: int,
     skip_reprocess: bool,
     overrides: str | Path | None = None,
+    session=None,
 ) -> Path:
-    import aiohttp
-
     initial_path = batch_dir / "smiles_dict_initial.json"
     final_path = batch_dir / "smiles_dict_final.json"
     if skip_reprocess:
@@ -712,9 +1136,16 @@ async def maybe_reprocess_no_smi(
 
     load_resolution_overrides(overrides)
     semaphore = asyncio.Semaphore(reprocess_concurrency)
-    async with aiohttp.ClientSession(
-        connector=aiohttp.TCPConnector(ssl=aiohttp_ssl_context())
-    ) as session:
+    if session is None:
+        async with create_lookup_session() as owned_session:
+            await reprocess_no_smi(
+                initial_path,
+                final_path,
+                owned_session,
+                semaphore,
+                batch_size=batch_size,
+            )
+    else:
         await reprocess_no_smi(
             initial_path,
             final_path,
@@ -722,10 +1153,86 @@ async def maybe_reprocess_no_smi(
             semaphore,
             batch_size=batch_size,
         )
+    save_cache()
     return final_path
 
 
+async def run_streaming_pipeline(
+    args: argparse.Namespace,
+    input_path: Path,
+    output_prefix: str,
+    output_path: Path,
+    with_smiles_output_path: Path | None,
+    batch_dir: Path,
+) -> Path:
+    """Run every stage chunk by chunk without stage manifests or batch files."""
+    if output_path.suffix.lower() != ".csv":
+        raise ValueError("--stream appends CSV chunks; use a .csv --output.")
+    configure_no_smi_resolution(args)
+    load_resolution_overrides(args.overrides)
+    cache_path = batch_dir / "smiles_cache.sqlite"
+    load_cache(cache_path)
+    if args.map_atoms:
+        configure_mapping(args)
+    async with create_lookup_session(
+        connections_per_host=args.connections_per_host,
+        dns_cache_ttl=args.dns_cache_ttl,
+        keepalive_timeout=args.keepalive_timeout,
+    ) as session:
+        rows = await stream_reaction_smiles(
+            pd.read_csv(input_path, chunksize=args.batch_size),
+            output_path,
+            model_column=args.model_column,
+            output_prefix=output_prefix,
+            session=session,
+            fix_names=args.fix_names,
+            lookup_concurrency=args.lookup_concurrency,
+            reprocess_concurrency=args.reprocess_concurrency,
+            skip_reprocess=args.skip_reprocess,
+            map_atoms=args.map_atoms,
+            mapping_device=args.mapping_device,
+            mapping_model_version=args.mapping_model_version,
+            mapping_batch_size=args.mapping_batch_size,
+            mapping_workers=args.mapping_workers,
+            with_smiles_output_path=with_smiles_output_path,
+            queue_size=args.stream_queue_size,
+        )
+    save_cache()
+    logging.info(
+        "Negative-cache hits: %s; names sent to resolvers: %s",
+        resolution_stats["negative_cache_hits"],
+        resolution_stats["resolver_lookups"],
+    )
+    logging.info("Canonical SMILES memo: %s", format_canonical_cache_stats())
+    logging.info("KnownAlias: %s", format_known_alias_stats())
+    if args.opsin_jar:
+        logging.info("Local OPSIN: %s", format_opsin_stats())
+    if args.synonym_index:
+        logging.info(
+            "Synonym index: %s hits, %s ambiguous names resolved online",
+            resolution_stats["synonym_index_hits"],
+            resolution_stats["synonym_index_ambiguous"],
+        )
+    if args.map_atoms:
+        logging.info("Atom mapping: %s", format_mapping_stats())
+    conflict_count = audit_name_smiles_consistency(
+        cache_path,
+        batch_dir / "smiles_consistency_audit.csv",
+    )
+    if conflict_count:
+        logging.warning("Found %s same-name SMILES conflicts; see smiles_consistency_audit.csv", conflict_count)
+    logging.info("Pipeline completed. %s rows streamed to %s", rows, output_path)
+    return output_path
+
+
 async def run_pipeline(args: argparse.Namespace) -> Path:
+    """Run the resolution pipeline, skipping stages whose outputs are current.
+
+    Every stage is recorded in ``pipeline_manifest.json`` in the batch
+    directory under a hash of its inputs and configuration. ``--from-stage``
+    reruns that stage and the ones after it; earlier stage outputs must exist.
+    ``--to-stage`` stops after the named stage.
+    """
     input_path = Path(args.input)
     output_prefix = args.output_prefix or os.getenv("OPENAI_MODEL") or args.model_column
     output_path = (
@@ -750,6 +1257,25 @@ async def run_pipeline(args: argparse.Namespace) -> Path:
         else Path("result") / f"{safe_prefix}_smiles_fetch.log"
     )
 
+    if args.shard_count > 1:
+        # Each shard reads its own rows into its own batch directory, so shards
+        # can run as independent processes until shard-merge combines them.
+        shard = (args.shard_index, args.shard_count)
+        batch_dir = shard_batch_dir(batch_dir, *shard)
+        shard_input_path = batch_dir / "shard_input.csv"
+        write_shard_input(
+            input_path,
+            shard_input_path,
+            *shard,
+            strategy=args.shard_by,
+            key_column=args.model_column,
+        )
+        input_path = shard_input_path
+        output_path = shard_output_path(output_path, *shard)
+        log_path = shard_output_path(log_path, *shard)
+        if with_smiles_output_path:
+            with_smiles_output_path = shard_output_path(with_smiles_output_path, *shard)
+
     ensure_directory(output_path.parent)
     if with_smiles_output_path:
         ensure_directory(with_smiles_output_path.parent)
@@ -763,6 +1289,16 @@ async def run_pipeline(args: argparse.Namespace) -> Path:
         format="%(asctime)s - %(levelname)s - %(message)s",
     )
 
+    if args.stream:
+        return await run_streaming_pipeline(
+            args,
+            input_path,
+            output_prefix,
+            output_path,
+            with_smiles_output_path,
+            batch_dir,
+        )
+
     frame = pd.read_csv(input_path)
     if args.model_column not in frame.columns:
         available = ", ".join(frame.columns)
@@ -771,54 +1307,186 @@ async def run_pipeline(args: argparse.Namespace) -> Path:
             f"Available columns: {available}"
         )
 
+    stages = select_stages(args.from_stage, args.to_stage)
+    manifest = StageManifest(batch_dir / "pipeline_manifest.json")
+
+    def stage_is_current(stage: str, key: str) -> bool:
+        if args.from_stage:
+            return False
+        if manifest.is_current(stage, key):
+            logging.info("Skipping stage %s; its outputs are current.", stage)
+            return True
+        return False
+
     responses = frame[args.model_column].fillna("").astype(str).tolist()
-    await make_smiles_dict(
-        responses,
-        batch_dir=batch_dir,
-        batch_size=args.batch_size,
-        fix_names=args.fix_names,
-        lookup_concurrency=args.lookup_concurrency,
-    )
-    smiles_dict_path = await maybe_reprocess_no_smi(
-        batch_dir=batch_dir,
-        batch_size=args.batch_size,
-        reprocess_concurrency=args.reprocess_concurrency,
-        skip_reprocess=args.skip_reprocess,
-        overrides=args.overrides,
-    )
-    conflict_count = audit_name_smiles_consistency(
-        batch_dir / "smiles_cache.pkl",
-        batch_dir / "smiles_consistency_audit.csv",
-    )
-    if conflict_count:
-        logging.warning("Found %s same-name SMILES conflicts; see smiles_consistency_audit.csv", conflict_count)
+    initial_path = batch_dir / "smiles_dict_initial.json"
+    smiles_dict_path = (
+        initial_path if args.skip_reprocess else batch_dir / "smiles_dict_final.json"
+    )
+    audit_path = batch_dir / "smiles_consistency_audit.csv"
+    reactions_path = batch_dir / "reaction_smiles.csv"
+    # Everything besides the input that changes which names resolve. The
+    # synonym index is identified by size and mtime; hashing it would read
+    # gigabytes on every run.
+    resolver_settings = content_digest(
+        "resolver-settings",
+        Path(args.known_aliases) if args.known_aliases else None,
+        Path(args.opsin_jar) if args.opsin_jar else None,
+        file_signature(args.synonym_index),
+        args.resolver_url,
+        args.host_limit,
+        args.circuit_failures,
+        args.circuit_reset_seconds,
+    )
+    resolve_key = content_digest("resolve", responses, args.fix_names, resolver_settings)
+
+    def reprocess_key() -> str:
+        # Hashes the initial dictionary, so it is recomputed after resolving.
+        return content_digest(
+            "reprocess",
+            initial_path,
+            resolver_settings,
+            Path(args.overrides) if args.overrides else None,
+            args.skip_reprocess,
+            args.resolution_mode,
+            args.resolver_priority,
+            args.resolution_quorum,
+        )
 
-    with smiles_dict_path.open("r", encoding="utf-8-sig") as handle:
-        smiles_dicts = json.load(handle)
-    smiles_column = f"{output_prefix}_smiles"
-    frame[smiles_column] = smiles_dicts
-    if with_smiles_output_path:
-        frame.to_csv(with_smiles_output_path, index=False, encoding="utf-8-sig")
+    configure_no_smi_resolution(args)
+    run_resolve = "resolve" in stages and not stage_is_current("resolve", resolve_key)
+    run_reprocess = "reprocess" in stages and not stage_is_current(
+        "reprocess", reprocess_key()
+    )
+    if run_resolve or run_reprocess:
+        async with create_lookup_session(
+            connections_per_host=args.connections_per_host,
+            dns_cache_ttl=args.dns_cache_ttl,
+            keepalive_timeout=args.keepalive_timeout,
+        ) as session:
+            if run_resolve:
+                smiles_dicts = await make_smiles_dict(
+                    responses,
+                    batch_dir=batch_dir,
+                    batch_size=args.batch_size,
+                    fix_names=args.fix_names,
+                    lookup_concurrency=args.lookup_concurrency,
+                    session=session,
+                    manifest=None if args.from_stage else manifest,
+                    settings_key=resolver_settings,
+                )
+                failed_rows = smiles_dicts.count("Error")
+                if failed_rows:
+                    logging.warning(
+                        "Not recording the resolve stage; %s rows are in failed batches.",
+                        failed_rows,
+                    )
+                else:
+                    manifest.record("resolve", resolve_key, [initial_path])
+                run_reprocess = "reprocess" in stages and not stage_is_current(
+                    "reprocess", reprocess_key()
+                )
+            if run_reprocess:
+                if not run_resolve:
+                    load_cache(batch_dir / "smiles_cache.sqlite")
+                smiles_dict_path = await maybe_reprocess_no_smi(
+                    batch_dir=batch_dir,
+                    batch_size=args.batch_size,
+                    reprocess_concurrency=args.reprocess_concurrency,
+                    skip_reprocess=args.skip_reprocess,
+                    overrides=args.overrides,
+                    session=session,
+                )
+                manifest.record("reprocess", reprocess_key(), [smiles_dict_path])
+        logging.info(
+            "Negative-cache hits: %s; names sent to resolvers: %s",
+            resolution_stats["negative_cache_hits"],
+            resolution_stats["resolver_lookups"],
+        )
+        logging.info("Canonical SMILES memo: %s", format_canonical_cache_stats())
+        logging.info("KnownAlias: %s", format_known_alias_stats())
+        if args.opsin_jar:
+            logging.info("Local OPSIN: %s", format_opsin_stats())
+        if args.synonym_index:
+            logging.info(
+                "Synonym index: %s hits, %s ambiguous names resolved online",
+                resolution_stats["synonym_index_hits"],
+                resolution_stats["synonym_index_ambiguous"],
+            )
+    if stages[-1] in {"resolve", "reprocess"}:
+        return initial_path if stages[-1] == "resolve" else smiles_dict_path
+    if not smiles_dict_path.is_file():
+        raise FileNotFoundError(
+            f"{smiles_dict_path} is missing; run the earlier stages first."
+        )
 
-    skeleton_smiles, final_smiles, _errors = process_smiles_data(
-        frame[args.model_column].tolist(),
-        frame[smiles_column].tolist(),
-    )
-    frame[f"{output_prefix}_skeleton"] = skeleton_smiles
-    frame[f"{output_prefix}_rxn"] = final_smiles
-    output_frame = frame.drop(
-        columns=[column for column in ("idx", "model") if column in frame.columns]
-    )
-    if args.map_atoms:
-        output_frame = add_atom_mapping_columns(
-            output_frame,
-            f"{output_prefix}_rxn",
-            output_prefix,
-            device=args.mapping_device,
-            model_version=args.mapping_model_version,
-            batch_size=args.mapping_batch_size,
+    audit_key = content_digest("audit", smiles_dict_path)
+    if "audit" in stages and not stage_is_current("audit", audit_key):
+        conflict_count = audit_name_smiles_consistency(
+            batch_dir / "smiles_cache.sqlite",
+            audit_path,
         )
-    output_frame.to_csv(output_path, index=False, encoding="utf-8-sig")
+        if conflict_count:
+            logging.warning("Found %s same-name SMILES conflicts; see smiles_consistency_audit.csv", conflict_count)
+        manifest.record("audit", audit_key, [audit_path])
+    if stages[-1] == "audit":
+        return audit_path
+
+    reactions_key = content_digest(
+        "reactions",
+        input_path,
+        args.model_column,
+        output_prefix,
+        smiles_dict_path,
+        str(with_smiles_output_path),
+    )
+    if "reactions" in stages and not stage_is_current("reactions", reactions_key):
+        with smiles_dict_path.open("r", encoding="utf-8-sig") as handle:
+            smiles_dicts = json.load(handle)
+        smiles_column = f"{output_prefix}_smiles"
+        frame[smiles_column] = smiles_dicts
+        if with_smiles_output_path:
+            write_table(frame, with_smiles_output_path)
+
+        skeleton_smiles, final_smiles, _errors = process_smiles_data(
+            frame[args.model_column].tolist(),
+            frame[smiles_column].tolist(),
+        )
+        frame[f"{output_prefix}_skeleton"] = skeleton_smiles
+        frame[f"{output_prefix}_rxn"] = final_smiles
+        output_frame = frame.drop(
+            columns=[column for column in ("idx", "model") if column in frame.columns]
+        )
+        output_frame.to_csv(reactions_path, index=False, encoding="utf-8-sig")
+        manifest.record("reactions", reactions_key, [reactions_path])
+    if stages[-1] == "reactions":
+        return reactions_path
+    if not reactions_path.is_file():
+        raise FileNotFoundError(f"{reactions_path} is missing; run the earlier stages first.")
+
+    mapping_key = content_digest(
+        "mapping",
+        reactions_path,
+        args.map_atoms,
+        args.mapping_model_version,
+        str(output_path),
+    )
+    if not stage_is_current("mapping", mapping_key):
+        output_frame = read_table(reactions_path, keep_default_na=False)
+        if args.map_atoms:
+            configure_mapping(args)
+            output_frame = add_atom_mapping_columns(
+                output_frame,
+                f"{output_prefix}_rxn",
+                output_prefix,
+                device=args.mapping_device,
+                model_version=args.mapping_model_version,
+                batch_size=args.mapping_batch_size,
+                workers=args.mapping_workers,
+            )
+            logging.info("Atom mapping: %s", format_mapping_stats())
+        write_table(output_frame, output_path)
+        manifest.record("mapping", mapping_key, [output_path])
     logging.info("Pipeline completed. Output written to %s", output_path)
     return output_path
 
@@ -846,6 +1514,8 @@ def main(argv: list[str] | None = None) -> int:
 
     if args.command == "nosmi-review-apply":
         try:
+            if args.map_atoms:
+                configure_mapping(args)
             specs = model_specs_from_values(args.model, args.result_dir)
             summary = apply_review(
                 specs,
@@ -856,6 +1526,7 @@ def main(argv: list[str] | None = None) -> int:
                 mapping_device=args.mapping_device,
                 mapping_model_version=args.mapping_model_version,
                 mapping_batch_size=args.mapping_batch_size,
+                mapping_workers=args.mapping_workers,
             )
         except Exception as exc:
             parser.exit(1, f"Error: {exc}\n")
@@ -864,6 +1535,8 @@ def main(argv: list[str] | None = None) -> int:
             f"{summary['matched_reviewed_row_names']} row-scoped compounds; "
             f"summary={args.summary}"
         )
+        if args.map_atoms:
+            print(f"Atom mapping: {format_mapping_stats()}")
         return 0
 
     if args.command == "atom-map":
@@ -871,7 +1544,22 @@ def main(argv: list[str] | None = None) -> int:
             output_path = run_atom_mapping(args)
         except Exception as exc:
             parser.exit(1, f"Error: {exc}\n")
-        print(f"Atom mapping completed: {output_path}")
+        print(
+            f"Atom mapping completed: {output_path} "
+            f"({format_mapping_stats()})"
+        )
+        return 0
+
+    if args.command == "shard-merge":
+        try:
+            summary = merge_shards(args.output, args.batch_dir, args.shard_count)
+        except Exception as exc:
+            parser.exit(1, f"Error: {exc}\n")
+        print(
+            f"Shards merged: {summary['output']} ({summary['rows']} rows, "
+            f"{summary['shard_disagreements']} cross-shard disagreements, "
+            f"{summary['normalized_name_conflicts']} normalized-name conflicts)"
+        )
         return 0
 
     if args.command == "retry-nosmi":
@@ -879,7 +1567,10 @@ def main(argv: list[str] | None = None) -> int:
             output_path = asyncio.run(run_retry_no_smi(args))
         except Exception as exc:
             parser.exit(1, f"Error: {exc}\n")
-        print(f"NoSmi recovery completed: {output_path}")
+        print(
+            f"NoSmi recovery completed: {output_path} "
+            f"(negative-cache hits: {resolution_stats['negative_cache_hits']})"
+        )
         return 0
 
     if args.command == "gpt-extract":
@@ -2,13 +2,28 @@
 
 from __future__ import annotations
 
+import ast
 import json
+import math
 import time
 from pathlib import Path
 from threading import Event
+from typing import Any
 
 import pandas as pd
 
+# Pipeline columns that hold Python lists or dictionaries. CSV stores them as
+# repr strings; Parquet stores them as native list and map columns.
+STRUCTURED_COLUMN_SUFFIXES = (
+    "_smiles",
+    "_skeleton",
+    "_rxn",
+    "_mapped_rxn",
+    "_mapping_template",
+    "_mapping_confident",
+    "_mapping_error",
+)
+
 
 def ensure_directory(directory: str | Path) -> Path:
     path = Path(directory)
@@ -16,6 +31,134 @@ def ensure_directory(directory: str | Path) -> Path:
     return path
 
 
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise RuntimeError(
+            "Parquet tables require pyarrow. Install it with "
+            "`python -m pip install -e \".[parquet]\"`. "
+            f"Original import error: {exc}"
+        ) from exc
+    return pyarrow
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _parse_structured(value: Any) -> Any:
+    if isinstance(value, str) and value.strip()[:1] in {"[", "{"}:
+        try:
+            return ast.literal_eval(value.strip())
+        except (SyntaxError, ValueError):
+            return value
+    return value
+
+
+def _arrow_column(pa, series: pd.Series):
+    """Convert one column, storing lists and dictionaries natively when uniform."""
+    if not pd.api.types.is_object_dtype(series) and not pd.api.types.is_string_dtype(series):
+        return pa.Array.from_pandas(series)
+    values = series.tolist()
+    if str(series.name).endswith(STRUCTURED_COLUMN_SUFFIXES):
+        values = [_parse_structured(value) for value in values]
+    present = [value for value in values if not _is_missing(value)]
+    try:
+        if present and all(isinstance(value, dict) for value in present):
+            return pa.array(
+                [
+                    None
+                    if _is_missing(value)
+                    else [(str(key), None if item is None else str(item)) for key, item in value.items()]
+                    for value in values
+                ],
+                type=pa.map_(pa.string(), pa.string()),
+            )
+        if any(isinstance(value, (list, tuple)) for value in present) and all(
+            isinstance(value, (list, tuple, str)) for value in present
+        ):
+            # Row-level error messages are plain strings in otherwise
+            # list-valued columns; a one-item list reads back identically.
+            return pa.array(
+                [
+                    None
+                    if _is_missing(value)
+                    else list(value) if isinstance(value, (list, tuple)) else [value]
+                    for value in values
+                ]
+            )
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(
+            [
+                None if _is_missing(value) else value if isinstance(value, str) else repr(value)
+                for value in values
+            ],
+            type=pa.string(),
+        )
+
+
+def write_parquet_table(frame: pd.DataFrame, path: str | Path) -> None:
+    pa = _import_pyarrow()
+    table = pa.table(
+        {str(column): _arrow_column(pa, frame[column]) for column in frame.columns}
+    )
+    pa.parquet.write_table(table, path)
+
+
+def read_parquet_table(path: str | Path) -> pd.DataFrame:
+    """Read a Parquet table with list and map columns as Python lists and dicts."""
+    pa = _import_pyarrow()
+    table = pa.parquet.read_table(path)
+    frame = table.to_pandas()
+    for field in table.schema:
+        if pa.types.is_map(field.type):
+            values = [
+                None if value is None else dict(value)
+                for value in table.column(field.name).to_pylist()
+            ]
+        elif pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+            values = table.column(field.name).to_pylist()
+        else:
+            continue
+        frame[field.name] = pd.Series(values, index=frame.index, dtype=object)
+    return frame
+
+
+def read_table(path: str | Path, **options) -> pd.DataFrame:
+    """Read a CSV, Excel, or Parquet table; ``options`` go to the pandas CSV or Excel reader."""
+    table_path = Path(path)
+    suffix = table_path.suffix.lower()
+    if suffix in {".xlsx", ".xls"}:
+        return pd.read_excel(table_path, **options)
+    if suffix == ".parquet":
+        return read_parquet_table(table_path)
+    return pd.read_csv(table_path, **options)
+
+
+def read_model_output(results_dir: str | Path, model: str) -> tuple[Path, pd.DataFrame]:
+    """Read a model's final reaction table, preferring the Parquet copy when one exists."""
+    for suffix in (".parquet", ".csv"):
+        path = Path(results_dir) / f"{model}_reaction_smiles_final{suffix}"
+        if path.is_file():
+            return path, read_table(path)
+    raise FileNotFoundError(path)
+
+
+def write_table(frame: pd.DataFrame, path: str | Path) -> None:
+    table_path = Path(path)
+    ensure_directory(table_path.parent)
+    suffix = table_path.suffix.lower()
+    if suffix in {".xlsx", ".xls"}:
+        frame.to_excel(table_path, index=False)
+    elif suffix == ".parquet":
+        write_parquet_table(frame, table_path)
+    else:
+        frame.to_csv(table_path, index=False, encoding="utf-8-sig")
+
+
 def save_smiles_dict(smiles_dict: dict, filename: str | Path) -> None:
     with Path(filename).open("w", encoding="utf-8-sig") as handle:
         json.dump(smiles_dict, handle, ensure_ascii=False, indent=2)
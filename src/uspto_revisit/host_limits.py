@@ -0,0 +1,235 @@
+"""Per-host rate limits and circuit breakers for external name resolvers."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field, replace
+from urllib.parse import urlsplit
+
+# Resolver base URLs registered by smiles_fetch. Requests under one of them
+# share that source's limiter, so sources behind one host (for example the
+# local stand-in server) keep separate budgets; other URLs are keyed by host.
+source_urls: dict[str, str] = {}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a host is skipped because its circuit breaker is open."""
+
+
+@dataclass
+class HostPolicy:
+    """Request budget for one resolver host; zero disables a limit."""
+
+    rate: float = 0.0
+    concurrency: int = 0
+    failure_threshold: int = 5
+    reset_seconds: float = 60.0
+
+
+# PubChem documents a limit of five requests per second per user.
+DEFAULT_POLICIES = {
+    "PubChem": HostPolicy(rate=5.0),
+}
+
+
+@dataclass
+class HostLimiter:
+    """Token bucket, concurrency cap, and circuit breaker for one host."""
+
+    host: str
+    policy: HostPolicy
+    counters: dict = field(
+        default_factory=lambda: {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "in_flight": 0,
+        }
+    )
+    consecutive_failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+
+    def __post_init__(self) -> None:
+        self._loop = None
+        self._semaphore = None
+        self._lock = None
+        self._tokens = max(1.0, self.policy.rate)
+        self._updated = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.policy.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def _bind_loop(self) -> None:
+        # Semaphores and locks belong to one event loop; each asyncio.run gets
+        # fresh primitives while the counters and breaker state carry over.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._semaphore = (
+                asyncio.Semaphore(self.policy.concurrency)
+                if self.policy.concurrency > 0
+                else None
+            )
+
+    async def _take_token(self) -> None:
+        if self.policy.rate <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                max(1.0, self.policy.rate),
+                self._tokens + (now - self._updated) * self.policy.rate,
+            )
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.policy.rate)
+                self._updated = time.monotonic()
+                self._tokens = 0.0
+            else:
+                self._tokens -= 1
+
+    async def __aenter__(self) -> HostLimiter:
+        state = self.state
+        if state == "open" or (state == "half-open" and self.probing):
+            self.counters["rejected"] += 1
+            raise CircuitOpenError(f"Circuit for {self.host} is open.")
+        if state == "half-open":
+            self.probing = True
+        self._bind_loop()
+        try:
+            if self._semaphore is not None:
+                await self._semaphore.acquire()
+            try:
+                await self._take_token()
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+        except BaseException:
+            # A probe cancelled while waiting for a slot never reached the host.
+            if state == "half-open":
+                self.probing = False
+            raise
+        self.counters["requests"] += 1
+        self.counters["in_flight"] += 1
+        return self
+
+    async def __aexit__(self, exc_type, _exc, _traceback) -> None:
+        self.counters["in_flight"] -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+        # Callers record the outcome of a request that raised an ordinary
+        # exception. A probe that was cancelled, or that ended without an
+        # outcome, frees the slot so a later request can probe again.
+        if self.probing and (exc_type is None or not issubclass(exc_type, Exception)):
+            self.probing = False
+
+    def record_success(self) -> None:
+        self.counters["successes"] += 1
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.counters["failures"] += 1
+        self.consecutive_failures += 1
+        if self.probing or (
+            self.policy.failure_threshold > 0
+            and self.consecutive_failures >= self.policy.failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def stats(self) -> dict:
+        return {**self.counters, "state": self.state}
+
+
+host_policies: dict[str, HostPolicy] = {}
+default_policy = HostPolicy()
+_limiters: dict[str, HostLimiter] = {}
+
+
+def register_source_urls(urls: dict[str, str]) -> None:
+    source_urls.clear()
+    source_urls.update(urls)
+    _limiters.clear()
+
+
+def configure_host_limits(
+    policies: dict[str, HostPolicy] | None = None,
+    failure_threshold: int = 5,
+    reset_seconds: float = 60.0,
+) -> None:
+    """Replace the per-host policies; keys are source names or host names."""
+    global default_policy
+    default_policy = HostPolicy(
+        failure_threshold=failure_threshold,
+        reset_seconds=reset_seconds,
+    )
+    host_policies.clear()
+    for key, policy in {**DEFAULT_POLICIES, **(policies or {})}.items():
+        host_policies[key] = replace(
+            policy,
+            failure_threshold=failure_threshold,
+            reset_seconds=reset_seconds,
+        )
+    _limiters.clear()
+
+
+def parse_host_limit(value: str) -> tuple[str, HostPolicy]:
+    """Parse ``SOURCE=RATE[:CONCURRENCY]``, for example ``CIR=2:4``."""
+    key, separator, budget = value.partition("=")
+    if not separator or not key.strip():
+        raise ValueError(f"Host limit {value!r} must look like SOURCE=RATE[:CONCURRENCY].")
+    rate, _separator, concurrency = budget.partition(":")
+    try:
+        return key.strip(), HostPolicy(
+            rate=float(rate or 0),
+            concurrency=int(concurrency or 0),
+        )
+    except ValueError as exc:
+        raise ValueError(f"Invalid host limit {value!r}: {exc}") from exc
+
+
+def _limiter_key(url: str) -> str:
+    for source, base_url in source_urls.items():
+        if url.startswith(f"{base_url}/") or url.startswith(f"{base_url}?"):
+            return source
+    return urlsplit(url).netloc or url
+
+
+def host_limiter(url: str) -> HostLimiter:
+    key = _limiter_key(url)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        hostname = urlsplit(url).hostname or ""
+        policy = host_policies.get(key) or host_policies.get(hostname)
+        limiter = HostLimiter(key, replace(policy or default_policy))
+        _limiters[key] = limiter
+    return limiter
+
+
+def host_stats() -> dict[str, dict]:
+    """Return live counters and breaker state for every contacted source or host."""
+    return {host: limiter.stats() for host, limiter in sorted(_limiters.items())}
+
+
+def format_host_stats() -> str:
+    return "; ".join(
+        f"{host}: {stats['requests']} req, {stats['successes']} ok, "
+        f"{stats['failures']} failed, {stats['rejected']} rejected, "
+        f"{stats['in_flight']} in flight, {stats['state']}"
+        for host, stats in host_stats().items()
+    )
+
+
+configure_host_limits()
@@ -65,42 +65,46 @@ def fix_json_string(json_string: str) -> str | None:
         return None
 
 
+# Removed anywhere in a name, case-insensitively, by fix_name. Order matters:
+# earlier alternatives win where several match at the same position.
+FIX_NAME_REMOVALS = (
+    r"\d+\s+normal",
+    r"\d+(\.\d+)?\s*N-",
+    r"\d+(\.\d+)?\s*N",
+    r"\d+(\.\d+)?\s*M",
+    r"\d+%",
+    r"\s*\(\s*\)",
+    r"\([^()]*\)$",
+    r"·",
+    r"\([IVXLCDM]+\)",
+    "anhydrous",
+    "concentrated",
+    "catalyst",
+    "-catalyst",
+    "saturated",
+    "ice",
+    "ice-",
+    "dried",
+    "aqueous",
+    "solution",
+    "normal",
+    "solid",
+    "complex",
+    "resin",
+    "adduct",
+    "corresponding",
+    "atmosphere",
+    "gas",
+    "solvent",
+    "crystal",
+    "crystals",
+    "buffer",
+    ".conc",
+    "fuming",
+    "glacial",
+)
+_FIX_NAME_PATTERN = re.compile(f"({'|'.join(FIX_NAME_REMOVALS)})", re.I)
+
+
 def fix_name(compound_name: str) -> str:
-    remove_patterns = [
-        r"\d+\s+normal",
-        r"\d+(\.\d+)?\s*N-",
-        r"\d+(\.\d+)?\s*N",
-        r"\d+(\.\d+)?\s*M",
-        r"\d+%",
-        r"\s*\(\s*\)",
-        r"\([^()]*\)$",
-        r"·",
-        r"\([IVXLCDM]+\)",
-        "anhydrous",
-        "concentrated",
-        "catalyst",
-        "-catalyst",
-        "saturated",
-        "ice",
-        "ice-",
-        "dried",
-        "aqueous",
-        "solution",
-        "normal",
-        "solid",
-        "complex",
-        "resin",
-        "adduct",
-        "corresponding",
-        "atmosphere",
-        "gas",
-        "solvent",
-        "crystal",
-        "crystals",
-        "buffer",
-        ".conc",
-        "fuming",
-        "glacial",
-    ]
-    pattern = f"({'|'.join(remove_patterns)})"
-    return re.sub(pattern, "", compound_name, flags=re.I).strip()
+    return _FIX_NAME_PATTERN.sub("", compound_name).strip()
@@ -0,0 +1,171 @@
+"""Registry of solvent, reagent, and catalyst names with fixed SMILES.
+
+Aliases come from the built-in table in ``smiles_fetch`` plus an optional
+versioned JSON file::
+
+    {
+      "schema_version": 1,
+      "version": "2026-10-01",
+      "aliases": [{"name": "DCM", "smiles": "ClCCl"}, ...]
+    }
+
+File entries replace built-in entries with the same case-folded name. Every
+SMILES is canonicalized once when the table is first needed, and lookups are
+dict probes: first by case-folded name, then by normalized name key when every
+alias sharing that key agrees on one structure. The pipeline's key only folds
+spaces, hyphens, and dashes together; dropping any other punctuation would let
+"PDC" (pyridinium dichromate) fall back to the alias for "Pd/C".
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+
+ALIAS_SCHEMA_VERSION = 1
+
+
+def read_alias_file(path: str | Path) -> tuple[str, list[tuple[str, str]], str]:
+    """Return ``(version, [(name, smiles), ...], sha256)`` for an alias file."""
+    raw = Path(path).read_bytes()
+    payload = json.loads(raw.decode("utf-8-sig"))
+    if not isinstance(payload, dict) or not isinstance(payload.get("aliases"), list):
+        raise ValueError("A known-alias file must be an object with an 'aliases' list.")
+    schema_version = payload.get("schema_version", ALIAS_SCHEMA_VERSION)
+    if schema_version != ALIAS_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported known-alias schema version {schema_version!r}.")
+    entries = []
+    for entry in payload["aliases"]:
+        if not isinstance(entry, dict) or not entry.get("name") or not entry.get("smiles"):
+            raise ValueError(f"Every known alias needs a 'name' and 'smiles': {entry!r}")
+        entries.append((str(entry["name"]), str(entry["smiles"])))
+    return str(payload.get("version", "")), entries, hashlib.sha256(raw).hexdigest()
+
+
+class KnownAliasRegistry:
+    """Case-folded and normalized-key indexes over canonical alias SMILES.
+
+    Nothing is parsed until the first lookup or an explicit ``load``.
+    ``reload_if_changed`` rereads the alias file when its size or mtime
+    changed, so a long run picks up edits between batches; a file that fails
+    to load keeps the previous table. ``hits`` counts lookups answered per
+    alias name for the life of the registry.
+    """
+
+    def __init__(
+        self,
+        defaults: dict[str, str],
+        canonicalize: Callable[[str], str | None],
+        key_function: Callable[[str], str] = str.casefold,
+        path: str | Path | None = None,
+    ) -> None:
+        self.defaults = dict(defaults)
+        self.canonicalize = canonicalize
+        self.key_function = key_function
+        self.path = Path(path) if path else None
+        self.version = "builtin"
+        self.digest = ""
+        self.hits = Counter()
+        self.stats = Counter()
+        self._signature = None
+        self._by_name: dict[str, tuple[str, str]] | None = None
+        self._by_key: dict[str, tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._indexes()[0])
+
+    def _signature_now(self) -> tuple[int, int] | None:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _indexes(self) -> tuple[dict[str, tuple[str, str]], dict[str, tuple[str, str]]]:
+        if self._by_name is None:
+            self.load()
+        return self._by_name, self._by_key
+
+    def _canonical(self, name: str, smiles: str) -> str:
+        canonical = self.canonicalize(smiles)
+        if not canonical:
+            raise ValueError(f"Invalid known-alias SMILES for {name!r}: {smiles!r}")
+        return canonical
+
+    def load(self) -> None:
+        """Parse the built-in table and the alias file, replacing the current table."""
+        by_name = {}
+        for name, smiles in self.defaults.items():
+            by_name[name.casefold()] = (name, self._canonical(name, smiles))
+        version, digest, signature = "builtin", "", None
+        if self.path is not None:
+            signature = self._signature_now()
+            version, file_entries, digest = read_alias_file(self.path)
+            file_names = {}
+            for name, smiles in file_entries:
+                canonical = self._canonical(name, smiles)
+                previous = file_names.setdefault(name.casefold(), canonical)
+                if previous != canonical:
+                    raise ValueError(f"Known alias {name!r} is listed with two structures.")
+                by_name[name.casefold()] = (name, canonical)
+        by_key, conflicting = {}, set()
+        for name, canonical in by_name.values():
+            key = self.key_function(name)
+            if not key or key in conflicting:
+                continue
+            if key in by_key and by_key[key][1] != canonical:
+                conflicting.add(key)
+                del by_key[key]
+            else:
+                by_key.setdefault(key, (name, canonical))
+        # Swap whole indexes so a lookup never sees a half-loaded table.
+        self._by_name, self._by_key = by_name, by_key
+        self.version, self.digest, self._signature = version, digest, signature
+        logging.info(
+            "Loaded %s known aliases (version %s, %s normalized keys)",
+            len(by_name),
+            version,
+            len(by_key),
+        )
+
+    def reload_if_changed(self) -> bool:
+        """Reload the alias file if it changed on disk; return whether it did."""
+        if self.path is None or self._by_name is None:
+            return False
+        try:
+            if self._signature_now() == self._signature:
+                return False
+            self.load()
+        except (OSError, ValueError) as exc:
+            logging.error("Keeping known aliases version %s: %s", self.version, exc)
+            return False
+        self.stats["reloads"] += 1
+        return True
+
+    def lookup(self, cleaned_name: str) -> str | None:
+        """Return the canonical SMILES for a cleaned name, or None."""
+        by_name, by_key = self._indexes()
+        self.stats["lookups"] += 1
+        match = by_name.get(cleaned_name.casefold())
+        if match is not None:
+            self.stats["exact_hits"] += 1
+        else:
+            match = by_key.get(self.key_function(cleaned_name))
+            if match is None:
+                return None
+            self.stats["normalized_hits"] += 1
+        self.hits[match[0]] += 1
+        return match[1]
+
+    def summary(self) -> dict:
+        aliases = len(self)
+        return {
+            "version": self.version,
+            "aliases": aliases,
+            "lookups": self.stats["lookups"],
+            "exact_hits": self.stats["exact_hits"],
+            "normalized_hits": self.stats["normalized_hits"],
+            "reloads": self.stats["reloads"],
+            "top_aliases": dict(self.hits.most_common(10)),
+        }
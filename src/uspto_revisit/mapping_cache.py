@@ -0,0 +1,163 @@
+"""Persistent SQLite cache of LocalMapper results."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from rdkit import Chem, rdBase
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mappings (
+    reaction_key TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    localmapper_rxn TEXT NOT NULL,
+    mapped_rxn TEXT,
+    template TEXT,
+    confident TEXT,
+    error TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (reaction_key, model_version)
+);
+"""
+
+
+@lru_cache(maxsize=65536)
+def _parse_molecule(smiles: str) -> tuple[str, int] | None:
+    # Unparseable inputs are expected here; keep RDKit from logging each one.
+    with rdBase.BlockLogs():
+        molecule = Chem.MolFromSmiles(smiles)
+    if molecule is None:
+        return None
+    return Chem.MolToSmiles(molecule), molecule.GetNumHeavyAtoms()
+
+
+def canonical_molecule(smiles: str) -> str | None:
+    """Return RDKit's canonical SMILES, or None when RDKit cannot parse it."""
+    parsed = _parse_molecule(smiles)
+    return parsed[0] if parsed else None
+
+
+def reaction_heavy_atoms(reaction: str) -> int:
+    """Count heavy atoms over every parseable molecule of a reaction."""
+    parsed = (_parse_molecule(item) for item in reaction.replace(">", ".").split(".") if item)
+    return sum(molecule[1] for molecule in parsed if molecule)
+
+
+def canonical_reaction_key(localmapper_rxn: str) -> str:
+    """Return ``reactants>>products`` with canonical, sorted molecules.
+
+    Reactions that differ only in SMILES spelling or in molecule order share
+    one key. Molecules RDKit cannot parse are kept verbatim.
+    """
+    reactants, separator, products = localmapper_rxn.partition(">>")
+    if not separator:
+        return localmapper_rxn
+    return ">>".join(
+        ".".join(sorted(canonical_molecule(item) or item for item in side.split(".") if item))
+        for side in (reactants, products)
+    )
+
+
+class MappingCache:
+    """LocalMapper results keyed by canonical reaction and model version.
+
+    A cached ``mapped_rxn`` is the mapping of the first spelling of a reaction
+    that was mapped, so molecule order may differ from a later equivalent
+    input. Only successful mappings are stored and returned: a failure may
+    come from memory pressure or a crashed worker and is retried next run.
+
+    One connection is shared by every thread that maps, such as the
+    streaming pipeline's mapping thread, and a lock serializes its use.
+    """
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        if self.path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+    def __enter__(self) -> MappingCache:
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM mappings").fetchone()[0]
+
+    def get_many(
+        self,
+        reaction_keys: Iterable[str],
+        model_version: str,
+    ) -> dict[str, dict[str, Any]]:
+        """Return cached successful results for the keys that have one."""
+        results = {}
+        keys = list(dict.fromkeys(reaction_keys))
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            # Error rows written by earlier versions are ignored and remapped.
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT reaction_key, mapped_rxn, template, confident, error "
+                    "FROM mappings WHERE model_version = ? AND error = '' "
+                    f"AND mapped_rxn IS NOT NULL AND reaction_key IN ({placeholders})",
+                    (model_version, *chunk),
+                ).fetchall()
+            for key, mapped_rxn, template, confident, error in rows:
+                results[key] = {
+                    "mapped_rxn": mapped_rxn,
+                    "template": template,
+                    "confident": json.loads(confident) if confident is not None else None,
+                    "error": error,
+                }
+        return results
+
+    def put_many(
+        self,
+        records: Iterable[tuple[str, dict[str, Any]]],
+        model_version: str,
+    ) -> None:
+        """Store successful ``(reaction_key, mapping_record)`` pairs and commit them."""
+        now = time.time()
+        rows = [
+            (
+                key,
+                model_version,
+                record["localmapper_rxn"],
+                record["mapped_rxn"],
+                record["template"],
+                json.dumps(record["confident"]) if record["confident"] is not None else None,
+                record["error"],
+                now,
+            )
+            for key, record in records
+            if record["mapped_rxn"] and not record["error"]
+        ]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO mappings "
+                "(reaction_key, model_version, localmapper_rxn, mapped_rxn, template, "
+                "confident, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,395 @@
+"""Long-lived local LocalMapper service on a Unix domain socket.
+
+Loading torch, DGL, and the LocalMapper weights takes longer than mapping the
+handful of reactions an incremental ``nosmi-review-apply`` or ``atom-map``
+run needs. The daemon loads the model once and serves batches to any
+command on the same host. Start it with::
+
+    python -m uspto_revisit.mapping_daemon --model-version 202403
+
+and the mapping commands use it automatically (``--mapping-socket``). The
+socket lives in ``$XDG_RUNTIME_DIR`` when that is set, is created with
+owner-only permissions, and carries newline-delimited JSON, never pickles;
+DGL's distributed RPC service is not involved. Clients only talk to a socket
+owned by their own user, so another account cannot pose as the daemon.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from uspto_revisit.atom_mapping import (
+    MAPPING_RESULT_FIELDS,
+    _create_local_mapper,
+    _empty_mapping_record,
+    _map_batch,
+    _run_batches,
+    close_mapper,
+    mapping_stats,
+)
+
+# Counters a daemon reports back to the client for each request.
+_BATCH_COUNTERS = ("batch_failures", "isolation_passes")
+
+# How long a client waits for one mapping request before mapping in process.
+MAP_REQUEST_TIMEOUT_SECONDS = 600.0
+
+
+def default_socket_path() -> str:
+    configured = os.environ.get("USPTO_REVISIT_MAPPING_SOCKET")
+    if configured:
+        return configured
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and Path(runtime_dir).is_dir():
+        return str(Path(runtime_dir) / "uspto-revisit-mapping.sock")
+    user = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return str(Path(tempfile.gettempdir()) / f"uspto-revisit-mapping-{user}.sock")
+
+
+def _check_socket_owner(socket_path: str) -> None:
+    """Raise PermissionError unless ``socket_path`` is a socket this user owns."""
+    info = os.stat(socket_path)
+    if not stat.S_ISSOCK(info.st_mode):
+        raise PermissionError(f"{socket_path} is not a socket.")
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} is owned by another user (uid {info.st_uid}).")
+
+
+def _request(connection: socket.socket, handle, message: dict) -> dict:
+    connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+    line = handle.readline()
+    if not line:
+        raise ConnectionError("The mapping daemon closed the connection.")
+    response = json.loads(line)
+    if "error" in response:
+        raise RuntimeError(f"Mapping daemon error: {response['error']}")
+    return response
+
+
+class MappingDaemonClient:
+    """Send mapping batches to a daemon, falling back to in-process mapping.
+
+    If the daemon stops answering, the remaining batches are mapped by the
+    mapper ``fallback`` returns.
+    """
+
+    def __init__(self, socket_path: str, status: dict, fallback: Callable[[], Any]) -> None:
+        self.socket_path = socket_path
+        self.status = status
+        self._fallback = fallback
+        self._local_mapper = None
+        self._connection = None
+        self._handle = None
+
+    def _connect(self) -> None:
+        if self._connection is None:
+            _check_socket_owner(self.socket_path)
+            self._connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._connection.settimeout(MAP_REQUEST_TIMEOUT_SECONDS)
+            self._connection.connect(self.socket_path)
+            self._handle = self._connection.makefile("rb")
+
+    def _map_locally(self, batches: list[list[dict[str, Any]]]) -> Iterator[list]:
+        if self._local_mapper is None:
+            self._local_mapper = self._fallback()
+        if hasattr(self._local_mapper, "map_batches"):
+            yield from self._local_mapper.map_batches(batches)
+            return
+        for batch in batches:
+            _map_batch(self._local_mapper, batch)
+            yield batch
+
+    def map_batches(self, batches: list[list[dict[str, Any]]]) -> Iterator[list[dict[str, Any]]]:
+        """Map batches on the daemon, a few per request, yielding each batch."""
+        per_request = max(1, int(self.status.get("workers", 1)))
+        for start in range(0, len(batches), per_request):
+            group = batches[start : start + per_request]
+            if self._local_mapper is None:
+                try:
+                    self._connect()
+                    response = _request(
+                        self._connection,
+                        self._handle,
+                        {
+                            "op": "map",
+                            "batches": [
+                                [record["localmapper_rxn"] for record in batch]
+                                for batch in group
+                            ],
+                        },
+                    )
+                    results = response.get("results")
+                    if not isinstance(results, list) or len(results) != len(group) or any(
+                        not isinstance(batch_results, list) or len(batch_results) != len(batch)
+                        for batch, batch_results in zip(group, results)
+                    ):
+                        raise ValueError("its results do not match the batches sent")
+                    if not all(
+                        isinstance(result, dict) and result.keys() >= set(MAPPING_RESULT_FIELDS)
+                        for batch_results in results
+                        for result in batch_results
+                    ):
+                        raise ValueError("a result is missing mapping fields")
+                    counters = response.get("counters", {})
+                except (OSError, ValueError, RuntimeError) as exc:
+                    logging.warning(
+                        "Mapping daemon at %s failed (%s); mapping in process.",
+                        self.socket_path,
+                        exc,
+                    )
+                    self.close()
+                else:
+                    for batch, batch_results in zip(group, results):
+                        for record, result in zip(batch, batch_results):
+                            record.update({field: result[field] for field in MAPPING_RESULT_FIELDS})
+                        yield batch
+                    mapping_stats.update(counters)
+                    continue
+            yield from self._map_locally(group)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+        self._handle = None
+        if self._local_mapper is not None:
+            close_mapper(self._local_mapper)
+            self._local_mapper = None
+
+
+def query_mapping_daemon(socket_path: str, op: str = "status", timeout: float = 2.0) -> dict:
+    """Send ``status`` or ``stop`` to a daemon and return its reply."""
+    _check_socket_owner(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+        with connection.makefile("rb") as handle:
+            return _request(connection, handle, {"op": op})
+
+
+def connect_mapping_daemon(
+    socket_path: str,
+    model_version: str,
+    fallback: Callable[[], Any],
+    device: str | None = None,
+) -> MappingDaemonClient | None:
+    """Return a client when a daemon for ``model_version`` answers, else None.
+
+    With ``device`` given, a daemon running on another device is not used
+    either, so a run asking for ``cpu`` never gets GPU results or the reverse.
+    """
+    if not hasattr(socket, "AF_UNIX") or not Path(socket_path).exists():
+        return None
+    try:
+        status = query_mapping_daemon(socket_path)
+    except PermissionError as exc:
+        logging.warning("Not using the mapping daemon socket: %s", exc)
+        return None
+    except (OSError, ValueError, RuntimeError) as exc:
+        logging.info("No usable mapping daemon at %s: %s", socket_path, exc)
+        return None
+    if status.get("model_version") != model_version:
+        logging.info(
+            "Mapping daemon at %s serves model %s, not %s; mapping in process.",
+            socket_path,
+            status.get("model_version"),
+            model_version,
+        )
+        return None
+    if device is not None and status.get("device") != device:
+        logging.info(
+            "Mapping daemon at %s runs on %s, not %s; mapping in process.",
+            socket_path,
+            status.get("device"),
+            device,
+        )
+        return None
+    logging.info("Using the mapping daemon at %s", socket_path)
+    return MappingDaemonClient(socket_path, status, fallback)
+
+
+class _MappingService:
+    def __init__(self, mapper, device: str, model_version: str, workers: int) -> None:
+        self.mapper = mapper
+        self.device = device
+        self.model_version = model_version
+        self.workers = workers
+        self.started_at = time.time()
+        self.requests = 0
+        self.reactions = 0
+        self.mapping_seconds = 0.0
+        # LocalMapper is not thread-safe; one request maps at a time.
+        self.lock = threading.Lock()
+
+    def map(self, batches: list[list[str]]) -> dict:
+        records = [
+            [_empty_mapping_record(localmapper_rxn=reaction) for reaction in batch]
+            for batch in batches
+        ]
+        with self.lock:
+            before = Counter({key: mapping_stats[key] for key in _BATCH_COUNTERS})
+            started = time.perf_counter()
+            _run_batches(self.mapper, records)
+            self.mapping_seconds += time.perf_counter() - started
+            self.requests += 1
+            self.reactions += sum(len(batch) for batch in batches)
+            counters = {key: mapping_stats[key] - before[key] for key in _BATCH_COUNTERS}
+        return {
+            "results": [
+                [{field: record[field] for field in MAPPING_RESULT_FIELDS} for record in batch]
+                for batch in records
+            ],
+            "counters": counters,
+        }
+
+    def status(self) -> dict:
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "device": self.device,
+            "model_version": self.model_version,
+            "workers": self.workers,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "reactions": self.reactions,
+            "mapping_seconds": round(self.mapping_seconds, 3),
+            "reactions_per_second": (
+                round(self.reactions / self.mapping_seconds, 1) if self.mapping_seconds else 0.0
+            ),
+            **{key: mapping_stats[key] for key in _BATCH_COUNTERS},
+        }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        service: _MappingService = self.server.service
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+                if message.get("op") == "map":
+                    response = service.map(message["batches"])
+                elif message.get("op") == "status":
+                    response = service.status()
+                elif message.get("op") == "stop":
+                    response = {"status": "stopping"}
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    response = {"error": f"Unknown operation {message.get('op')!r}."}
+            except Exception as exc:
+                response = {"error": f"{type(exc).__name__}: {exc}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _MappingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_mapping_daemon(
+    socket_path: str,
+    mapper,
+    device: str = "cpu",
+    model_version: str = "202403",
+    workers: int = 1,
+    ready: threading.Event | None = None,
+) -> None:
+    """Serve ``mapper`` on ``socket_path`` until a ``stop`` request arrives."""
+    path = Path(socket_path)
+    if path.exists():
+        try:
+            query_mapping_daemon(socket_path)
+        except (OSError, ValueError, RuntimeError):
+            path.unlink()
+        else:
+            raise RuntimeError(f"A mapping daemon is already running at {socket_path}.")
+    previous_umask = os.umask(0o177)
+    try:
+        server = _MappingServer(socket_path, _RequestHandler)
+    finally:
+        os.umask(previous_umask)
+    server.service = _MappingService(mapper, device, model_version, workers)
+    try:
+        if ready is not None:
+            ready.set()
+        server.serve_forever()
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Keep LocalMapper loaded and serve mapping requests on a local socket.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=default_socket_path(),
+        help=f"Unix socket path. Default: {default_socket_path()}",
+    )
+    parser.add_argument("--device", default="cpu", help="LocalMapper PyTorch device. Default: cpu")
+    parser.add_argument(
+        "--model-version",
+        default="202403",
+        help="Bundled LocalMapper model version. Default: 202403",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="LocalMapper worker processes behind the daemon. Default: 1",
+    )
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--status", action="store_true", help="Print a running daemon's stats.")
+    action.add_argument("--stop", action="store_true", help="Stop a running daemon.")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: the mapping daemon needs Unix domain sockets.")
+        return 1
+    if args.status or args.stop:
+        try:
+            reply = query_mapping_daemon(args.socket, "stop" if args.stop else "status")
+        except (OSError, ValueError, RuntimeError) as exc:
+            print(f"Error: no mapping daemon at {args.socket}: {exc}")
+            return 1
+        print(json.dumps(reply, indent=2))
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    mapper = _create_local_mapper(args.device, args.model_version, args.workers)
+    print(f"Mapping daemon for LocalMapper {args.model_version} listening on {args.socket}")
+    try:
+        serve_mapping_daemon(
+            args.socket,
+            mapper,
+            device=args.device,
+            model_version=args.model_version,
+            workers=args.workers,
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_mapper(mapper)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+"""Persistent SQLite store for resolved compound names."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    name TEXT PRIMARY KEY,
+    normalized_name TEXT NOT NULL,
+    smiles TEXT NOT NULL,
+    source TEXT,
+    updated_at REAL NOT NULL,
+    canonical INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS names_normalized_name ON names (normalized_name);
+CREATE TABLE IF NOT EXISTS failures (
+    normalized_name TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    outcomes TEXT NOT NULL,
+    attempted_at REAL NOT NULL,
+    overrides_digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class NameStore:
+    """Name-to-SMILES store with indexed raw-name and normalized-name lookups.
+
+    Writes are appended inside an open transaction and become visible to other
+    connections on :meth:`commit`. File-backed stores use WAL journaling so
+    concurrent readers never block the writing pipeline.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        key_function: Callable[[str], str] = str.casefold,
+    ) -> None:
+        self.path = str(path)
+        self.key_function = key_function
+        self._connection = sqlite3.connect(self.path, timeout=30)
+        if self.path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(names)")}
+        if "canonical" not in columns:
+            self._connection.execute(
+                "ALTER TABLE names ADD COLUMN canonical INTEGER NOT NULL DEFAULT 0"
+            )
+        self._connection.commit()
+
+    def __enter__(self) -> NameStore:
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+
+    def __contains__(self, name: object) -> bool:
+        return self.get(str(name)) is not None
+
+    def get(self, name: str, default: str | None = None) -> str | None:
+        row = self._connection.execute(
+            "SELECT smiles FROM names WHERE name = ?",
+            (name,),
+        ).fetchone()
+        return row[0] if row else default
+
+    def get_entry(self, name: str) -> tuple[str, bool] | None:
+        """Return ``(smiles, canonical)`` for ``name``, or None when unknown."""
+        row = self._connection.execute(
+            "SELECT smiles, canonical FROM names WHERE name = ?",
+            (name,),
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else None
+
+    def lookup_normalized(self, normalized_name: str) -> list[tuple[str, str]]:
+        """Return every ``(name, smiles)`` pair stored under a normalized key."""
+        return self._connection.execute(
+            "SELECT name, smiles FROM names WHERE normalized_name = ? ORDER BY name",
+            (normalized_name,),
+        ).fetchall()
+
+    def put(
+        self,
+        name: str,
+        smiles: str,
+        source: str | None = None,
+        canonical: bool = False,
+    ) -> None:
+        self.put_many([(name, smiles, source)], canonical=canonical)
+
+    def put_many(
+        self,
+        entries: Iterable[tuple[str, str, str | None]],
+        canonical: bool = False,
+    ) -> None:
+        """Store entries; ``canonical`` marks SMILES that need no reparsing."""
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO names "
+            "(name, normalized_name, smiles, source, updated_at, canonical) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (str(name), self.key_function(str(name)), smiles, source, now, int(canonical))
+                for name, smiles, source in entries
+            ),
+        )
+
+    def mark_canonical(self, name: str, smiles: str) -> None:
+        """Replace a stored structure with its canonical form and flag it."""
+        self._connection.execute(
+            "UPDATE names SET smiles = ?, canonical = 1 WHERE name = ?",
+            (smiles, name),
+        )
+
+    def __setitem__(self, name: str, smiles: str) -> None:
+        self.put(name, smiles)
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        yield from self._connection.execute("SELECT name, smiles FROM names ORDER BY name")
+
+    def entries(self) -> Iterator[tuple[str, str, str | None, bool]]:
+        """Yield ``(name, smiles, source, canonical)`` for every stored name."""
+        for name, smiles, source, canonical in self._connection.execute(
+            "SELECT name, smiles, source, canonical FROM names ORDER BY name"
+        ):
+            yield name, smiles, source, bool(canonical)
+
+    def failures(self) -> Iterator[dict]:
+        for name, sources, outcomes, attempted_at, overrides_digest in self._connection.execute(
+            "SELECT name, sources, outcomes, attempted_at, overrides_digest "
+            "FROM failures ORDER BY normalized_name"
+        ):
+            yield {
+                "name": name,
+                "sources": json.loads(sources),
+                "outcomes": json.loads(outcomes),
+                "attempted_at": attempted_at,
+                "overrides_digest": overrides_digest,
+            }
+
+    def conflicts(self) -> list[tuple[str, str, str, str | None]]:
+        """Return ``(normalized_name, smiles, name, source)`` rows for ambiguous keys."""
+        return self._connection.execute(
+            """
+            SELECT normalized_name, smiles, name, source FROM names
+            WHERE normalized_name IN (
+                SELECT normalized_name FROM names
+                WHERE normalized_name != ''
+                GROUP BY normalized_name
+                HAVING COUNT(DISTINCT smiles) > 1
+            )
+            ORDER BY normalized_name, smiles, name
+            """
+        ).fetchall()
+
+    def record_failure(
+        self,
+        name: str,
+        sources: Iterable[str],
+        outcomes: dict[str, str],
+        overrides_digest: str = "",
+        attempted_at: float | None = None,
+    ) -> None:
+        """Remember that every listed resolver failed for ``name``."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO failures "
+            "(normalized_name, name, sources, outcomes, attempted_at, overrides_digest) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.key_function(str(name)),
+                str(name),
+                json.dumps(list(sources)),
+                json.dumps(outcomes, sort_keys=True),
+                time.time() if attempted_at is None else attempted_at,
+                overrides_digest,
+            ),
+        )
+
+    def get_failure(self, name: str) -> dict | None:
+        row = self._connection.execute(
+            "SELECT name, sources, outcomes, attempted_at, overrides_digest "
+            "FROM failures WHERE normalized_name = ?",
+            (self.key_function(str(name)),),
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "name": row[0],
+            "sources": json.loads(row[1]),
+            "outcomes": json.loads(row[2]),
+            "attempted_at": row[3],
+            "overrides_digest": row[4],
+        }
+
+    def get_metadata(self, key: str) -> str | None:
+        row = self._connection.execute(
+            "SELECT value FROM metadata WHERE key = ?",
+            (key,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_metadata(self, key: str, value: str) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    def commit(self) -> None:
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.commit()
+        self._connection.close()
@@ -10,7 +10,8 @@ from pathlib import Path
 
 import pandas as pd
 
-from uspto_revisit.atom_mapping import add_atom_mapping_columns
+from uspto_revisit.atom_mapping import add_atom_mapping_columns, close_mapper, create_mapper
+from uspto_revisit.file_io import read_table, write_table
 from uspto_revisit.reaction_smiles import _coerce_mapping, replace_with_smiles
 from uspto_revisit.smiles_fetch import canonicalize_smiles, normalize_name_key
 
@@ -37,29 +38,17 @@ class ModelSpec:
     smiles_dict_path: Path
 
 
-def read_table(path: str | Path) -> pd.DataFrame:
-    table_path = Path(path)
-    if table_path.suffix.lower() in {".xlsx", ".xls"}:
-        return pd.read_excel(table_path)
-    return pd.read_csv(table_path)
-
-
-def write_table(frame: pd.DataFrame, path: str | Path) -> None:
-    table_path = Path(path)
-    table_path.parent.mkdir(parents=True, exist_ok=True)
-    if table_path.suffix.lower() in {".xlsx", ".xls"}:
-        frame.to_excel(table_path, index=False)
-    else:
-        frame.to_csv(table_path, index=False, encoding="utf-8-sig")
-
-
 def discover_model_specs(result_dir: str | Path = "result") -> list[ModelSpec]:
     """Discover complete final model outputs and their SMILES dictionaries."""
     result_path = Path(result_dir)
-    suffix = "_reaction_smiles_final.csv"
+    suffix = "_reaction_smiles_final"
     specs = []
-    for csv_path in sorted(result_path.glob(f"*{suffix}")):
-        prefix = csv_path.name[: -len(suffix)]
+    outputs = {}
+    # Parquet outputs take precedence over CSV copies of the same model.
+    for extension in (".csv", ".parquet"):
+        for path in result_path.glob(f"*{suffix}{extension}"):
+            outputs[path.name[: -len(f"{suffix}{extension}")]] = path
+    for prefix, csv_path in sorted(outputs.items()):
         dictionary = (
             result_path
             / "smiles_batches"
@@ -359,17 +348,51 @@ def validate_review_rows(
     return approvals, exclusions, dict(counts)
 
 
+MAPPING_COLUMN_SUFFIXES = (
+    "localmapper_rxn",
+    "mapped_rxn",
+    "mapping_template",
+    "mapping_confident",
+    "mapping_error",
+)
+
+
+def _mapping_columns(prefix: str) -> list[str]:
+    return [f"{prefix}_{suffix}" for suffix in MAPPING_COLUMN_SUFFIXES]
+
+
+def _remap_changed_rows(
+    frame: pd.DataFrame,
+    prefix: str,
+    changed_rows: set[int],
+    **mapping_options,
+) -> pd.DataFrame:
+    """Atom-map only ``changed_rows`` and splice them into the mapping columns.
+
+    A frame without every mapping column has never been mapped, so all of its
+    rows are mapped instead.
+    """
+    reaction_column = f"{prefix}_rxn"
+    if not all(column in frame.columns for column in _mapping_columns(prefix)):
+        return add_atom_mapping_columns(frame, reaction_column, prefix, **mapping_options)
+    rows = sorted(changed_rows)
+    mapped = add_atom_mapping_columns(
+        frame.loc[rows, [reaction_column]],
+        reaction_column,
+        prefix,
+        **mapping_options,
+    )
+    for column in _mapping_columns(prefix):
+        frame[column] = frame[column].astype(object)
+        for row_index in rows:
+            frame.at[row_index, column] = mapped.at[row_index, column]
+    return frame
+
+
 def _clear_stale_mapping(frame: pd.DataFrame, prefix: str, changed_rows: set[int]) -> None:
     if not changed_rows:
         return
-    mapping_columns = [
-        f"{prefix}_localmapper_rxn",
-        f"{prefix}_mapped_rxn",
-        f"{prefix}_mapping_template",
-        f"{prefix}_mapping_confident",
-        f"{prefix}_mapping_error",
-    ]
-    for column in mapping_columns:
+    for column in _mapping_columns(prefix):
         if column not in frame.columns:
             continue
         frame.loc[list(changed_rows), column] = None
@@ -397,6 +420,7 @@ def apply_review(
     mapping_device: str = "cpu",
     mapping_model_version: str = "202403",
     mapping_batch_size: int = 32,
+    mapping_workers: int = 1,
 ) -> dict:
     """Apply row-scoped human approvals and rebuild every model output."""
     review = read_table(review_path)
@@ -404,78 +428,90 @@ def apply_review(
     output_path = Path(output_dir)
     model_summaries = {}
     matched_decisions = set()
-
-    for spec in specs:
-        frame, dictionaries = _load_model(spec)
-        approved_left_codes = approved_left_codes_for_spec(review, spec.prefix)
-        changed_rows = set()
-        replacements = 0
-        excluded_codes_by_row: dict[int, set[str]] = defaultdict(set)
-        for row_index, smiles_dict in enumerate(dictionaries):
-            for code, value in list(smiles_dict.items()):
-                name = extract_no_smi_name(value)
-                if not name:
-                    continue
-                key = (row_index, normalize_name_key(name))
-                if key in approvals:
-                    smiles_dict[code] = approvals[key]
-                    changed_rows.add(row_index)
-                    replacements += 1
-                    matched_decisions.add(key)
-                if key in exclusions:
-                    excluded_codes_by_row[row_index].add(code)
-                    changed_rows.add(row_index)
-                    matched_decisions.add(key)
-
-        result = frame.copy()
-        result[f"{spec.prefix}_smiles"] = dictionaries
-        if changed_rows:
-            for row_index in sorted(changed_rows):
-                row_skeleton = [
-                    restore_left_codes_in_skeleton(
-                        remove_codes_from_skeleton(reaction, excluded_codes_by_row[row_index]),
-                        approved_left_codes.get(row_index, set()),
-                    )
-                    for reaction in parse_reaction_list(
-                        result.at[row_index, f"{spec.prefix}_skeleton"]
+    # One mapper, created on first use, serves every model.
+    mappers = []
+
+    try:
+        for spec in specs:
+            frame, dictionaries = _load_model(spec)
+            approved_left_codes = approved_left_codes_for_spec(review, spec.prefix)
+            changed_rows = set()
+            replacements = 0
+            excluded_codes_by_row: dict[int, set[str]] = defaultdict(set)
+            for row_index, smiles_dict in enumerate(dictionaries):
+                for code, value in list(smiles_dict.items()):
+                    name = extract_no_smi_name(value)
+                    if not name:
+                        continue
+                    key = (row_index, normalize_name_key(name))
+                    if key in approvals:
+                        smiles_dict[code] = approvals[key]
+                        changed_rows.add(row_index)
+                        replacements += 1
+                        matched_decisions.add(key)
+                    if key in exclusions:
+                        excluded_codes_by_row[row_index].add(code)
+                        changed_rows.add(row_index)
+                        matched_decisions.add(key)
+
+            result = frame.copy()
+            result[f"{spec.prefix}_smiles"] = dictionaries
+            if changed_rows:
+                for row_index in sorted(changed_rows):
+                    row_skeleton = [
+                        restore_left_codes_in_skeleton(
+                            remove_codes_from_skeleton(reaction, excluded_codes_by_row[row_index]),
+                            approved_left_codes.get(row_index, set()),
+                        )
+                        for reaction in parse_reaction_list(
+                            result.at[row_index, f"{spec.prefix}_skeleton"]
+                        )
+                    ]
+                    row_reactions = [
+                        replace_with_smiles(reaction, dictionaries[row_index])
+                        for reaction in row_skeleton
+                    ]
+                    result.at[row_index, f"{spec.prefix}_skeleton"] = row_skeleton
+                    result.at[row_index, f"{spec.prefix}_rxn"] = row_reactions
+            if map_atoms and changed_rows:
+                if not mappers:
+                    mappers.append(
+                        create_mapper(mapping_device, mapping_model_version, mapping_workers)
                     )
-                ]
-                row_reactions = [
-                    replace_with_smiles(reaction, dictionaries[row_index])
-                    for reaction in row_skeleton
-                ]
-                result.at[row_index, f"{spec.prefix}_skeleton"] = row_skeleton
-                result.at[row_index, f"{spec.prefix}_rxn"] = row_reactions
-        if map_atoms and changed_rows:
-            result = add_atom_mapping_columns(
-                result,
-                f"{spec.prefix}_rxn",
-                spec.prefix,
-                device=mapping_device,
-                model_version=mapping_model_version,
-                batch_size=mapping_batch_size,
-            )
-        else:
-            _clear_stale_mapping(result, spec.prefix, changed_rows)
+                result = _remap_changed_rows(
+                    result,
+                    spec.prefix,
+                    changed_rows,
+                    mapper=mappers[0],
+                    model_version=mapping_model_version,
+                    batch_size=mapping_batch_size,
+                )
+            else:
+                _clear_stale_mapping(result, spec.prefix, changed_rows)
 
-        csv_output = output_path / f"{spec.prefix}_reaction_smiles_final.csv"
-        dictionary_output = (
-            output_path
-            / "smiles_batches"
-            / spec.prefix
-            / "smiles_dict_final.json"
-        )
-        write_table(result, csv_output)
-        _write_json(dictionaries, dictionary_output)
-        model_summaries[spec.prefix] = {
-            "replacements": replacements,
-            "excluded_components": sum(
-                len(codes) for codes in excluded_codes_by_row.values()
-            ),
-            "changed_rows": len(changed_rows),
-            "csv": str(csv_output),
-            "smiles_dict": str(dictionary_output),
-        }
+            csv_output = (
+                output_path / f"{spec.prefix}_reaction_smiles_final{spec.csv_path.suffix}"
+            )
+            dictionary_output = (
+                output_path
+                / "smiles_batches"
+                / spec.prefix
+                / "smiles_dict_final.json"
+            )
+            write_table(result, csv_output)
+            _write_json(dictionaries, dictionary_output)
+            model_summaries[spec.prefix] = {
+                "replacements": replacements,
+                "excluded_components": sum(
+                    len(codes) for codes in excluded_codes_by_row.values()
+                ),
+                "changed_rows": len(changed_rows),
+                "csv": str(csv_output),
+                "smiles_dict": str(dictionary_output),
+            }
+    finally:
+        for mapper in mappers:
+            close_mapper(mapper)
 
     unmatched = sorted(
         f"row-{row_index}__{normalized}"
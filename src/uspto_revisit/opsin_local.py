@@ -0,0 +1,172 @@
+"""Offline OPSIN name-to-structure parsing through a persistent JVM process.
+
+The OPSIN command-line jar (https://github.com/dan2097/opsin/releases) reads
+one name per line on stdin and, with ``-osmi``, answers each line with a SMILES
+string or an empty line when the name does not parse. One process is started
+per run and kept alive, so the JVM and OPSIN's grammar load once. Concurrent
+lookups queued within a short window are written to the process together.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import subprocess
+import threading
+from collections import Counter
+from pathlib import Path
+
+# Names per write. Requests and answers for one batch must both fit in the
+# pipe buffers, because the answers are only read after the whole batch is
+# written.
+DEFAULT_OPSIN_BATCH_SIZE = 128
+
+opsin_stats = Counter()
+
+
+class LocalOpsin:
+    """Resolve names with a long-lived ``java -jar opsin.jar -osmi`` process.
+
+    A process that cannot start, exits, or takes longer than ``timeout``
+    seconds to answer a batch disables the backend for the rest of the run;
+    lookups then return None and callers fall back to network resolvers.
+    """
+
+    def __init__(
+        self,
+        jar_path: str | Path,
+        java: str = "java",
+        timeout: float = 30.0,
+        window: float = 0.01,
+        batch_size: int = DEFAULT_OPSIN_BATCH_SIZE,
+    ) -> None:
+        self.jar_path = Path(jar_path)
+        if not self.jar_path.is_file():
+            raise FileNotFoundError(f"OPSIN jar not found: {self.jar_path}")
+        self.java = java
+        self.timeout = timeout
+        self.window = window
+        self.batch_size = max(1, int(batch_size))
+        self.disabled = False
+        self._process: subprocess.Popen | None = None
+        # One batch is in flight at a time; the process answers in order.
+        self._lock = threading.Lock()
+        self._lookups: dict[str, asyncio.Future] = {}
+        self._queue: list[str] = []
+        self._flusher: asyncio.Task | None = None
+
+    def command(self) -> list[str]:
+        return [
+            self.java,
+            "-Dfile.encoding=UTF-8",
+            "-Dstdout.encoding=UTF-8",
+            "-jar",
+            str(self.jar_path),
+            "-osmi",
+        ]
+
+    def _start(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                self.command(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                # OPSIN reports every unparseable name on stderr; nothing
+                # reads it, so it must not be a pipe that can fill up.
+                stderr=subprocess.DEVNULL,
+            )
+            logging.info("Started local OPSIN (pid %s): %s", self._process.pid, self.jar_path)
+        return self._process
+
+    def _disable(self, reason: str) -> None:
+        if not self.disabled:
+            logging.error("Local OPSIN disabled for this run: %s", reason)
+        self.disabled = True
+        self.close()
+
+    def resolve_many(self, names: list[str]) -> list[str | None]:
+        """Return OPSIN's SMILES for each name, or None where it failed."""
+        results: list[str | None] = []
+        for start in range(0, len(names), self.batch_size):
+            results.extend(self._resolve_batch(names[start : start + self.batch_size]))
+        return results
+
+    def _resolve_batch(self, names: list[str]) -> list[str | None]:
+        if self.disabled or not names:
+            return [None] * len(names)
+        # A newline inside a name would shift every answer after it.
+        lines = [" ".join(name.split()) for name in names]
+        with self._lock:
+            try:
+                process = self._start()
+            except OSError as exc:
+                self._disable(f"cannot start {self.java}: {exc}")
+                return [None] * len(names)
+            timer = threading.Timer(self.timeout, process.kill)
+            timer.start()
+            try:
+                process.stdin.write("".join(f"{line}\n" for line in lines).encode("utf-8"))
+                process.stdin.flush()
+                answers = [process.stdout.readline() for _ in lines]
+            except OSError as exc:
+                self._disable(f"process I/O failed: {exc}")
+                return [None] * len(names)
+            finally:
+                timer.cancel()
+            if not answers or not answers[-1].endswith(b"\n"):
+                self._disable(
+                    f"no answer within {self.timeout:g} seconds "
+                    f"(exit status {process.poll()})"
+                )
+                return [None] * len(names)
+        opsin_stats["batches"] += 1
+        opsin_stats["names"] += len(names)
+        results = [answer.decode("utf-8", "replace").strip() or None for answer in answers]
+        opsin_stats["parsed"] += sum(result is not None for result in results)
+        return results
+
+    async def lookup(self, compound_name: str) -> str | None:
+        """Queue one name; names queued within ``window`` share a batch."""
+        if self.disabled:
+            return None
+        future = self._lookups.get(compound_name)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._lookups[compound_name] = future
+            self._queue.append(compound_name)
+            if self._flusher is None:
+                self._flusher = asyncio.ensure_future(self._flush())
+        return await asyncio.shield(future)
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.window)
+        batch, self._queue = self._queue, []
+        self._flusher = None
+        try:
+            results = await asyncio.to_thread(self.resolve_many, batch)
+        except Exception as exc:
+            logging.error("Local OPSIN batch failed: %s", exc)
+            results = [None] * len(batch)
+        for name, result in zip(batch, results):
+            future = self._lookups.pop(name)
+            if not future.done():
+                future.set_result(result)
+
+    def close(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+
+def format_opsin_stats() -> str:
+    return (
+        f"{opsin_stats['parsed']}/{opsin_stats['names']} names parsed "
+        f"in {opsin_stats['batches']} batches"
+    )
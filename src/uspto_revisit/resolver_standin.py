@@ -0,0 +1,239 @@
+"""Local stand-in for the PubChem, OPSIN, CIR, and ChEBI lookup services.
+
+The server answers the exact URL shapes used by ``smiles_fetch`` from a fixture
+dictionary, so concurrency, retry, and caching settings can be load-tested
+without calling public APIs. Run it with::
+
+    python -m uspto_revisit.resolver_standin --fixtures names.json --port 8765
+
+and pass the printed ``--resolver-url`` options to the pipeline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from aiohttp import web
+
+STANDIN_PATHS = {
+    "PubChem": "/rest/pug",
+    "OPSIN": "/opsin",
+    "CIR": "/chemical/structure",
+    "ChEBI": "/chebi/backend/api/public",
+}
+STATS_KEY = web.AppKey("stats", Counter)
+
+
+@dataclass
+class StandinConfig:
+    """Fixture names and injected failure behavior for the stand-in server.
+
+    ``fixtures`` maps compound names to SMILES for every source;
+    ``source_fixtures`` replaces them for individual sources, for example to
+    make CIR disagree with PubChem. Name matching is case-insensitive.
+    """
+
+    fixtures: dict[str, str] = field(default_factory=dict)
+    source_fixtures: dict[str, dict[str, str]] = field(default_factory=dict)
+    latency: float = 0.0
+    rate_429: float = 0.0
+    error_rate: float = 0.0
+    seed: int | None = None
+
+    def lookup(self, source: str, name: str) -> str | None:
+        fixtures = self.source_fixtures.get(source, self.fixtures)
+        wanted = name.casefold()
+        for fixture_name, smiles in fixtures.items():
+            if fixture_name.casefold() == wanted:
+                return smiles
+        return None
+
+
+def standin_base_urls(base_url: str) -> dict[str, str]:
+    """Return resolver base URLs for a stand-in server at ``base_url``."""
+    return {source: f"{base_url.rstrip('/')}{path}" for source, path in STANDIN_PATHS.items()}
+
+
+def create_app(config: StandinConfig) -> web.Application:
+    rng = random.Random(config.seed)
+    stats = Counter()
+    chebi_ids = {}
+
+    async def respond(source: str, request: web.Request, answer):
+        stats[f"{source}:requests"] += 1
+        if config.latency:
+            await asyncio.sleep(config.latency)
+        draw = rng.random()
+        if draw < config.rate_429:
+            stats[f"{source}:429"] += 1
+            return web.Response(status=429, text="ServerBusy")
+        if draw < config.rate_429 + config.error_rate:
+            stats[f"{source}:error"] += 1
+            return web.Response(status=503, text="Injected error")
+        response = answer()
+        if response is None:
+            stats[f"{source}:not_found"] += 1
+            return web.Response(status=404, text="Not found")
+        stats[f"{source}:found"] += 1
+        return response
+
+    async def pubchem(request: web.Request) -> web.Response:
+        if request.method == "POST":
+            name = (await request.post()).get("name", "")
+        else:
+            name = request.match_info["name"]
+
+        def answer():
+            smiles = config.lookup("PubChem", name)
+            if not smiles:
+                return None
+            return web.json_response(
+                {"PropertyTable": {"Properties": [{"CID": 0, "SMILES": smiles}]}}
+            )
+
+        return await respond("PubChem", request, answer)
+
+    async def opsin(request: web.Request) -> web.Response:
+        def answer():
+            smiles = config.lookup("OPSIN", request.match_info["name"])
+            return web.Response(text=smiles) if smiles else None
+
+        return await respond("OPSIN", request, answer)
+
+    async def cir(request: web.Request) -> web.Response:
+        def answer():
+            smiles = config.lookup("CIR", request.match_info["name"])
+            return web.Response(text=smiles) if smiles else None
+
+        return await respond("CIR", request, answer)
+
+    async def chebi_search(request: web.Request) -> web.Response:
+        def answer():
+            name = request.query.get("term", "")
+            smiles = config.lookup("ChEBI", name)
+            results = []
+            if smiles:
+                chebi_id = chebi_ids.setdefault(name.casefold(), str(len(chebi_ids) + 1))
+                results.append(
+                    {
+                        "_id": chebi_id,
+                        "_source": {"name": name, "ascii_name": name, "smiles": smiles},
+                    }
+                )
+            return web.json_response({"results": results})
+
+        return await respond("ChEBI", request, answer)
+
+    async def chebi_compound(request: web.Request) -> web.Response:
+        def answer():
+            names = {chebi_id: name for name, chebi_id in chebi_ids.items()}
+            name = names.get(request.match_info["chebi_id"])
+            smiles = config.lookup("ChEBI", name) if name else None
+            if not smiles:
+                return None
+            return web.json_response(
+                {"name": name, "default_structure": {"smiles": smiles}}
+            )
+
+        return await respond("ChEBI", request, answer)
+
+    async def report(_request: web.Request) -> web.Response:
+        return web.json_response(dict(sorted(stats.items())))
+
+    app = web.Application()
+    app[STATS_KEY] = stats
+    app.router.add_get(
+        f"{STANDIN_PATHS['PubChem']}/compound/name/{{name}}/property/SMILES/JSON",
+        pubchem,
+    )
+    app.router.add_post(
+        f"{STANDIN_PATHS['PubChem']}/compound/name/property/SMILES/JSON",
+        pubchem,
+    )
+    app.router.add_get(f"{STANDIN_PATHS['OPSIN']}/{{name}}.smi", opsin)
+    app.router.add_get(f"{STANDIN_PATHS['CIR']}/{{name}}/smiles", cir)
+    app.router.add_get(f"{STANDIN_PATHS['ChEBI']}/es_search", chebi_search)
+    app.router.add_get(f"{STANDIN_PATHS['ChEBI']}/compound/{{chebi_id}}/", chebi_compound)
+    app.router.add_get("/stats", report)
+    return app
+
+
+async def start_standin(
+    config: StandinConfig,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> tuple[web.AppRunner, str]:
+    """Start the stand-in server and return its runner and base URL."""
+    runner = web.AppRunner(create_app(config))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def load_fixtures(path: str | Path) -> tuple[dict[str, str], dict[str, dict[str, str]]]:
+    """Read ``{name: smiles}`` or ``{"fixtures": ..., "sources": {...}}`` JSON."""
+    with Path(path).open("r", encoding="utf-8-sig") as handle:
+        payload = json.load(handle)
+    if "fixtures" in payload or "sources" in payload:
+        return payload.get("fixtures", {}), payload.get("sources", {})
+    return payload, {}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Serve PubChem/OPSIN/CIR/ChEBI lookups from local fixtures.",
+    )
+    parser.add_argument("--fixtures", required=True, help="Fixture JSON path.")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address. Default: 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="Port. Default: 8765")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds added to every response. Default: 0",
+    )
+    parser.add_argument(
+        "--rate-429",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 429 ServerBusy. Default: 0",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 503. Default: 0",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    fixtures, source_fixtures = load_fixtures(args.fixtures)
+    config = StandinConfig(
+        fixtures=fixtures,
+        source_fixtures=source_fixtures,
+        latency=args.latency,
+        rate_429=args.rate_429,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    base_url = f"http://{args.host}:{args.port}"
+    print("Resolver stand-in options:")
+    for source, url in standin_base_urls(base_url).items():
+        print(f"  --resolver-url {source}={url}")
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+"""Deterministic input sharding and shard merging for multi-host runs.
+
+Every shard streams the same input CSV in chunks and keeps only its own rows,
+so shards can run as separate processes or hosts against one shared filesystem
+without coordination or holding the whole input in memory. ``range`` shards are
+contiguous row blocks; ``hash`` shards group rows by a hash of the model
+response, so identical responses (and most repeated names) are resolved by one
+shard.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from uspto_revisit.file_io import read_table, write_table
+from uspto_revisit.name_store import NameStore
+from uspto_revisit.smiles_fetch import audit_name_smiles_consistency, open_name_store
+
+SHARD_STRATEGIES = ("range", "hash")
+SOURCE_ROW_COLUMN = "source_row"
+DEFAULT_SHARD_CHUNK_ROWS = 50_000
+
+
+def shard_name(index: int, count: int) -> str:
+    return f"shard-{index:04d}-of-{count:04d}"
+
+
+def shard_output_path(output_path: str | Path, index: int, count: int) -> Path:
+    path = Path(output_path)
+    return path.with_name(f"{path.stem}.{shard_name(index, count)}{path.suffix}")
+
+
+def shard_batch_dir(batch_dir: str | Path, index: int, count: int) -> Path:
+    return Path(batch_dir) / shard_name(index, count)
+
+
+def _hash_shard(value: str, count: int) -> int:
+    digest = hashlib.sha256(value.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def _check_shard(index: int, count: int, strategy: str) -> None:
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index {index} is outside 0..{count - 1}.")
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Unknown shard strategy {strategy!r}.")
+
+
+def _range_bounds(rows: int, index: int, count: int) -> tuple[int, int]:
+    rows_per_shard, remainder = divmod(rows, count)
+    start = index * rows_per_shard + min(index, remainder)
+    return start, start + rows_per_shard + (index < remainder)
+
+
+def _hash_rows(frame: pd.DataFrame, index: int, count: int, key_column: str) -> pd.DataFrame:
+    keys = frame[key_column].fillna("").astype(str)
+    return frame[[_hash_shard(key, count) == index for key in keys]]
+
+
+def select_shard(
+    frame: pd.DataFrame,
+    index: int,
+    count: int,
+    strategy: str = "range",
+    key_column: str | None = None,
+) -> pd.DataFrame:
+    """Return this shard's rows with their input position in ``source_row``."""
+    _check_shard(index, count, strategy)
+    frame = frame.assign(**{SOURCE_ROW_COLUMN: range(len(frame))})
+    if strategy == "range":
+        start, stop = _range_bounds(len(frame), index, count)
+        return frame.iloc[start:stop]
+    return _hash_rows(frame, index, count, key_column)
+
+
+def write_shard_input(
+    input_path: str | Path,
+    output_path: str | Path,
+    index: int,
+    count: int,
+    strategy: str = "range",
+    key_column: str | None = None,
+    chunk_rows: int = DEFAULT_SHARD_CHUNK_ROWS,
+) -> int:
+    """Stream this shard's rows of ``input_path`` to ``output_path``; return how many.
+
+    Cells are copied as text, so values are written back exactly as read.
+    ``range`` shards count the input rows in a first pass.
+    """
+    _check_shard(index, count, strategy)
+
+    def chunks():
+        return pd.read_csv(input_path, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+    if strategy == "range":
+        start, stop = _range_bounds(sum(len(chunk) for chunk in chunks()), index, count)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with Path(output_path).open("w", newline="", encoding="utf-8-sig") as handle:
+        # The header row comes from the input even when this shard gets no rows.
+        pd.read_csv(input_path, dtype=str, nrows=0).assign(
+            **{SOURCE_ROW_COLUMN: []}
+        ).to_csv(handle, index=False)
+        offset = 0
+        for chunk in chunks():
+            first, offset = offset, offset + len(chunk)
+            chunk = chunk.assign(**{SOURCE_ROW_COLUMN: range(first, offset)})
+            if strategy == "range":
+                rows = chunk.iloc[max(start - first, 0) : max(stop - first, 0)]
+            else:
+                rows = _hash_rows(chunk, index, count, key_column)
+            rows.to_csv(handle, index=False, header=False)
+            written += len(rows)
+            if strategy == "range" and offset >= stop:
+                break
+    return written
+
+
+def merge_name_stores(store: NameStore, shard_store_paths) -> list[tuple[str, str, str, str]]:
+    """Copy shard name stores into ``store``; return raw-name disagreements.
+
+    The first shard to resolve a name wins. Each disagreement is returned as
+    ``(name, kept_smiles, other_smiles, shard_store)``.
+    """
+    disagreements = []
+    for path in shard_store_paths:
+        new_entries = {True: [], False: []}
+        with NameStore(path, key_function=store.key_function) as shard:
+            for name, smiles, source, canonical in shard.entries():
+                entry = store.get_entry(name)
+                if entry is None:
+                    new_entries[canonical].append((name, smiles, source))
+                elif entry[0] != smiles:
+                    disagreements.append((name, entry[0], smiles, str(path)))
+            for canonical, entries in new_entries.items():
+                store.put_many(entries, canonical=canonical)
+            for failure in shard.failures():
+                name = failure["name"]
+                if store.get(name) is None and store.get_failure(name) is None:
+                    store.record_failure(
+                        name,
+                        failure["sources"],
+                        failure["outcomes"],
+                        overrides_digest=failure["overrides_digest"],
+                        attempted_at=failure["attempted_at"],
+                    )
+        store.commit()
+    return disagreements
+
+
+def merge_shards(
+    output_path: str | Path,
+    batch_dir: str | Path,
+    count: int,
+) -> dict:
+    """Rebuild one output and one name store from ``count`` finished shards."""
+    output_path = Path(output_path)
+    batch_dir = Path(batch_dir)
+    shard_outputs = [shard_output_path(output_path, index, count) for index in range(count)]
+    missing = [str(path) for path in shard_outputs if not path.is_file()]
+    if missing:
+        raise FileNotFoundError(f"Missing shard outputs: {', '.join(missing)}")
+
+    merged = pd.concat(
+        [read_table(path, keep_default_na=False) for path in shard_outputs],
+        ignore_index=True,
+    )
+    if SOURCE_ROW_COLUMN in merged.columns:
+        merged = merged.sort_values(SOURCE_ROW_COLUMN, kind="stable").drop(
+            columns=[SOURCE_ROW_COLUMN]
+        )
+    write_table(merged, output_path)
+
+    cache_path = batch_dir / "smiles_cache.sqlite"
+    shard_stores = [
+        shard_batch_dir(batch_dir, index, count) / "smiles_cache.sqlite"
+        for index in range(count)
+    ]
+    with open_name_store(cache_path) as store:
+        disagreements = merge_name_stores(
+            store,
+            [path for path in shard_stores if path.is_file()],
+        )
+    disagreement_path = batch_dir / "shard_merge_disagreements.csv"
+    with disagreement_path.open("w", newline="", encoding="utf-8-sig") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(("name", "kept_smiles", "other_smiles", "shard_store"))
+        writer.writerows(disagreements)
+    if disagreements:
+        logging.warning(
+            "%s names resolved differently across shards; see %s",
+            len(disagreements),
+            disagreement_path,
+        )
+    conflict_count = audit_name_smiles_consistency(
+        cache_path,
+        batch_dir / "smiles_consistency_audit.csv",
+    )
+    return {
+        "rows": len(merged),
+        "shards": count,
+        "output": str(output_path),
+        "name_store": str(cache_path),
+        "shard_disagreements": len(disagreements),
+        "normalized_name_conflicts": conflict_count,
+    }
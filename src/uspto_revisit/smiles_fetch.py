@@ -3,23 +3,42 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
 import csv
+import hashlib
 import html
 import json
 import logging
+import os
 import pickle
 import random
 import re
+import time
 import unicodedata
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
 
 import nest_asyncio
 from rdkit import Chem
 from tqdm import tqdm
 
 from uspto_revisit.chemspider import get_smiles_from_chemspider_async
+from uspto_revisit.host_limits import (
+    CircuitOpenError,
+    format_host_stats,
+    host_limiter,
+    register_source_urls,
+)
 from uspto_revisit.json_utils import fix_json_string, fix_name, parse_json_object
+from uspto_revisit.known_aliases import KnownAliasRegistry
+from uspto_revisit.name_store import NameStore
+from uspto_revisit.opsin_local import LocalOpsin
+from uspto_revisit.synonym_index import SynonymIndex
+from uspto_revisit.stage_manifest import file_digest
 
 nest_asyncio.apply()
 
@@ -40,7 +59,7 @@ DEFAULT_KNOWN_SMILES = {
     "lithiumaluminium hydride": "[Li+].[AlH4-]",
     "racemic phenylalanine": "NC(Cc1ccccc1)C(=O)O",
     "brine": "O.[Na+].[Cl-]",
-    "Pd/C": "Pd",
+    "Pd/C": "[Pd]",
     "DMSO": "CS(=O)C",
     "LiAlH4": "[Li+].[AlH4-]",
 }
@@ -134,8 +153,35 @@ AMBIGUOUS_NAME_PATTERNS = (
     ),
 )
 
-smiles_cache = {}
+RESOLVER_BASE_URLS = {
+    "PubChem": "https://pubchem.ncbi.nlm.nih.gov/rest/pug",
+    "OPSIN": "https://opsin.ch.cam.ac.uk/opsin",
+    "CIR": "http://cactus.nci.nih.gov/chemical/structure",
+    "ChEBI": "https://www.ebi.ac.uk/chebi/backend/api/public",
+}
+resolver_base_urls = dict(RESOLVER_BASE_URLS)
+register_source_urls(resolver_base_urls)
+
 resolution_overrides = {}
+resolution_overrides_digest = ""
+negative_cache_ttl_seconds = 7 * 24 * 3600.0
+resolution_stats = Counter()
+DEFAULT_CANONICAL_CACHE_SIZE = 65536
+
+NO_SMI_SOURCES = ("PubChem", "OPSIN", "CIR", "ChEBI", "ChemSpider")
+resolution_mode = "priority"
+resolution_priority = NO_SMI_SOURCES
+resolution_quorum = 0
+pubchem_batch_window = 0.0
+local_opsin: LocalOpsin | None = None
+synonym_index: SynonymIndex | None = None
+
+# HTTP outcomes of the resolver requests made for the name being resolved.
+_lookup_outcomes: ContextVar[dict | None] = ContextVar("lookup_outcomes", default=None)
+_pubchem_batcher: ContextVar[PubChemBatcher | None] = ContextVar(
+    "pubchem_batcher",
+    default=None,
+)
 
 
 def _clean_compound_name(compound_name: str) -> str:
@@ -156,16 +202,50 @@ def normalize_name_key(compound_name: str) -> str:
     return re.sub(r"[^a-z0-9]+", "", cleaned)
 
 
+# Parenthesized stereo descriptors such as (+), (-), (±), (R), (2R,3S), (E).
+# normalize_name_key drops the punctuation-only ones, so "(+)-X" and "(-)-X"
+# share a key even though they name different structures.
+_STEREO_DESCRIPTOR_PATTERN = re.compile(
+    r"\(\s*((?:[+\-\u2212±]|\d*[RSEZrs]\*?)(?:\s*[,/]\s*(?:[+\-\u2212±]|\d*[RSEZrs]\*?))*)\s*\)"
+)
+
+
+def stereo_descriptors(compound_name: str) -> tuple[str, ...]:
+    """Return the stereo descriptors written in a name, in order."""
+    return tuple(
+        re.sub(r"\s+", "", match.group(1)).replace("\u2212", "-")
+        for match in _STEREO_DESCRIPTOR_PATTERN.finditer(str(compound_name))
+    )
+
+
+_NAME_SEPARATORS = re.compile(r"[\s_\-\u2010-\u2015\u2212]+")
+
+
+def alias_name_key(compound_name: str) -> str:
+    """Return a case-folded key in which space, hyphen, and dash runs match.
+
+    Every other character still counts, so "PDC" never matches "Pd/C", "Ice-"
+    never matches "ice", and "(-)-X" never matches "(+)-X" or "X".
+    """
+    cleaned = unicodedata.normalize("NFKC", _clean_compound_name(compound_name)).casefold()
+    return _NAME_SEPARATORS.sub("-", cleaned)
+
+
+smiles_cache = NameStore(key_function=normalize_name_key)
+
+
 def load_resolution_overrides(path: str | Path | None) -> dict:
     """Load auditable, dataset-specific aliases or active-component choices."""
-    global resolution_overrides
+    global resolution_overrides, resolution_overrides_digest
     resolution_overrides = {}
+    resolution_overrides_digest = ""
     if not path:
         return resolution_overrides
 
     override_path = Path(path)
-    with override_path.open("r", encoding="utf-8-sig") as handle:
-        payload = json.load(handle)
+    raw = override_path.read_bytes()
+    resolution_overrides_digest = hashlib.sha256(raw).hexdigest()
+    payload = json.loads(raw.decode("utf-8-sig"))
     entries = payload.get("overrides", payload) if isinstance(payload, dict) else payload
     if not isinstance(entries, list):
         raise ValueError("NoSmi overrides must be a list or an object with 'overrides'.")
@@ -191,26 +271,182 @@ def load_resolution_overrides(path: str | Path | None) -> dict:
     return resolution_overrides
 
 
+def configure_negative_cache(ttl_seconds: float) -> None:
+    """Set how long names that every resolver failed on are skipped; 0 disables."""
+    global negative_cache_ttl_seconds
+    negative_cache_ttl_seconds = float(ttl_seconds)
+
+
+def configure_resolver_urls(base_urls: dict[str, str] | None = None) -> dict[str, str]:
+    """Point resolvers at other base URLs, such as the local stand-in server."""
+    unknown = set(base_urls or {}) - set(RESOLVER_BASE_URLS)
+    if unknown:
+        raise ValueError(f"Unknown resolver sources: {', '.join(sorted(unknown))}")
+    resolver_base_urls.clear()
+    resolver_base_urls.update(RESOLVER_BASE_URLS)
+    resolver_base_urls.update(
+        {source: url.rstrip("/") for source, url in (base_urls or {}).items()}
+    )
+    register_source_urls(resolver_base_urls)
+    return dict(resolver_base_urls)
+
+
+def configure_resolution_policy(
+    mode: str = "priority",
+    priority=NO_SMI_SOURCES,
+    quorum: int = 0,
+) -> None:
+    """Choose how NoSmi resolver answers are combined.
+
+    ``priority`` returns the highest-ranked successful source without waiting
+    for slower, lower-ranked ones; ``all`` waits for every source. A quorum of
+    two or more also accepts a structure as soon as that many sources agree.
+    """
+    global resolution_mode, resolution_priority, resolution_quorum
+    if mode not in {"priority", "all"}:
+        raise ValueError("Resolution mode must be 'priority' or 'all'.")
+    unknown = set(priority) - set(NO_SMI_SOURCES)
+    if unknown:
+        raise ValueError(f"Unknown resolver sources: {', '.join(sorted(unknown))}")
+    resolution_mode = mode
+    resolution_priority = tuple(priority)
+    resolution_quorum = int(quorum)
+
+
+def configure_pubchem_batching(window_seconds: float) -> None:
+    """Set the PubChem coalescing window used by NoSmi reprocessing; 0 disables."""
+    global pubchem_batch_window
+    pubchem_batch_window = float(window_seconds)
+
+
+def configure_local_opsin(jar_path: str | Path | None, java: str = "java") -> None:
+    """Parse names with a local OPSIN jar before any network resolver; None disables."""
+    global local_opsin
+    if local_opsin is not None:
+        local_opsin.close()
+    local_opsin = LocalOpsin(jar_path, java=java) if jar_path else None
+    if local_opsin is not None:
+        atexit.register(local_opsin.close)
+
+
+def configure_synonym_index(path: str | Path | None) -> None:
+    """Resolve NoSmi names from a built PubChem synonym index first; None disables."""
+    global synonym_index
+    if synonym_index is not None:
+        synonym_index.close()
+    synonym_index = SynonymIndex(path, key_function=normalize_name_key) if path else None
+
+
+def _indexed_smiles(compound_name: str) -> str | None:
+    if synonym_index is None:
+        return None
+    match = synonym_index.lookup(compound_name)
+    if match is None:
+        return None
+    if match["structures"] > 1:
+        resolution_stats["synonym_index_ambiguous"] += 1
+        logging.info(
+            "Synonym index lists %s structures for %s; resolving online.",
+            match["structures"],
+            compound_name,
+        )
+        return None
+    smiles = canonicalize_smiles(match["smiles"])
+    if smiles:
+        resolution_stats["synonym_index_hits"] += 1
+    return smiles
+
+
+def _negative_cache_hit(compound_name: str) -> dict | None:
+    if negative_cache_ttl_seconds <= 0:
+        return None
+    failure = smiles_cache.get_failure(compound_name)
+    if not failure:
+        return None
+    if failure["overrides_digest"] != resolution_overrides_digest:
+        return None
+    if time.time() - failure["attempted_at"] >= negative_cache_ttl_seconds:
+        return None
+    return failure
+
+
+def _record_outcome(url: str, outcome: str) -> None:
+    outcomes = _lookup_outcomes.get()
+    if outcomes is not None:
+        outcomes[urlsplit(url).hostname or url] = outcome
+
+
+def _is_definitive_outcome(outcome: str) -> bool:
+    """Whether a source's last answer means the name really did not resolve.
+
+    A 200 whose body held no usable SMILES, a not-found, or any other 4xx
+    except 429 will not change on retry; timeouts, open circuits, busy hosts,
+    5xx responses, and client errors may.
+    """
+    if outcome == "not_found":
+        return True
+    if not outcome.isdigit():
+        return False
+    status = int(outcome)
+    return status == 200 or (400 <= status < 500 and status != 429)
+
+
 def resolve_name_alias(compound_name: str) -> str:
     """Return a conservative, identity-preserving lookup alias."""
     cleaned = _clean_compound_name(compound_name)
     return SAFE_NAME_ALIASES.get(cleaned.casefold(), cleaned)
 
 
+# Every ambiguous-name pattern in one alternation, each keeping its own flags;
+# the group that matched names the pattern.
+_AMBIGUOUS_NAME_SCAN = re.compile(
+    "|".join(
+        f"(?P<p{index}>(?{'i' if pattern.flags & re.I else ''}:{pattern.pattern}))"
+        for index, pattern in enumerate(AMBIGUOUS_NAME_PATTERNS)
+    )
+)
+
+
+@dataclass(frozen=True)
+class NameClassification:
+    """How one raw name is cleaned, aliased, and screened before lookup.
+
+    ``fixed`` is ``alias`` after :func:`fix_name` and a second alias pass.
+    ``skip_reason`` is None for names worth resolving, ``"ambiguous name"``
+    for listed exact names, or the ``AMBIGUOUS_NAME_PATTERNS`` regex that
+    matched.
+    """
+
+    cleaned: str
+    alias: str
+    fixed: str
+    skip_reason: str | None
+
+
+@lru_cache(maxsize=65536)
+def classify_name(compound_name: str) -> NameClassification:
+    """Clean, alias, fix, and screen a name in one memoized pass."""
+    cleaned = _clean_compound_name(compound_name)
+    folded = cleaned.casefold()
+    alias = SAFE_NAME_ALIASES.get(folded, cleaned)
+    if folded in AMBIGUOUS_EXACT_NAMES:
+        skip_reason = "ambiguous name"
+    else:
+        match = _AMBIGUOUS_NAME_SCAN.search(cleaned)
+        skip_reason = (
+            AMBIGUOUS_NAME_PATTERNS[int(match.lastgroup[1:])].pattern if match else None
+        )
+    return NameClassification(cleaned, alias, resolve_name_alias(fix_name(alias)), skip_reason)
+
+
 def should_skip_automatic_resolution(compound_name: str) -> bool:
     """Reject mixtures, materials, and underspecified patent-local labels."""
-    cleaned = _clean_compound_name(compound_name)
-    if cleaned.casefold() in AMBIGUOUS_EXACT_NAMES:
-        return True
-    return any(pattern.search(cleaned) for pattern in AMBIGUOUS_NAME_PATTERNS)
+    return classify_name(compound_name).skip_reason is not None
 
 
-def canonicalize_smiles(smiles: str | None) -> str | None:
-    """Validate and canonicalize one SMILES value with RDKit."""
-    if not isinstance(smiles, str) or not smiles.strip():
-        return None
+def _canonicalize_with_rdkit(smiles: str) -> str | None:
     try:
-        molecule = Chem.MolFromSmiles(smiles.strip())
+        molecule = Chem.MolFromSmiles(smiles)
         if molecule is None:
             return None
         return Chem.MolToSmiles(molecule, canonical=True, isomericSmiles=True)
@@ -219,12 +455,95 @@ def canonicalize_smiles(smiles: str | None) -> str | None:
         return None
 
 
+_canonicalize_memo = lru_cache(maxsize=DEFAULT_CANONICAL_CACHE_SIZE)(_canonicalize_with_rdkit)
+
+
+def configure_canonical_cache(max_size: int = DEFAULT_CANONICAL_CACHE_SIZE) -> None:
+    """Resize the canonicalization memo and reset its statistics; 0 disables it."""
+    global _canonicalize_memo
+    _canonicalize_memo = lru_cache(maxsize=max(0, int(max_size)))(_canonicalize_with_rdkit)
+
+
+def canonical_cache_stats() -> dict:
+    info = _canonicalize_memo.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "store_skips": resolution_stats["canonical_store_skips"],
+    }
+
+
+def format_canonical_cache_stats() -> str:
+    stats = canonical_cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = 100 * stats["hits"] / lookups if lookups else 0.0
+    return (
+        f"{stats['hits']} hits, {stats['misses']} misses ({hit_rate:.1f}% hit rate), "
+        f"{stats['size']}/{stats['max_size']} entries, "
+        f"{stats['store_skips']} stored canonical SMILES not reparsed"
+    )
+
+
+def canonicalize_smiles(smiles: str | None) -> str | None:
+    """Validate and canonicalize one SMILES value with RDKit, memoized."""
+    if not isinstance(smiles, str) or not smiles.strip():
+        return None
+    return _canonicalize_memo(smiles.strip())
+
+
+def _stored_smiles(name: str) -> str | None:
+    """Return a cached structure, reparsing only rows not flagged canonical."""
+    entry = smiles_cache.get_entry(name)
+    if entry is None:
+        return None
+    smiles, canonical = entry
+    if canonical:
+        resolution_stats["canonical_store_skips"] += 1
+        return smiles
+    smiles = canonicalize_smiles(smiles)
+    if smiles:
+        smiles_cache.mark_canonical(name, smiles)
+    return smiles
+
+
+# Tables are parsed on the first lookup, not at import.
+known_aliases = KnownAliasRegistry(
+    DEFAULT_KNOWN_SMILES,
+    canonicalize_smiles,
+    key_function=alias_name_key,
+)
+
+
+def load_known_aliases(path: str | Path | None) -> KnownAliasRegistry:
+    """Serve KnownAlias answers from the built-in table plus an alias file."""
+    global known_aliases
+    known_aliases = KnownAliasRegistry(
+        DEFAULT_KNOWN_SMILES,
+        canonicalize_smiles,
+        key_function=alias_name_key,
+        path=path,
+    )
+    if path:
+        # Report a broken alias file when it is configured, not mid-run.
+        known_aliases.load()
+    return known_aliases
+
+
+def format_known_alias_stats() -> str:
+    summary = known_aliases.summary()
+    top = ", ".join(f"{name} ({count})" for name, count in summary["top_aliases"].items())
+    return (
+        f"{summary['exact_hits']} exact and {summary['normalized_hits']} normalized-name hits "
+        f"in {summary['lookups']} lookups over {summary['aliases']} aliases "
+        f"(version {summary['version']}, {summary['reloads']} reloads)"
+        + (f"; most used: {top}" if top else "")
+    )
+
+
 def _known_smiles(compound_name: str) -> str | None:
-    cleaned = _clean_compound_name(compound_name).casefold()
-    for name, smiles in DEFAULT_KNOWN_SMILES.items():
-        if name.casefold() == cleaned:
-            return canonicalize_smiles(smiles)
-    return None
+    return known_aliases.lookup(_clean_compound_name(compound_name))
 
 
 def extract_pubchem_smiles(response_text: str) -> str | None:
@@ -241,17 +560,52 @@ def extract_pubchem_smiles(response_text: str) -> str | None:
     return None
 
 
-def load_cache(cache_path: str | Path = "smiles_cache.pkl") -> None:
-    global smiles_cache
+def _store_paths(cache_path: str | Path) -> tuple[Path, Path]:
     path = Path(cache_path)
-    if path.exists():
-        with path.open("rb") as handle:
-            smiles_cache = pickle.load(handle)
+    if path.suffix.lower() == ".pkl":
+        return path.with_suffix(".sqlite"), path
+    return path, path.with_suffix(".pkl")
+
+
+def migrate_pickle_cache(store: NameStore, pickle_path: str | Path) -> int:
+    """Import a legacy ``smiles_cache.pkl`` into a store once."""
+    path = Path(pickle_path)
+    marker = f"migrated:{path.resolve()}"
+    if not path.is_file() or store.get_metadata(marker):
+        return 0
+    with path.open("rb") as handle:
+        legacy = pickle.load(handle)
+    entries = []
+    for name, smiles in legacy.items():
+        canonical = canonicalize_smiles(smiles)
+        if canonical:
+            entries.append((str(name), canonical, "PickleCache"))
+    store.put_many(entries, canonical=True)
+    store.set_metadata(marker, str(len(entries)))
+    store.commit()
+    logging.info("Migrated %s cache entries from %s", len(entries), path)
+    return len(entries)
+
+
+def open_name_store(cache_path: str | Path) -> NameStore:
+    """Open a SQLite name store, migrating a sibling pickle cache if present."""
+    store_path, pickle_path = _store_paths(cache_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    store = NameStore(store_path, key_function=normalize_name_key)
+    migrate_pickle_cache(store, pickle_path)
+    return store
+
+
+def load_cache(cache_path: str | Path = "smiles_cache.sqlite") -> None:
+    """Read and write name resolutions through the store at ``cache_path``."""
+    global smiles_cache
+    smiles_cache.close()
+    smiles_cache = open_name_store(cache_path)
 
 
-def save_cache(cache_path: str | Path = "smiles_cache.pkl") -> None:
-    with Path(cache_path).open("wb") as handle:
-        pickle.dump(smiles_cache, handle)
+def save_cache(cache_path: str | Path | None = None) -> None:
+    """Commit pending resolutions; appended rows are never rewritten."""
+    smiles_cache.commit()
 
 
 def audit_name_smiles_consistency(
@@ -259,25 +613,30 @@ def audit_name_smiles_consistency(
     output_path: str | Path,
 ) -> int:
     """Write same-normalized-name cache entries that resolve to different structures."""
-    path = Path(cache_path)
+    store_path, pickle_path = _store_paths(cache_path)
     rows = []
-    if path.is_file():
-        with path.open("rb") as handle:
-            cache = pickle.load(handle)
-        grouped = {}
-        for name, smiles in cache.items():
-            canonical = canonicalize_smiles(smiles)
-            normalized = normalize_name_key(str(name))
-            if canonical and normalized:
-                grouped.setdefault(normalized, {}).setdefault(canonical, []).append(str(name))
+    if store_path.is_file() or pickle_path.is_file():
+        with open_name_store(cache_path) as store:
+            grouped = {}
+            for normalized, smiles, name, source in store.conflicts():
+                grouped.setdefault(normalized, {}).setdefault(smiles, []).append((name, source))
         for normalized, structures in grouped.items():
-            if len(structures) > 1:
-                for smiles, names in structures.items():
-                    rows.append({"normalized_name": normalized, "smiles": smiles, "cache_names": " | ".join(sorted(names))})
+            for smiles, entries in structures.items():
+                rows.append(
+                    {
+                        "normalized_name": normalized,
+                        "smiles": smiles,
+                        "cache_names": " | ".join(sorted(name for name, _source in entries)),
+                        "sources": " | ".join(sorted({source or "" for _name, source in entries})),
+                    }
+                )
     destination = Path(output_path)
     destination.parent.mkdir(parents=True, exist_ok=True)
     with destination.open("w", newline="", encoding="utf-8-sig") as handle:
-        writer = csv.DictWriter(handle, fieldnames=("normalized_name", "smiles", "cache_names"))
+        writer = csv.DictWriter(
+            handle,
+            fieldnames=("normalized_name", "smiles", "cache_names", "sources"),
+        )
         writer.writeheader()
         writer.writerows(rows)
     return len({row["normalized_name"] for row in rows})
@@ -288,25 +647,44 @@ async def exponential_backoff(attempt: int, max_delay: int = 60) -> None:
     await asyncio.sleep(delay)
 
 
-async def fetch_smiles(session, url: str, semaphore, max_retries: int) -> str | None:
+async def fetch_smiles(
+    session,
+    url: str,
+    semaphore,
+    max_retries: int,
+    data: dict | None = None,
+) -> str | None:
+    """GET ``url``, or POST ``data`` as a form body when it is given."""
     import aiohttp
 
-    async with semaphore:
-        for attempt in range(max_retries):
-            try:
-                async with session.get(url) as response:
+    limiter = host_limiter(url)
+    for attempt in range(max_retries):
+        busy = False
+        try:
+            # Backoff happens outside the host and global slots so a busy host
+            # does not hold capacity that other resolvers could use.
+            async with limiter, semaphore:
+                request = (
+                    session.get(url) if data is None else session.post(url, data=data)
+                )
+                async with request as response:
                     response_text = await response.text()
+                    _record_outcome(url, str(response.status))
                     if response.status == 200:
+                        limiter.record_success()
                         return response_text
                     if response.status == 429 or "ServerBusy" in response_text:
+                        limiter.record_failure()
+                        _record_outcome(url, "busy")
                         logging.warning(
                             "[Busy] Server busy, retrying... (Attempt %s/%s) for URL: %s",
                             attempt + 1,
                             max_retries,
                             url,
                         )
-                        await exponential_backoff(attempt)
+                        busy = True
                     elif 400 <= response.status < 500:
+                        limiter.record_success()
                         logging.info(
                             "[NotFound] Lookup returned status %s for URL: %s",
                             response.status,
@@ -320,22 +698,36 @@ async def fetch_smiles(session, url: str, semaphore, max_retries: int) -> str |
                             url,
                         )
                         response.raise_for_status()
-            except asyncio.TimeoutError:
-                logging.error("[Timeout] Failed to fetch SMILES from %s", url)
-            except aiohttp.ClientError as exc:
-                logging.error("[ClientError] Failed to fetch SMILES from %s [Error] %s", url, exc)
-                if attempt < max_retries - 1:
-                    await exponential_backoff(attempt)
-            except Exception as exc:
-                logging.error("[Error] Failed to fetch SMILES from %s [Error] %s", url, exc)
-                if attempt < max_retries - 1:
-                    await exponential_backoff(attempt)
+        except CircuitOpenError:
+            _record_outcome(url, "circuit_open")
+            logging.info("[CircuitOpen] Skipping URL while its host recovers: %s", url)
+            return None
+        except asyncio.TimeoutError:
+            limiter.record_failure()
+            _record_outcome(url, "timeout")
+            logging.error("[Timeout] Failed to fetch SMILES from %s", url)
+        except aiohttp.ClientError as exc:
+            limiter.record_failure()
+            # A 5xx already recorded its status before raise_for_status.
+            if not isinstance(exc, aiohttp.ClientResponseError):
+                _record_outcome(url, type(exc).__name__)
+            logging.error("[ClientError] Failed to fetch SMILES from %s [Error] %s", url, exc)
+            if attempt < max_retries - 1:
+                await exponential_backoff(attempt)
+        except Exception as exc:
+            limiter.record_failure()
+            _record_outcome(url, type(exc).__name__)
+            logging.error("[Error] Failed to fetch SMILES from %s [Error] %s", url, exc)
+            if attempt < max_retries - 1:
+                await exponential_backoff(attempt)
+        if busy:
+            await exponential_backoff(attempt)
     return None
 
 
 async def get_smiles_from_pubchem(session, compound_name, semaphore, max_retries):
     url = (
-        "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/"
+        f"{resolver_base_urls['PubChem']}/compound/name/"
         f"{quote(compound_name)}/property/SMILES/JSON"
     )
     try:
@@ -349,8 +741,84 @@ async def get_smiles_from_pubchem(session, compound_name, semaphore, max_retries
     return None, None
 
 
+class PubChemBatcher:
+    """Coalesce PubChem name lookups queued within a short window.
+
+    PUG REST accepts one name per name-namespace request, so a flush sends each
+    distinct name once, as a POST form body that also carries names with
+    characters that break URL paths. Callers asking for the same normalized
+    name share that request and its answer. ``fetch_smiles`` already retries
+    the POST, so a failed request is not repeated through the GET endpoint.
+
+    ``process_batch_final`` already resolves each normalized name once, so the
+    window only pays off when several reprocessing batches run concurrently;
+    it is off by default.
+    """
+
+    def __init__(self, session, semaphore, window: float = 0.05, max_retries: int = 3):
+        self.session = session
+        self.semaphore = semaphore
+        self.window = window
+        self.max_retries = max_retries
+        self._lookups: dict[str, asyncio.Future] = {}
+        self._queue: list[tuple[str, str]] = []
+        self._flusher: asyncio.Task | None = None
+
+    async def lookup(self, compound_name: str) -> tuple[str | None, str | None]:
+        key = normalize_name_key(compound_name)
+        future = self._lookups.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._lookups[key] = future
+            self._queue.append((key, compound_name))
+            if self._flusher is None:
+                self._flusher = asyncio.ensure_future(self._flush())
+        else:
+            resolution_stats["pubchem_coalesced"] += 1
+        # Shielded so a caller cancelled by the priority race does not cancel
+        # the shared lookup for everyone else waiting on it.
+        smiles, outcome = await asyncio.shield(future)
+        _record_outcome(f"{resolver_base_urls['PubChem']}/", outcome)
+        return (smiles, "PubChem") if smiles else (None, None)
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.window)
+        batch, self._queue = self._queue, []
+        self._flusher = None
+        resolution_stats["pubchem_batches"] += 1
+        resolution_stats["pubchem_batched_names"] += len(batch)
+        await asyncio.gather(*(self._resolve(key, name) for key, name in batch))
+
+    async def _resolve(self, key: str, compound_name: str) -> None:
+        future = self._lookups[key]
+        outcomes = {}
+        _lookup_outcomes.set(outcomes)
+        try:
+            response_text = await fetch_smiles(
+                self.session,
+                f"{resolver_base_urls['PubChem']}/compound/name/property/SMILES/JSON",
+                self.semaphore,
+                self.max_retries,
+                data={"name": compound_name},
+            )
+            smiles = extract_pubchem_smiles(response_text) if response_text else None
+            outcome = next(reversed(outcomes.values()), "no_response")
+        except Exception as exc:
+            logging.error("[PubChem] Batched lookup failed for %s [Error] %s", compound_name, exc)
+            smiles, outcome = None, type(exc).__name__
+        if not future.done():
+            future.set_result((smiles, outcome))
+
+
+async def _pubchem_lookup(session, compound_name, semaphore, max_retries):
+    batcher = _pubchem_batcher.get()
+    if batcher is None:
+        return await get_smiles_from_pubchem(session, compound_name, semaphore, max_retries)
+    return await batcher.lookup(compound_name)
+
+
 async def get_smiles_from_cir(session, compound_name, semaphore, max_retries):
-    url = f"http://cactus.nci.nih.gov/chemical/structure/{quote(compound_name)}/smiles"
+    url = f"{resolver_base_urls['CIR']}/{quote(compound_name)}/smiles"
     try:
         smiles = canonicalize_smiles(
             await fetch_smiles(session, url, semaphore, max_retries)
@@ -361,8 +829,14 @@ async def get_smiles_from_cir(session, compound_name, semaphore, max_retries):
     return None, None
 
 
+async def _local_opsin_smiles(compound_name: str) -> str | None:
+    if local_opsin is None:
+        return None
+    return canonicalize_smiles(await local_opsin.lookup(compound_name))
+
+
 async def get_smiles_from_opsin(session, compound_name, semaphore, max_retries):
-    url = f"https://opsin.ch.cam.ac.uk/opsin/{quote(compound_name)}.smi"
+    url = f"{resolver_base_urls['OPSIN']}/{quote(compound_name)}.smi"
     try:
         smiles = canonicalize_smiles(
             await fetch_smiles(session, url, semaphore, max_retries)
@@ -387,7 +861,7 @@ def _chebi_detail_names(detail: dict) -> list[str]:
 async def get_smiles_from_chebi(session, compound_name, semaphore, max_retries):
     """Resolve an exact ChEBI primary name or curated synonym to SMILES."""
     search_url = (
-        "https://www.ebi.ac.uk/chebi/backend/api/public/es_search"
+        f"{resolver_base_urls['ChEBI']}/es_search"
         f"?term={quote(compound_name)}&page=1&size=3"
     )
     try:
@@ -422,7 +896,7 @@ async def get_smiles_from_chebi(session, compound_name, semaphore, max_retries):
             if not chebi_id:
                 continue
             detail_url = (
-                "https://www.ebi.ac.uk/chebi/backend/api/public/compound/"
+                f"{resolver_base_urls['ChEBI']}/compound/"
                 f"{quote(chebi_id)}/"
             )
             detail_text = await fetch_smiles(
@@ -463,33 +937,38 @@ async def get_smiles(session, compound_name, fix_name_bool, semaphore):
         )
         compound_name = str(compound_name)
 
-    original_name = _clean_compound_name(compound_name)
+    classified = classify_name(compound_name)
+    original_name = classified.cleaned
     known_smiles = _known_smiles(original_name)
     if known_smiles:
         return known_smiles, "KnownAlias"
 
-    compound_name = resolve_name_alias(original_name)
+    compound_name = classified.alias
     if fix_name_bool:
-        compound_name = fix_name(compound_name)
-        compound_name = resolve_name_alias(compound_name)
+        compound_name = classified.fixed
         known_smiles = _known_smiles(compound_name)
         if known_smiles:
             return known_smiles, "KnownAlias"
 
     for cache_key in (original_name, compound_name):
-        cached_smiles = canonicalize_smiles(smiles_cache.get(cache_key))
+        cached_smiles = _stored_smiles(cache_key)
         if cached_smiles:
             return cached_smiles, "Cache"
 
-    result, source = await get_smiles_from_opsin(
-        session,
-        compound_name,
-        semaphore,
-        max_retries=2,
-    )
+    result = await _local_opsin_smiles(compound_name)
+    source = "OPSIN-local" if result else None
+    if not result:
+        result, source = await get_smiles_from_opsin(
+            session,
+            compound_name,
+            semaphore,
+            max_retries=2,
+        )
     if result:
-        smiles_cache[original_name] = result
-        smiles_cache[compound_name] = result
+        smiles_cache.put_many(
+            [(original_name, result, source), (compound_name, result, source)],
+            canonical=True,
+        )
         logging.info("Found SMILES for %s from %s: %s", compound_name, source, result)
         return result, source
 
@@ -497,84 +976,229 @@ async def get_smiles(session, compound_name, fix_name_bool, semaphore):
     return None, None
 
 
-async def get_smiles_dict(response, session, fix_name_bool, semaphore):
+def _chemical_sections(response: dict) -> list[tuple[dict, str]]:
+    sections = []
+    if "Reactants, Solvents, Catalysts" in response:
+        sections.append(
+            (response["Reactants, Solvents, Catalysts"], "Reactant/Solvent/Catalyst")
+        )
+    product_key = "Product" if "Product" in response else "Products" if "Products" in response else None
+    if product_key:
+        sections.append((response[product_key], "Product"))
+    valid_sections = []
+    for chemicals_dict, category in sections:
+        if isinstance(chemicals_dict, dict):
+            valid_sections.append((chemicals_dict, category))
+        else:
+            logging.error("Skipping non-object %s section: %s", category, chemicals_dict)
+    return valid_sections
+
+
+def plan_name_lookups(responses) -> list[str]:
+    """Return every distinct cleaned compound name referenced by the responses."""
+    names = {}
+    for response in responses:
+        for chemicals_dict, _category in _chemical_sections(response):
+            for compound_name in chemicals_dict.values():
+                names.setdefault(_clean_compound_name(compound_name), None)
+    return list(names)
+
+
+async def resolve_compound_name(session, compound_name, fix_name_bool, semaphore):
+    """Look up one name, retrying with a fixed name; return (smiles, source, fixed)."""
+    try:
+        smiles, source = await get_smiles(session, compound_name, fix_name_bool, semaphore)
+    except Exception as exc:
+        logging.error("SMILES lookup failed for %s: %s", compound_name, exc)
+        smiles, source = None, None
+    if smiles:
+        return smiles, source, False
+
+    fixed_smiles, fixed_source = await get_smiles(
+        session,
+        fix_name(compound_name),
+        True,
+        semaphore,
+    )
+    return fixed_smiles, fixed_source, True
+
+
+async def resolve_planned_names(
+    names,
+    session,
+    fix_name_bool,
+    semaphore,
+    resolution_cache,
+) -> None:
+    """Resolve each planned name exactly once, skipping names already decided."""
+    pending = [name for name in dict.fromkeys(names) if name not in resolution_cache]
+    results = await asyncio.gather(
+        *[
+            resolve_compound_name(session, name, fix_name_bool, semaphore)
+            for name in pending
+        ],
+        return_exceptions=True,
+    )
+    for name, result in zip(pending, results):
+        if isinstance(result, Exception):
+            logging.error("SMILES lookup failed for %s: %s", name, result)
+            result = (None, None, False)
+        resolution_cache[name] = result
+
+
+def build_smiles_dict(response: dict, resolution_cache: dict) -> dict:
+    """Fan planned name resolutions back to the codes of one response."""
     smiles_dict = {}
     problem_chemicals = []
-
-    async def process_chemicals(chemicals_dict, category):
-        tasks = {
-            code: get_smiles(session, compound_name, fix_name_bool, semaphore)
-            for code, compound_name in chemicals_dict.items()
-        }
-        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
-        for code, result in zip(tasks.keys(), results):
-            if isinstance(result, Exception):
-                logging.error("SMILES lookup failed for %s: %s", code, result)
-                result = (None, None)
-            smiles, source = result
+    for chemicals_dict, category in _chemical_sections(response):
+        for code, compound_name in chemicals_dict.items():
+            smiles, source, fixed = resolution_cache[_clean_compound_name(compound_name)]
             if smiles:
                 smiles_dict[code] = smiles
-                logging.info("Found SMILES for %s from %s: %s", chemicals_dict[code], source, smiles)
-                continue
-
-            fixed_name = fix_name(chemicals_dict[code])
-            fixed_smiles, fixed_source = await get_smiles(session, fixed_name, True, semaphore)
-            if fixed_smiles:
-                smiles_dict[code] = fixed_smiles
                 logging.info(
-                    "Found SMILES for %s (Fixed Name) from %s: %s",
-                    chemicals_dict[code],
-                    fixed_source,
-                    fixed_smiles,
+                    "Found SMILES for %s%s from %s: %s",
+                    compound_name,
+                    " (Fixed Name)" if fixed else "",
+                    source,
+                    smiles,
                 )
             else:
-                problem_chemicals.append(f"{chemicals_dict[code]} ({category})")
-                smiles_dict[code] = f"[{chemicals_dict[code]} (NoSmi)]"
-
-    if "Reactants, Solvents, Catalysts" in response:
-        await process_chemicals(response["Reactants, Solvents, Catalysts"], "Reactant/Solvent/Catalyst")
-    product_key = "Product" if "Product" in response else "Products" if "Products" in response else None
-    if product_key:
-        await process_chemicals(response[product_key], "Product")
+                problem_chemicals.append(f"{compound_name} ({category})")
+                smiles_dict[code] = f"[{compound_name} (NoSmi)]"
     if problem_chemicals:
         logging.info("Problem chemicals: %s", problem_chemicals)
-
     return smiles_dict
 
 
-async def process_batch(json_responses, fix_name_bool, semaphore):
-    import aiohttp
-    import certifi
-    import ssl
-
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
-    async with aiohttp.ClientSession(
-        connector=aiohttp.TCPConnector(ssl=ssl_context)
-    ) as session:
-        tasks = []
-        task_positions = []
-        results = [{} for _ in json_responses]
-        for idx, json_response in enumerate(json_responses):
-            parsed_response = parse_json_object(json_response)
+async def get_smiles_dict(
+    response,
+    session,
+    fix_name_bool,
+    semaphore,
+    resolution_cache=None,
+):
+    if resolution_cache is None:
+        resolution_cache = {}
+    await resolve_planned_names(
+        plan_name_lookups([response]),
+        session,
+        fix_name_bool,
+        semaphore,
+        resolution_cache,
+    )
+    return build_smiles_dict(response, resolution_cache)
+
+
+async def process_batch(
+    json_responses,
+    session,
+    fix_name_bool,
+    semaphore,
+    resolution_cache=None,
+):
+    """Resolve the distinct names of a batch once and fan them back to rows.
+
+    Passing the same ``resolution_cache`` to every batch of a run extends the
+    deduplication across the whole input, including names that failed.
+    """
+    if resolution_cache is None:
+        resolution_cache = {}
+    known_aliases.reload_if_changed()
+
+    parsed_responses = {}
+    for idx, json_response in enumerate(json_responses):
+        parsed_response = parse_json_object(json_response)
+        if parsed_response is None:
+            fixed_json = fix_json_string(json_response)
+            parsed_response = parse_json_object(fixed_json) if fixed_json else None
             if parsed_response is None:
-                fixed_json = fix_json_string(json_response)
-                parsed_response = parse_json_object(fixed_json) if fixed_json else None
-                if parsed_response is None:
-                    logging.error("Skipping invalid JSON response: %s", json_response)
-                    continue
+                logging.error("Skipping invalid JSON response: %s", json_response)
+                continue
+        parsed_responses[idx] = parsed_response
+
+    names = plan_name_lookups(parsed_responses.values())
+    pending_count = sum(name not in resolution_cache for name in names)
+    logging.info(
+        "Resolving %s new distinct names (%s distinct in batch)",
+        pending_count,
+        len(names),
+    )
+    await resolve_planned_names(
+        names,
+        session,
+        fix_name_bool,
+        semaphore,
+        resolution_cache,
+    )
+
+    results = [{} for _ in json_responses]
+    for idx, parsed_response in parsed_responses.items():
+        results[idx] = build_smiles_dict(parsed_response, resolution_cache)
+    return results
+
+
+def _decide_resolution(order, answers) -> tuple[str, str] | None:
+    """Return the policy's answer once it can no longer change, else None."""
+    if resolution_quorum > 1:
+        votes = Counter(smiles for smiles, _source in answers.values() if smiles)
+        for name in order:
+            smiles, source = answers.get(name, (None, None))
+            if smiles and votes[smiles] >= resolution_quorum:
+                return smiles, source
+    for name in order:
+        if name not in answers:
+            return None
+        smiles, source = answers[name]
+        if smiles:
+            return smiles, source
+    return None
 
-            task_positions.append(idx)
-            tasks.append(get_smiles_dict(parsed_response, session, fix_name_bool, semaphore))
 
-        task_results = await asyncio.gather(*tasks)
-        for idx, result in zip(task_positions, task_results):
-            results[idx] = result
-        return results
+async def _race_resolvers(lookups: dict) -> tuple[str | None, str | None, dict]:
+    """Run resolver coroutines under the configured priority policy.
+
+    In ``priority`` mode the answer is returned as soon as every higher-ranked
+    source has failed, and the remaining lookups are cancelled; their ``async
+    with`` blocks release semaphore and host slots on cancellation. ``all``
+    waits for every source, which gives the same answer more slowly.
+    """
+    tasks = {name: asyncio.ensure_future(lookup) for name, lookup in lookups.items()}
+    order = [name for name in resolution_priority if name in tasks]
+    order.extend(name for name in tasks if name not in order)
+    answers = {}
+    errors = {}
+    try:
+        pending = set(tasks.values())
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for name, task in tasks.items():
+                if task not in done or name in answers:
+                    continue
+                if task.exception() is not None:
+                    errors[name] = task.exception()
+                    answers[name] = (None, None)
+                    continue
+                smiles, source = task.result()
+                smiles = canonicalize_smiles(smiles)
+                answers[name] = (smiles, source) if smiles else (None, None)
+            if resolution_mode != "all" or not pending:
+                decision = _decide_resolution(order, answers)
+                if decision:
+                    return decision[0], decision[1], errors
+        return None, None, errors
+    finally:
+        unfinished = [task for task in tasks.values() if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            resolution_stats["cancelled_lookups"] += len(unfinished)
+            await asyncio.gather(*unfinished, return_exceptions=True)
 
 
 async def resolve_no_smi_name(compound_name, session, semaphore):
     """Resolve one previously missing name with aliases and source validation."""
-    original_name = _clean_compound_name(compound_name)
+    classified = classify_name(compound_name)
+    original_name = classified.cleaned
     override = resolution_overrides.get(normalize_name_key(original_name))
     if override and override.get("smiles"):
         return override["smiles"], f"Curated:{override.get('kind', 'override')}"
@@ -582,44 +1206,111 @@ async def resolve_no_smi_name(compound_name, session, semaphore):
     known_smiles = _known_smiles(original_name)
     if known_smiles:
         return known_smiles, "KnownAlias"
-    if not override and should_skip_automatic_resolution(original_name):
+    if not override and classified.skip_reason:
         logging.info(
-            "Skipping ambiguous or non-molecular name during automatic resolution: %s",
+            "Skipping ambiguous or non-molecular name during automatic resolution: %s (%s)",
             original_name,
+            classified.skip_reason,
         )
         return None, None
 
     lookup_name = (
         _clean_compound_name(override["lookup_name"])
         if override and override.get("lookup_name")
-        else resolve_name_alias(original_name)
+        else classified.alias
     )
+    cached_smiles = None
     for cache_key in (original_name, lookup_name):
-        cached_smiles = canonicalize_smiles(smiles_cache.get(cache_key))
+        cached_smiles = _stored_smiles(cache_key)
         if cached_smiles:
-            source = f"Curated:{override.get('kind', 'alias')}+Cache" if override else "Cache"
-            return cached_smiles, source
+            break
+    if not cached_smiles and not override:
+        # Other spellings of the same normalized name are reused only when
+        # every stored spelling agrees on one structure and none of them
+        # differs in stereo descriptors, which the normalized key drops.
+        spellings = smiles_cache.lookup_normalized(normalize_name_key(original_name))
+        descriptors = stereo_descriptors(original_name)
+        structures = {canonicalize_smiles(smiles) for _name, smiles in spellings}
+        if len(structures) == 1 and all(
+            stereo_descriptors(name) == descriptors for name, _smiles in spellings
+        ):
+            cached_smiles = structures.pop()
+    if cached_smiles:
+        source = f"Curated:{override.get('kind', 'alias')}+Cache" if override else "Cache"
+        return cached_smiles, source
+
+    # Offline sources are consulted before the negative cache, so names that
+    # failed online before the index or OPSIN jar was configured still
+    # resolve from them.
+    smiles, source = _indexed_smiles(lookup_name), "PubChem-index"
+    if not smiles:
+        smiles, source = await _local_opsin_smiles(lookup_name), "OPSIN-local"
+    if smiles:
+        smiles_cache.put_many(
+            [(original_name, smiles, source), (lookup_name, smiles, source)],
+            canonical=True,
+        )
+        if override:
+            return smiles, f"Curated:{override.get('kind', 'alias')}+{source}"
+        return smiles, source
 
-    results = await asyncio.gather(
-        get_smiles_from_pubchem(session, lookup_name, semaphore, max_retries=3),
-        get_smiles_from_opsin(session, lookup_name, semaphore, max_retries=2),
-        get_smiles_from_cir(session, lookup_name, semaphore, max_retries=2),
-        get_smiles_from_chebi(session, lookup_name, semaphore, max_retries=2),
-        get_smiles_from_chemspider_async(lookup_name),
-        return_exceptions=True,
+    failure = _negative_cache_hit(original_name)
+    if failure:
+        resolution_stats["negative_cache_hits"] += 1
+        logging.info(
+            "Skipping %s; every resolver failed at %s (%s)",
+            original_name,
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(failure["attempted_at"])),
+            failure["outcomes"],
+        )
+        return None, "NegativeCache"
+
+    outcomes = {}
+    token = _lookup_outcomes.set(outcomes)
+    try:
+        smiles, source, errors = await _race_resolvers(
+            {
+                "PubChem": _pubchem_lookup(
+                    session, lookup_name, semaphore, max_retries=3
+                ),
+                "OPSIN": get_smiles_from_opsin(
+                    session, lookup_name, semaphore, max_retries=2
+                ),
+                "CIR": get_smiles_from_cir(session, lookup_name, semaphore, max_retries=2),
+                "ChEBI": get_smiles_from_chebi(
+                    session, lookup_name, semaphore, max_retries=2
+                ),
+                "ChemSpider": get_smiles_from_chemspider_async(lookup_name),
+            }
+        )
+    finally:
+        _lookup_outcomes.reset(token)
+    resolution_stats["resolver_lookups"] += 1
+    for error in errors.values():
+        logging.error("Error processing %s: %s", original_name, error)
+    if smiles:
+        smiles_cache.put_many(
+            [(original_name, smiles, source), (lookup_name, smiles, source)],
+            canonical=True,
+        )
+        if override:
+            source = f"Curated:{override.get('kind', 'alias')}+{source}"
+        return smiles, source
+    outcomes["ChemSpider"] = (
+        type(errors["ChemSpider"]).__name__ if "ChemSpider" in errors else "not_found"
+    )
+    # Only a name every source definitively failed on is remembered; one that
+    # hit a timeout, open circuit, or server error is retried next time.
+    if errors or not all(_is_definitive_outcome(outcome) for outcome in outcomes.values()):
+        resolution_stats["transient_failures"] += 1
+        logging.info("Not caching failure for %s; outcomes: %s", original_name, outcomes)
+        return None, None
+    smiles_cache.record_failure(
+        original_name,
+        NO_SMI_SOURCES,
+        outcomes,
+        overrides_digest=resolution_overrides_digest,
     )
-    for result in results:
-        if isinstance(result, Exception):
-            logging.error("Error processing %s: %s", original_name, result)
-            continue
-        smiles, source = result
-        smiles = canonicalize_smiles(smiles)
-        if smiles:
-            smiles_cache[original_name] = smiles
-            smiles_cache[lookup_name] = smiles
-            if override:
-                source = f"Curated:{override.get('kind', 'alias')}+{source}"
-            return smiles, source
     return None, None
 
 
@@ -640,8 +1331,10 @@ async def process_batch_final(
     semaphore,
     resolution_cache=None,
 ):
+    """Resolve NoSmi entries in place and return ``(idx, code, value, source)`` changes."""
     if resolution_cache is None:
         resolution_cache = {}
+    known_aliases.reload_if_changed()
 
     targets = {}
     for idx, smiles_dict_item in enumerate(smiles_dict_list):
@@ -656,14 +1349,23 @@ async def process_batch_final(
             ].append((smiles_dict_item, code, idx, compound_name))
 
     pending_keys = [key for key in targets if key not in resolution_cache]
-    pending_results = await asyncio.gather(
-        *[
-            resolve_no_smi_name(targets[key]["name"], session, semaphore)
-            for key in pending_keys
-        ]
+    token = _pubchem_batcher.set(
+        PubChemBatcher(session, semaphore, window=pubchem_batch_window)
+        if pubchem_batch_window > 0
+        else None
     )
+    try:
+        pending_results = await asyncio.gather(
+            *[
+                resolve_no_smi_name(targets[key]["name"], session, semaphore)
+                for key in pending_keys
+            ]
+        )
+    finally:
+        _pubchem_batcher.reset(token)
     resolution_cache.update(zip(pending_keys, pending_results))
 
+    changes = []
     for cache_key, target in targets.items():
         smiles, source = resolution_cache[cache_key]
         for smiles_dict_item, code, idx, compound_name in target["entries"]:
@@ -675,10 +1377,82 @@ async def process_batch_final(
                     source,
                     smiles,
                 )
-                smiles_dict_item[code] = smiles
+                value = smiles
             else:
                 logging.info("[%s] No SMILES found for %s", idx, compound_name)
-                smiles_dict_item[code] = f"[{compound_name} (NoSmi)]"
+                value = f"[{compound_name} (NoSmi)]"
+            if smiles_dict_item[code] != value:
+                changes.append((idx, code, value, source if smiles else None))
+            smiles_dict_item[code] = value
+    return changes
+
+
+def _count_no_smi(smiles_dict_list) -> tuple[int, int]:
+    total = no_smi = 0
+    for smiles_dict_item in smiles_dict_list:
+        if isinstance(smiles_dict_item, dict):
+            total += len(smiles_dict_item)
+            no_smi += sum("(NoSmi)" in value for value in smiles_dict_item.values())
+    return no_smi, total
+
+
+def no_smi_delta_path(output_file: str | Path) -> Path:
+    path = Path(output_file)
+    return path.with_name(f"{path.stem}.delta.jsonl")
+
+
+def replay_no_smi_deltas(smiles_dict_list, delta_path: str | Path, input_digest: str) -> int:
+    """Apply committed deltas to ``smiles_dict_list``; return the next row to process.
+
+    Deltas after the last commit marker, a torn final line, or a log written
+    for a different input are ignored. Whatever follows the last commit
+    marker is truncated away, so a resumed run appends directly after it.
+    """
+    path = Path(delta_path)
+    if not path.is_file():
+        return 0
+    committed_rows = 0
+    committed_offset = 0
+    offset = 0
+    pending = []
+    with path.open("rb") as handle:
+        for line_number, line in enumerate(handle):
+            # A line without its newline was cut short, even if it parses.
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            offset += len(line)
+            if line_number == 0:
+                if record.get("input_digest") != input_digest:
+                    logging.info("Ignoring %s; it was written for another input.", path)
+                    return 0
+                committed_offset = offset
+                continue
+            if "committed_rows" in record:
+                for row, code, value in pending:
+                    smiles_dict_list[row][code] = value
+                pending = []
+                committed_rows = record["committed_rows"]
+                committed_offset = offset
+            else:
+                pending.append((record["row"], record["code"], record["smiles"]))
+    if committed_rows and committed_offset < path.stat().st_size:
+        with path.open("r+b") as handle:
+            handle.truncate(committed_offset)
+    return committed_rows
+
+
+def compact_no_smi_checkpoint(smiles_dict_list, output_file: str | Path) -> None:
+    """Write the full result once and drop the delta log it supersedes."""
+    output_path = Path(output_file)
+    temporary_path = output_path.with_name(f"{output_path.name}.tmp")
+    with temporary_path.open("w", encoding="utf-8-sig") as handle:
+        json.dump(smiles_dict_list, handle, ensure_ascii=False, indent=2)
+    os.replace(temporary_path, output_path)
+    no_smi_delta_path(output_path).unlink(missing_ok=True)
 
 
 def calculate_no_smi_percentage(smiles_dict_list):
@@ -695,29 +1469,74 @@ def calculate_no_smi_percentage(smiles_dict_list):
 
 
 async def reprocess_no_smi(smiles_dict_file, output_file, session, semaphore, batch_size):
+    """Resolve NoSmi entries batch by batch with an append-only checkpoint.
+
+    Each batch appends its changed entries and a commit marker to
+    ``<output stem>.delta.jsonl``. A rerun over the same input replays the
+    committed deltas and continues after the last committed batch; the full
+    JSON output is written once at the end.
+    """
     with Path(smiles_dict_file).open("r", encoding="utf-8-sig") as handle:
         smiles_dict_list = json.load(handle)
 
+    input_digest = file_digest(smiles_dict_file)
+    delta_path = no_smi_delta_path(output_file)
+    start_row = replay_no_smi_deltas(smiles_dict_list, delta_path, input_digest)
+    if start_row:
+        logging.info("Resuming NoSmi reprocessing at row %s from %s", start_row, delta_path)
+    no_smi_entries, total_entries = _count_no_smi(smiles_dict_list)
+
     total_batches = (len(smiles_dict_list) + batch_size - 1) // batch_size
     resolution_cache = {}
-    with tqdm(total=total_batches, desc="Processing Batches", unit="batch") as pbar:
-        for idx in range(0, len(smiles_dict_list), batch_size):
+    delta_log = delta_path.open("a" if start_row else "w", encoding="utf-8")
+    with delta_log, tqdm(
+        total=total_batches,
+        initial=start_row // batch_size,
+        desc="Processing Batches",
+        unit="batch",
+    ) as pbar:
+        if not start_row:
+            delta_log.write(json.dumps({"input_digest": input_digest}) + "\n")
+        for idx in range(start_row, len(smiles_dict_list), batch_size):
             batch = smiles_dict_list[idx : idx + batch_size]
-            await process_batch_final(
+            before, _batch_entries = _count_no_smi(batch)
+            changes = await process_batch_final(
                 batch,
                 session,
                 semaphore,
                 resolution_cache=resolution_cache,
             )
-            no_smi_percentage = calculate_no_smi_percentage(smiles_dict_list)
+            after, _batch_entries = _count_no_smi(batch)
+            no_smi_entries += after - before
+            for row, code, value, source in changes:
+                delta_log.write(
+                    json.dumps(
+                        {"row": idx + row, "code": code, "smiles": value, "source": source},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+            delta_log.write(json.dumps({"committed_rows": idx + len(batch)}) + "\n")
+            delta_log.flush()
+            os.fsync(delta_log.fileno())
+
+            no_smi_percentage = (
+                (no_smi_entries / total_entries) * 100 if total_entries > 0 else 0
+            )
+            logging.info(
+                "Found %s entries with NoSmi [%.2f%%].",
+                no_smi_entries,
+                no_smi_percentage,
+            )
             batch_number = idx // batch_size + 1
             print(
                 f"[BATCH {batch_number}] {round(no_smi_percentage, 2)}% of entries "
                 "do not have a corresponding SMILES representation"
             )
-            with Path(output_file).open("w", encoding="utf-8-sig") as handle:
-                json.dump(smiles_dict_list, handle, ensure_ascii=False, indent=2)
             logging.info("Batch %s/%s processed.", batch_number, total_batches)
+            logging.info("Resolver hosts: %s", format_host_stats())
             pbar.update(1)
 
-        logging.info("Processing completed")
+    compact_no_smi_checkpoint(smiles_dict_list, output_file)
+    logging.info("Processing completed")
+    logging.info("Canonical SMILES memo: %s", format_canonical_cache_stats())
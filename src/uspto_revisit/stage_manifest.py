@@ -0,0 +1,88 @@
+"""Content-addressed manifests for resumable pipeline stages."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+PIPELINE_STAGES = ("resolve", "reprocess", "audit", "reactions", "mapping")
+
+
+def file_digest(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path: str | Path | None) -> tuple[str, int, int] | None:
+    """Identify a large file by path, size, and mtime without reading it."""
+    if not path:
+        return None
+    stat = Path(path).stat()
+    return str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns
+
+
+def content_digest(*parts) -> str:
+    """Hash configuration values together with the contents of any ``Path`` parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, Path):
+            digest.update(file_digest(part).encode() if part.is_file() else b"missing")
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def select_stages(from_stage: str | None = None, to_stage: str | None = None) -> tuple[str, ...]:
+    start = PIPELINE_STAGES.index(from_stage) if from_stage else 0
+    stop = PIPELINE_STAGES.index(to_stage) + 1 if to_stage else len(PIPELINE_STAGES)
+    if start >= stop:
+        raise ValueError(f"--from-stage {from_stage} comes after --to-stage {to_stage}.")
+    return PIPELINE_STAGES[start:stop]
+
+
+class StageManifest:
+    """Record which input key each stage or batch output was built from.
+
+    An entry is current only while its key matches and every recorded output
+    still exists with the same content, so edited or deleted outputs are
+    rebuilt on the next run.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.is_file():
+            with self.path.open("r", encoding="utf-8") as handle:
+                self.entries = json.load(handle)
+
+    def is_current(self, name: str, key: str) -> bool:
+        entry = self.entries.get(name)
+        if not entry or entry["key"] != key:
+            return False
+        return all(
+            Path(output).is_file() and file_digest(output) == digest
+            for output, digest in entry["outputs"].items()
+        )
+
+    def record(self, name: str, key: str, outputs: Iterable[str | Path]) -> None:
+        self.entries[name] = {
+            "key": key,
+            "outputs": {str(output): file_digest(output) for output in outputs},
+            "completed_at": time.time(),
+        }
+        self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(f"{self.path.name}.tmp")
+        with temporary_path.open("w", encoding="utf-8") as handle:
+            json.dump(self.entries, handle, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,181 @@
+"""Stream rows through resolution, skeleton building, and atom mapping.
+
+Rows are read in chunks and passed between stages through bounded queues, so
+network-bound name resolution, CPU-bound skeleton building and LocalMapper
+inference overlap. A full queue blocks the stage that feeds it; at most
+``queue_size`` chunks wait between any two stages, whatever the input size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+
+from uspto_revisit.atom_mapping import add_atom_mapping_columns, close_mapper, create_mapper
+from uspto_revisit.reaction_smiles import process_smiles_data
+from uspto_revisit.smiles_fetch import process_batch, process_batch_final, save_cache
+
+_DONE = None
+
+
+async def _run_stage(transform, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+    while True:
+        item = await inbox.get()
+        if item is _DONE:
+            await outbox.put(_DONE)
+            return
+        await outbox.put(await transform(item))
+
+
+async def _gather_or_cancel(*coroutines) -> None:
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed stage would otherwise leave its neighbours blocked on a
+        # full or empty queue forever.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def stream_reaction_smiles(
+    chunks: Iterator[pd.DataFrame],
+    output_path: str | Path,
+    *,
+    model_column: str,
+    output_prefix: str,
+    session,
+    fix_names: bool = False,
+    lookup_concurrency: int = 20,
+    reprocess_concurrency: int = 10,
+    skip_reprocess: bool = False,
+    map_atoms: bool = False,
+    mapper=None,
+    mapping_device: str = "cpu",
+    mapping_model_version: str = "202403",
+    mapping_batch_size: int = 32,
+    mapping_workers: int = 1,
+    with_smiles_output_path: str | Path | None = None,
+    queue_size: int = 4,
+) -> int:
+    """Write reaction SMILES for every chunk of ``chunks``; return the row count."""
+    lookup_semaphore = asyncio.Semaphore(lookup_concurrency)
+    reprocess_semaphore = asyncio.Semaphore(reprocess_concurrency)
+    resolved = asyncio.Queue(maxsize=queue_size)
+    built = asyncio.Queue(maxsize=queue_size)
+    mapped = asyncio.Queue(maxsize=queue_size) if map_atoms else built
+    smiles_column = f"{output_prefix}_smiles"
+    mappers = [mapper]
+
+    async def resolve() -> None:
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                await resolved.put(_DONE)
+                return
+            if model_column not in chunk.columns:
+                available = ", ".join(chunk.columns)
+                raise ValueError(
+                    f"Column '{model_column}' was not found. Available columns: {available}"
+                )
+            responses = chunk[model_column].fillna("").astype(str).tolist()
+            # Per-chunk resolution caches keep memory bounded; the name store
+            # still deduplicates across chunks.
+            smiles_dicts = await process_batch(
+                responses,
+                session,
+                fix_name_bool=fix_names,
+                semaphore=lookup_semaphore,
+                resolution_cache={},
+            )
+            if not skip_reprocess:
+                await process_batch_final(
+                    [item for item in smiles_dicts if isinstance(item, dict)],
+                    session,
+                    reprocess_semaphore,
+                )
+            save_cache()
+            chunk = chunk.copy()
+            chunk[smiles_column] = smiles_dicts
+            await resolved.put(chunk)
+
+    def build_reactions(chunk: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        skeleton_smiles, final_smiles, _errors = process_smiles_data(
+            chunk[model_column].tolist(),
+            chunk[smiles_column].tolist(),
+        )
+        output_chunk = chunk.assign(
+            **{
+                f"{output_prefix}_skeleton": skeleton_smiles,
+                f"{output_prefix}_rxn": final_smiles,
+            }
+        )
+        output_chunk = output_chunk.drop(
+            columns=[column for column in ("idx", "model") if column in output_chunk.columns]
+        )
+        return chunk, output_chunk
+
+    def map_reactions(item: tuple[pd.DataFrame, pd.DataFrame]):
+        chunk, output_chunk = item
+        if mappers[0] is None:
+            mappers[0] = create_mapper(mapping_device, mapping_model_version, mapping_workers)
+        output_chunk = add_atom_mapping_columns(
+            output_chunk,
+            f"{output_prefix}_rxn",
+            output_prefix,
+            mapper=mappers[0],
+            model_version=mapping_model_version,
+            batch_size=mapping_batch_size,
+        )
+        return chunk, output_chunk
+
+    async def write() -> int:
+        rows = 0
+        with_smiles_handle = (
+            Path(with_smiles_output_path).open("w", newline="", encoding="utf-8-sig")
+            if with_smiles_output_path
+            else None
+        )
+        try:
+            with Path(output_path).open("w", newline="", encoding="utf-8-sig") as handle:
+                while True:
+                    item = await mapped.get()
+                    if item is _DONE:
+                        return rows
+                    chunk, output_chunk = item
+                    output_chunk.to_csv(handle, header=rows == 0, index=False)
+                    if with_smiles_handle:
+                        chunk.to_csv(with_smiles_handle, header=rows == 0, index=False)
+                    rows += len(output_chunk)
+                    logging.info("Streamed %s rows to %s", rows, output_path)
+        finally:
+            if with_smiles_handle:
+                with_smiles_handle.close()
+
+    stages = [
+        resolve(),
+        _run_stage(
+            lambda chunk: asyncio.to_thread(build_reactions, chunk),
+            resolved,
+            built,
+        ),
+    ]
+    if map_atoms:
+        # LocalMapper runs in one worker thread; torch releases the GIL during
+        # inference, so resolution keeps making progress meanwhile.
+        stages.append(
+            _run_stage(lambda item: asyncio.to_thread(map_reactions, item), built, mapped)
+        )
+    writer = asyncio.ensure_future(write())
+    try:
+        await _gather_or_cancel(*stages, writer)
+    finally:
+        if mapper is None and mappers[0] is not None:
+            close_mapper(mappers[0])
+    return writer.result()
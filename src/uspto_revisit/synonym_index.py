@@ -0,0 +1,268 @@
+"""Offline name-to-structure index built from PubChem bulk synonym dumps.
+
+PubChem publishes ``CID-Synonym-filtered.gz`` and ``CID-SMILES.gz`` (one
+tab-separated ``CID<TAB>value`` pair per line) under
+https://ftp.ncbi.nlm.nih.gov/pubchem/Compound/Extras/. The builder joins them
+into one SQLite file keyed by normalized name (``normalize_name_key`` in the
+pipeline), stored without rowids and opened read-only and memory-mapped, so
+lookups are index probes against pages the operating system shares between
+processes. Build it with::
+
+    python -m uspto_revisit.synonym_index build \\
+        --synonyms CID-Synonym-filtered.gz --smiles CID-SMILES.gz \\
+        --output result/pubchem_synonyms.sqlite
+
+A normalized synonym that PubChem attaches to compounds with different SMILES
+is kept in the index but flagged ambiguous and never resolved from it; the
+``ambiguous`` command writes those names and their candidate structures to CSV.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import logging
+import sqlite3
+import time
+from collections.abc import Callable, Iterator
+from itertools import islice
+from pathlib import Path
+
+DEFAULT_MMAP_BYTES = 1 << 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS synonyms (
+    normalized_name TEXT PRIMARY KEY,
+    cid INTEGER NOT NULL,
+    smiles TEXT NOT NULL,
+    structures INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ambiguous (
+    normalized_name TEXT NOT NULL,
+    smiles TEXT NOT NULL,
+    cids TEXT NOT NULL,
+    PRIMARY KEY (normalized_name, smiles)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _open_dump(path: str | Path):
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return path.open(encoding="utf-8", errors="replace")
+
+
+def _read_pairs(path: str | Path) -> Iterator[tuple[int, str]]:
+    with _open_dump(path) as handle:
+        for line in handle:
+            cid, separator, value = line.rstrip("\n").partition("\t")
+            if separator and cid.isdigit() and value:
+                yield int(cid), value
+
+
+def build_synonym_index(
+    synonyms_path: str | Path,
+    smiles_path: str | Path,
+    output_path: str | Path,
+    key_function: Callable[[str], str] = str.casefold,
+    chunk_size: int = 100_000,
+) -> dict:
+    """Join the two dumps into a fresh index at ``output_path``."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = output_path.with_name(f"{output_path.name}.partial")
+    partial_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(partial_path)
+    try:
+        connection.executescript(
+            SCHEMA
+            + """
+            PRAGMA journal_mode=OFF;
+            PRAGMA synchronous=OFF;
+            CREATE TEMP TABLE staged (normalized_name TEXT NOT NULL, cid INTEGER NOT NULL);
+            CREATE TEMP TABLE cid_smiles (cid INTEGER PRIMARY KEY, smiles TEXT NOT NULL);
+            """
+        )
+        synonym_rows = 0
+        pairs = (
+            (key, cid)
+            for cid, synonym in _read_pairs(synonyms_path)
+            if (key := key_function(synonym))
+        )
+        while chunk := list(islice(pairs, chunk_size)):
+            connection.executemany("INSERT INTO staged VALUES (?, ?)", chunk)
+            synonym_rows += len(chunk)
+        connection.execute("CREATE INDEX temp.staged_cid ON staged (cid)")
+        structures = _read_pairs(smiles_path)
+        while chunk := list(islice(structures, chunk_size)):
+            connection.executemany(
+                "INSERT OR IGNORE INTO cid_smiles "
+                "SELECT ?1, ?2 WHERE EXISTS (SELECT 1 FROM staged WHERE cid = ?1)",
+                chunk,
+            )
+        connection.executescript(
+            """
+            CREATE TEMP TABLE joined AS
+                SELECT staged.normalized_name, staged.cid, cid_smiles.smiles
+                FROM staged JOIN cid_smiles USING (cid);
+            CREATE INDEX temp.joined_name ON joined (normalized_name, smiles, cid);
+            INSERT INTO synonyms
+                SELECT normalized_name, MIN(cid), MIN(smiles), COUNT(DISTINCT smiles)
+                FROM joined GROUP BY normalized_name;
+            INSERT INTO ambiguous
+                SELECT joined.normalized_name, joined.smiles,
+                       GROUP_CONCAT(DISTINCT joined.cid)
+                FROM joined JOIN synonyms USING (normalized_name)
+                WHERE synonyms.structures > 1
+                GROUP BY joined.normalized_name, joined.smiles;
+            """
+        )
+        names, ambiguous = connection.execute(
+            "SELECT COUNT(*), SUM(structures > 1) FROM synonyms"
+        ).fetchone()
+        connection.executemany(
+            "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+            (
+                ("synonyms_dump", Path(synonyms_path).name),
+                ("smiles_dump", Path(smiles_path).name),
+                ("built_at", str(time.time())),
+            ),
+        )
+        connection.commit()
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+    partial_path.replace(output_path)
+    summary = {
+        "synonym_rows": synonym_rows,
+        "names": names,
+        "ambiguous_names": ambiguous or 0,
+        "output": str(output_path),
+    }
+    logging.info("Built synonym index: %s", summary)
+    return summary
+
+
+class SynonymIndex:
+    """Read-only, memory-mapped lookups against a built synonym index."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        key_function: Callable[[str], str] = str.casefold,
+        mmap_bytes: int = DEFAULT_MMAP_BYTES,
+    ) -> None:
+        self.path = Path(path)
+        self.key_function = key_function
+        if not self.path.is_file():
+            raise FileNotFoundError(f"Synonym index not found: {self.path}")
+        self._connection = sqlite3.connect(
+            f"{self.path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+        self._connection.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+
+    def __enter__(self) -> SynonymIndex:
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.close()
+
+    def lookup(self, compound_name: str) -> dict | None:
+        """Return ``smiles``, ``cid``, and ``structures`` for a name, or None.
+
+        ``structures`` above one means the normalized name is ambiguous and
+        ``smiles`` is only one of its candidates.
+        """
+        key = self.key_function(compound_name)
+        if not key:
+            return None
+        row = self._connection.execute(
+            "SELECT cid, smiles, structures FROM synonyms WHERE normalized_name = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"cid": row[0], "smiles": row[1], "structures": row[2]}
+
+    def ambiguous(self) -> list[tuple[str, str, str]]:
+        """Return ``(normalized_name, smiles, cids)`` rows for ambiguous names."""
+        return self._connection.execute(
+            "SELECT normalized_name, smiles, cids FROM ambiguous "
+            "ORDER BY normalized_name, smiles"
+        ).fetchall()
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def export_ambiguous_synonyms(index_path: str | Path, output_path: str | Path) -> int:
+    """Write ambiguous normalized synonyms to CSV; return how many names."""
+    with SynonymIndex(index_path) as index:
+        rows = index.ambiguous()
+    destination = Path(output_path)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    with destination.open("w", newline="", encoding="utf-8-sig") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(("normalized_name", "smiles", "cids"))
+        writer.writerows(rows)
+    return len({row[0] for row in rows})
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Build or audit the offline PubChem synonym index.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Join PubChem dumps into an index.")
+    build.add_argument("--synonyms", required=True, help="CID-Synonym-filtered(.gz) dump.")
+    build.add_argument("--smiles", required=True, help="CID-SMILES(.gz) dump.")
+    build.add_argument(
+        "--output",
+        default="result/pubchem_synonyms.sqlite",
+        help="Index file. Default: result/pubchem_synonyms.sqlite",
+    )
+    ambiguous = subparsers.add_parser(
+        "ambiguous",
+        help="Write synonyms that name more than one structure to CSV.",
+    )
+    ambiguous.add_argument("--index", required=True, help="Built synonym index.")
+    ambiguous.add_argument(
+        "--output",
+        default="result/pubchem_synonyms_ambiguous.csv",
+        help="CSV path. Default: result/pubchem_synonyms_ambiguous.csv",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    from uspto_revisit.smiles_fetch import normalize_name_key
+
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.command == "build":
+        summary = build_synonym_index(
+            args.synonyms,
+            args.smiles,
+            args.output,
+            key_function=normalize_name_key,
+        )
+        print(
+            f"Indexed {summary['names']} normalized names "
+            f"({summary['ambiguous_names']} ambiguous) into {summary['output']}"
+        )
+    else:
+        count = export_ambiguous_synonyms(args.index, args.output)
+        print(f"Wrote {count} ambiguous synonyms to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
 import pytest
 
+from uspto_revisit import atom_mapping
 from uspto_revisit.atom_mapping import (
     _install_localmapper_compatibility,
     _legacy_resource_filename,
@@ -14,7 +15,7 @@ class FakeMapper:
     def get_atom_map(self, reactions, return_dict=False):
         single = isinstance(reactions, str)
         values = [reactions] if single else reactions
-        if any("INVALID" in reaction for reaction in values):
+        if any("Br" in reaction for reaction in values):
             raise ValueError("invalid molecule")
         results = [
             {
@@ -68,13 +69,13 @@ def test_normalize_localmapper_reaction_rejects_unresolved_smiles():
 
 def test_map_reaction_values_isolates_failed_reactions():
     result = map_reaction_values(
-        ["['CC>CO', 'CC>INVALID']", "['CN>>CN']"],
+        ["['CC>CO', 'CC>CBr']", "['CN>>CN']"],
         FakeMapper(),
         batch_size=8,
     )
 
     assert result["localmapper_rxn"] == [
-        ["CC>>CO", "CC>>INVALID"],
+        ["CC>>CO", "CC>>CBr"],
         ["CN>>CN"],
     ]
     assert result["mapped_rxn"] == [
@@ -99,3 +100,144 @@ def test_add_atom_mapping_columns_preserves_input_frame():
     assert list(source.columns) == ["model_rxn"]
     assert result.loc[0, "model_mapped_rxn"] == ["mapped:CC>>CO"]
     assert result.loc[0, "model_mapping_template"] == ["[C:1]>>[C:1]"]
+
+
+def test_mapping_cache_skips_equivalent_reactions_across_runs(tmp_path):
+    class CountingMapper(FakeMapper):
+        calls = []
+
+        def get_atom_map(self, reactions, return_dict=False):
+            self.calls.append(reactions)
+            return super().get_atom_map(reactions, return_dict)
+
+    cache_path = tmp_path / "mapping.sqlite"
+    atom_mapping.mapping_stats.clear()
+    try:
+        atom_mapping.configure_mapping_cache(cache_path)
+        first = map_reaction_values(
+            ["['CC.O>CO', 'CC>CBr']"],
+            CountingMapper(),
+            model_version="202403",
+        )
+        atom_mapping.configure_mapping_cache(cache_path)
+        mapper = CountingMapper()
+        mapper.calls.clear()
+        second = map_reaction_values(
+            ["['O.C(C)>>OC', 'CC>CBr']"],
+            mapper,
+            model_version="202403",
+        )
+        other_version = map_reaction_values(["CC.O>CO"], mapper, model_version="202501")
+        stats = dict(atom_mapping.mapping_stats)
+    finally:
+        atom_mapping.configure_mapping_cache(None)
+
+    assert second["mapped_rxn"] == first["mapped_rxn"] == [["mapped:CC.O>>CO", None]]
+    assert second["mapping_error"] == first["mapping_error"]
+    assert second["mapping_confident"] == [[True, None]]
+    # The failed reaction is not cached, so the second run maps it again.
+    assert mapper.calls == [["CC>>CBr"], "CC>>CBr", ["CC.O>>CO"]]
+    assert other_version["mapped_rxn"] == [["mapped:CC.O>>CO"]]
+    assert stats["cache_hits"] == 1
+    assert stats["model_reactions"] == 4
+
+
+def test_map_reaction_values_maps_duplicate_reactions_once():
+    class CountingMapper(FakeMapper):
+        calls = []
+
+        def get_atom_map(self, reactions, return_dict=False):
+            self.calls.append(reactions)
+            return super().get_atom_map(reactions, return_dict)
+
+    mapper = CountingMapper()
+    atom_mapping.mapping_stats.clear()
+
+    result = map_reaction_values(
+        ["['CC>CO', 'CC>>CO']", "CC>CO", "['CC>CBr', 'CC>CBr']"],
+        mapper,
+        batch_size=8,
+    )
+
+    assert result["mapped_rxn"] == [
+        ["mapped:CC>>CO", "mapped:CC>>CO"],
+        ["mapped:CC>>CO"],
+        [None, None],
+    ]
+    assert result["mapping_error"][2] == result["mapping_error"][2][:1] * 2
+    assert mapper.calls[0] == ["CC>>CO", "CC>>CBr"]
+    assert atom_mapping.mapping_stats["reactions"] == 5
+    assert atom_mapping.mapping_stats["model_reactions"] == 2
+
+
+def test_failed_batches_are_bisected_and_unparsable_reactions_prescreened():
+    class CountingMapper(FakeMapper):
+        calls = []
+
+        def get_atom_map(self, reactions, return_dict=False):
+            self.calls.append(reactions)
+            return super().get_atom_map(reactions, return_dict)
+
+    mapper = CountingMapper()
+    atom_mapping.mapping_stats.clear()
+    reactions = [f"C{'C' * index}>CO" for index in range(7)] + ["CC>CBr", "CC>C1CC"]
+
+    result = map_reaction_values(reactions, mapper, batch_size=8)
+
+    assert result["mapped_rxn"][7] == [None]
+    assert "invalid molecule" in result["mapping_error"][7][0]
+    assert "RDKit could not parse 'C1CC'" in result["mapping_error"][8][0]
+    assert all(row[0].startswith("mapped:") for row in result["mapped_rxn"][:7])
+    assert len(mapper.calls) == 8
+    assert atom_mapping.mapping_stats["prescreen_rejections"] == 1
+    assert atom_mapping.mapping_stats["batch_failures"] == 4
+    assert atom_mapping.mapping_stats["isolation_passes"] == 7
+
+
+def test_batches_group_reactions_by_size_under_an_atom_budget():
+    class CountingMapper(FakeMapper):
+        calls = []
+
+        def get_atom_map(self, reactions, return_dict=False):
+            self.calls.append(reactions)
+            return super().get_atom_map(reactions, return_dict)
+
+    mapper = CountingMapper()
+    reactions = ["CCCCCCCCCC>CCCCCCCCCCO", "C>CO", "CCCCC>CCCCCO", "CC>CO"]
+    try:
+        atom_mapping.configure_mapping_batches(14)
+        result = map_reaction_values(reactions, mapper, batch_size=8)
+    finally:
+        atom_mapping.configure_mapping_batches()
+
+    assert mapper.calls == [
+        ["C>>CO", "CC>>CO"],
+        ["CCCCC>>CCCCCO"],
+        ["CCCCCCCCCC>>CCCCCCCCCCO"],
+    ]
+    assert result["mapped_rxn"] == [
+        [f"mapped:{reaction.replace('>', '>>')}"] for reaction in reactions
+    ]
+
+
+def fake_mapper_factory(device, model_version):
+    return FakeMapper()
+
+
+def test_mapper_pool_maps_batches_in_worker_processes():
+    atom_mapping.mapping_stats.clear()
+    reactions = [f"C{'C' * index}>CO" for index in range(6)] + ["CC>CBr"]
+
+    with atom_mapping.LocalMapperPool(
+        2,
+        threads_per_worker=1,
+        mapper_factory=fake_mapper_factory,
+    ) as pool:
+        result = map_reaction_values(reactions, pool, batch_size=2)
+
+    assert result["mapped_rxn"][:6] == [
+        [f"mapped:{reaction.replace('>', '>>')}"] for reaction in reactions[:6]
+    ]
+    assert "invalid molecule" in result["mapping_error"][6][0]
+    assert atom_mapping.mapping_stats["batches"] == 4
+    assert atom_mapping.mapping_stats["batch_failures"] >= 1
@@ -115,3 +115,180 @@ def test_final_reprocess_loads_overrides(tmp_path, monkeypatch):
     assert calls["batch_size"] == 25
     assert final_path == tmp_path / "smiles_dict_final.json"
     assert final_path.exists()
+
+
+def test_make_smiles_dict_shares_one_session_across_batches(tmp_path, monkeypatch):
+    sessions = []
+
+    async def fake_process_batch(
+        batch, session, fix_name_bool, semaphore, resolution_cache
+    ):
+        sessions.append(session)
+        return [{"A": "CCO"} for _ in batch]
+
+    monkeypatch.setattr(cli, "process_batch", fake_process_batch)
+    session = object()
+    try:
+        smiles_dicts = asyncio.run(
+            cli.make_smiles_dict(
+                ["{}"] * 5,
+                batch_dir=tmp_path,
+                batch_size=2,
+                fix_names=False,
+                lookup_concurrency=2,
+                session=session,
+            )
+        )
+    finally:
+        cli.load_cache(":memory:")
+
+    assert len(smiles_dicts) == 5
+    assert sessions == [session, session, session]
+
+
+def test_lookup_session_applies_connection_tuning(monkeypatch):
+    captured = {}
+
+    def fake_connector(**kwargs):
+        captured.update(kwargs)
+        return "connector"
+
+    fake_aiohttp = SimpleNamespace(
+        ClientSession=lambda **kwargs: kwargs,
+        TCPConnector=fake_connector,
+    )
+    monkeypatch.setitem(sys.modules, "aiohttp", fake_aiohttp)
+    monkeypatch.setattr(cli, "aiohttp_ssl_context", lambda: None)
+
+    session = cli.create_lookup_session(
+        connections_per_host=4,
+        dns_cache_ttl=60,
+        keepalive_timeout=5,
+    )
+
+    assert session == {"connector": "connector"}
+    assert captured["limit_per_host"] == 4
+    assert captured["ttl_dns_cache"] == 60
+    assert captured["keepalive_timeout"] == 5
+
+
+def test_run_pipeline_skips_current_stages_and_batches(tmp_path, monkeypatch):
+    input_path = tmp_path / "responses.csv"
+    input_path.write_text("responses\n{}\n{}\n{}\n", encoding="utf-8")
+    calls = {"batches": 0, "reprocess": 0}
+
+    async def fake_process_batch(
+        batch, session, fix_name_bool, semaphore, resolution_cache
+    ):
+        calls["batches"] += 1
+        return [{"A": "CCO"} for _ in batch]
+
+    async def fake_reprocess(input_file, output_file, session, semaphore, batch_size):
+        calls["reprocess"] += 1
+        output_file.write_text(input_file.read_text(encoding="utf-8-sig"), encoding="utf-8")
+
+    monkeypatch.setattr(cli, "process_batch", fake_process_batch)
+    monkeypatch.setattr(cli, "reprocess_no_smi", fake_reprocess)
+    monkeypatch.setattr(cli, "aiohttp_ssl_context", lambda: None)
+
+    def run(*extra):
+        args = cli.build_parser().parse_args(
+            [
+                "--input",
+                str(input_path),
+                "--model-column",
+                "responses",
+                "--batch-dir",
+                str(tmp_path / "batches"),
+                "--output",
+                str(tmp_path / "out.csv"),
+                "--log-file",
+                str(tmp_path / "run.log"),
+                "--batch-size",
+                "2",
+                *extra,
+            ]
+        )
+        try:
+            return asyncio.run(cli.run_pipeline(args))
+        finally:
+            cli.load_cache(":memory:")
+
+    assert run() == tmp_path / "out.csv"
+    assert calls == {"batches": 2, "reprocess": 1}
+
+    run()
+    assert calls == {"batches": 2, "reprocess": 1}
+
+    (tmp_path / "batches" / "smiles_dict_final.json").unlink()
+    run()
+    assert calls == {"batches": 2, "reprocess": 2}
+
+    assert run("--from-stage", "resolve", "--to-stage", "resolve").name == (
+        "smiles_dict_initial.json"
+    )
+    assert calls == {"batches": 4, "reprocess": 2}
+
+
+def test_run_pipeline_reruns_failed_batches_and_changed_resolver_settings(
+    tmp_path, monkeypatch
+):
+    input_path = tmp_path / "responses.csv"
+    input_path.write_text("responses\n{}\n{}\n{}\n", encoding="utf-8")
+    calls = []
+
+    async def fake_process_batch(
+        batch, session, fix_name_bool, semaphore, resolution_cache
+    ):
+        calls.append(len(batch))
+        if calls == [2, 1]:
+            raise RuntimeError("resolver outage")
+        return [{"A": "CCO"} for _ in batch]
+
+    monkeypatch.setattr(cli, "process_batch", fake_process_batch)
+    monkeypatch.setattr(cli, "aiohttp_ssl_context", lambda: None)
+
+    def run(*extra):
+        args = cli.build_parser().parse_args(
+            [
+                "--input",
+                str(input_path),
+                "--model-column",
+                "responses",
+                "--batch-dir",
+                str(tmp_path / "batches"),
+                "--log-file",
+                str(tmp_path / "run.log"),
+                "--batch-size",
+                "2",
+                "--to-stage",
+                "resolve",
+                *extra,
+            ]
+        )
+        try:
+            return asyncio.run(cli.run_pipeline(args))
+        finally:
+            cli.load_cache(":memory:")
+            cli.configure_resolver_hosts(
+                SimpleNamespace(
+                    resolver_url=None,
+                    host_limit=None,
+                    circuit_failures=5,
+                    circuit_reset_seconds=60.0,
+                )
+            )
+
+    run()
+    manifest = json.loads((tmp_path / "batches" / "pipeline_manifest.json").read_text())
+    assert "resolve" not in manifest
+    assert "resolve:smiles_dict_batch_1.json" in manifest
+
+    # Only the failed batch is resolved again, and then the stage is current.
+    run()
+    assert calls == [2, 1, 1]
+    run()
+    assert calls == [2, 1, 1]
+
+    run("--resolver-url", "PubChem=http://127.0.0.1:8080/rest/pug")
+    assert calls == [2, 1, 1, 2, 1]
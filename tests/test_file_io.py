@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from uspto_revisit.file_io import read_model_output, read_table, write_table
+
+pytest.importorskip("pyarrow")
+
+
+def test_parquet_tables_round_trip_list_and_map_columns(tmp_path):
+    frame = pd.DataFrame(
+        {
+            "responses": ["first", "second", "third"],
+            "model_smiles": [
+                {"A": "CCO", "B": "[mystery (NoSmi)]"},
+                "{'A': 'C'}",
+                None,
+            ],
+            "model_rxn": [["CCO>CC=O"], "['C>CO', 'CO>C=O']", "Error: no products"],
+            "model_mapping_confident": [[True], [False, True], []],
+            "note": ["plain", "kept as text", "[not a literal"],
+        }
+    )
+    csv_path = tmp_path / "table.csv"
+    parquet_path = tmp_path / "table.parquet"
+    write_table(frame, csv_path)
+
+    write_table(read_table(csv_path), parquet_path)
+    restored = read_table(parquet_path)
+
+    assert restored["model_smiles"].tolist() == [
+        {"A": "CCO", "B": "[mystery (NoSmi)]"},
+        {"A": "C"},
+        None,
+    ]
+    assert restored["model_rxn"].tolist() == [
+        ["CCO>CC=O"],
+        ["C>CO", "CO>C=O"],
+        ["Error: no products"],
+    ]
+    assert restored["model_mapping_confident"].tolist() == [[True], [False, True], []]
+    assert restored["note"].tolist() == ["plain", "kept as text", "[not a literal"]
+
+
+def test_read_model_output_prefers_the_parquet_copy(tmp_path):
+    frame = pd.DataFrame({"model_rxn": [["CCO>CC=O"]]})
+    write_table(frame, tmp_path / "model_reaction_smiles_final.csv")
+
+    path, restored = read_model_output(tmp_path, "model")
+    assert path.suffix == ".csv"
+    assert restored["model_rxn"].tolist() == ["['CCO>CC=O']"]
+
+    write_table(frame, tmp_path / "model_reaction_smiles_final.parquet")
+    path, restored = read_model_output(tmp_path, "model")
+    assert path.suffix == ".parquet"
+    assert restored["model_rxn"].tolist() == [["CCO>CC=O"]]
+    with pytest.raises(FileNotFoundError):
+        read_model_output(tmp_path, "other")
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+
+from uspto_revisit import host_limits, smiles_fetch
+from uspto_revisit.host_limits import CircuitOpenError, HostLimiter, HostPolicy
+
+
+@pytest.fixture(autouse=True)
+def reset_host_limits():
+    host_limits.configure_host_limits()
+    yield
+    host_limits.configure_host_limits()
+
+
+def test_parse_host_limit_accepts_rate_and_concurrency():
+    assert host_limits.parse_host_limit("CIR=2:4") == (
+        "CIR",
+        HostPolicy(rate=2.0, concurrency=4),
+    )
+    with pytest.raises(ValueError, match="SOURCE=RATE"):
+        host_limits.parse_host_limit("CIR")
+
+
+def test_circuit_opens_after_repeated_failures_and_probes_later():
+    limiter = HostLimiter("cir", HostPolicy(failure_threshold=2, reset_seconds=30))
+    limiter.record_failure()
+    limiter.record_failure()
+    assert limiter.state == "open"
+
+    async def enter():
+        async with limiter:
+            pass
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(enter())
+    assert limiter.stats()["rejected"] == 1
+
+    limiter.opened_at = time.monotonic() - 31
+    assert limiter.state == "half-open"
+    asyncio.run(enter())
+    limiter.record_success()
+    assert limiter.state == "closed"
+
+
+def test_cancelled_probe_lets_a_later_request_probe_again():
+    limiter = HostLimiter("cir", HostPolicy(failure_threshold=1, reset_seconds=30))
+    limiter.record_failure()
+    limiter.opened_at = time.monotonic() - 31
+
+    async def hanging_probe():
+        async with limiter:
+            await asyncio.sleep(10)
+
+    async def run():
+        probe = asyncio.create_task(hanging_probe())
+        await asyncio.sleep(0)
+        assert limiter.probing
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        async with limiter:
+            pass
+
+    asyncio.run(run())
+    assert limiter.state == "half-open"
+    assert limiter.stats()["rejected"] == 0
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_concurrency_cap_limits_in_flight_requests():
+    limiter = HostLimiter("opsin", HostPolicy(concurrency=2))
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.counters["in_flight"])
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert limiter.stats()["requests"] == 6
+
+
+def test_fetch_smiles_skips_host_with_open_circuit():
+    url = f"{smiles_fetch.resolver_base_urls['CIR']}/x/smiles"
+    limiter = host_limits.host_limiter(url)
+    limiter.opened_at = time.monotonic()
+
+    class FailingSession:
+        def get(self, url):
+            raise AssertionError("an open circuit must not send requests")
+
+    result = asyncio.run(
+        smiles_fetch.fetch_smiles(
+            FailingSession(),
+            url,
+            asyncio.Semaphore(1),
+            max_retries=2,
+        )
+    )
+
+    assert result is None
+    assert host_limits.host_stats()["CIR"]["rejected"] == 1
@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+
+from uspto_revisit import smiles_fetch
+from uspto_revisit.known_aliases import KnownAliasRegistry
+
+
+def write_aliases(path, version, aliases):
+    path.write_text(
+        json.dumps(
+            {
+                "schema_version": 1,
+                "version": version,
+                "aliases": [{"name": name, "smiles": smiles} for name, smiles in aliases],
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+def test_registry_indexes_file_aliases_and_counts_hits(tmp_path):
+    path = tmp_path / "known_aliases.json"
+    write_aliases(
+        path,
+        "v1",
+        [
+            ("Hünig's base", "CCN(C(C)C)C(C)C"),
+            ("(+)-tartaric acid", "O=C(O)[C@H](O)[C@@H](O)C(=O)O"),
+            ("(-)-tartaric acid", "O=C(O)[C@@H](O)[C@H](O)C(=O)O"),
+            ("DMF", "O=CN(C)C"),
+        ],
+    )
+    registry = smiles_fetch.load_known_aliases(path)
+    try:
+        assert smiles_fetch._known_smiles("  hünig's BASE ") == "CCN(C(C)C)C(C)C"
+        assert smiles_fetch._known_smiles("dmf") == "CN(C)C=O"
+        assert smiles_fetch._known_smiles("D.M.F.") is None
+        assert smiles_fetch._known_smiles("PDC") is None
+        assert smiles_fetch._known_smiles("Ice-") is None
+        assert smiles_fetch._known_smiles("THF") == "C1CCOC1"
+        # Stereo descriptors stay in the normalized key.
+        assert smiles_fetch._known_smiles("tartaric acid") is None
+        assert smiles_fetch._known_smiles("(−)-Tartaric-acid") == (
+            "O=C(O)[C@@H](O)[C@H](O)C(=O)O"
+        )
+        assert registry.version == "v1"
+        assert registry.hits["DMF"] == 1
+        assert registry.stats["normalized_hits"] == 1
+        assert "version v1" in smiles_fetch.format_known_alias_stats()
+    finally:
+        smiles_fetch.load_known_aliases(None)
+
+
+def test_registry_reloads_a_changed_file_and_keeps_the_last_good_table(tmp_path):
+    path = tmp_path / "known_aliases.json"
+    write_aliases(path, "v1", [("mystery solvent", "CCO")])
+    registry = KnownAliasRegistry({}, smiles_fetch.canonicalize_smiles, path=path)
+    assert registry.lookup("mystery solvent") == "CCO"
+    assert not registry.reload_if_changed()
+
+    write_aliases(path, "v2", [("mystery solvent", "CCCO"), ("other solvent", "CO")])
+    os.utime(path, ns=(0, 1))
+    assert registry.reload_if_changed()
+    assert (registry.version, registry.lookup("mystery solvent")) == ("v2", "CCCO")
+
+    write_aliases(path, "v3", [("broken", "not smiles")])
+    os.utime(path, ns=(0, 2))
+    assert not registry.reload_if_changed()
+    assert (registry.version, registry.lookup("other solvent")) == ("v2", "CO")
+
+    write_aliases(path, "v4", [("dup", "CCO"), ("DUP", "CCCO")])
+    with pytest.raises(ValueError, match="two structures"):
+        smiles_fetch.load_known_aliases(path)
+    smiles_fetch.load_known_aliases(None)
+
+
+def test_registry_is_built_on_first_use_and_never_folds_enantiomers():
+    parsed = []
+
+    def canonicalize(smiles):
+        parsed.append(smiles)
+        return smiles_fetch.canonicalize_smiles(smiles)
+
+    registry = KnownAliasRegistry(
+        {"(+)-camphor": "C[C@@]12CC[C@@H](CC1=O)C2(C)C"},
+        canonicalize,
+        key_function=smiles_fetch.alias_name_key,
+    )
+    assert parsed == []
+    assert registry.lookup("(+) camphor") == smiles_fetch.canonicalize_smiles(
+        "C[C@@]12CC[C@@H](CC1=O)C2(C)C"
+    )
+    assert registry.lookup("(-)-camphor") is None
+    assert registry.lookup("camphor") is None
+    assert len(parsed) == 1
+
+
+def test_builtin_known_aliases_all_parse():
+    registry = KnownAliasRegistry(
+        smiles_fetch.DEFAULT_KNOWN_SMILES,
+        smiles_fetch.canonicalize_smiles,
+    )
+    registry.load()
+    assert len(registry) == len(smiles_fetch.DEFAULT_KNOWN_SMILES)
+    assert registry.lookup("pd/c") == "[Pd]"
+
+
+def test_builtin_aliases_do_not_match_names_that_differ_in_punctuation():
+    assert smiles_fetch._known_smiles("Pd/C") == "[Pd]"
+    assert smiles_fetch._known_smiles("PDC") is None
+    assert smiles_fetch._known_smiles("Ice-") is None
+    assert smiles_fetch._known_smiles("ICE") == "O"
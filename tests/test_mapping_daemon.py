@@ -0,0 +1,165 @@
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from uspto_revisit import atom_mapping, mapping_daemon
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(mapping_daemon.socket, "AF_UNIX"),
+    reason="Unix domain sockets are unavailable.",
+)
+
+
+class FakeMapper:
+    def get_atom_map(self, reactions, return_dict=False):
+        values = [reactions] if isinstance(reactions, str) else reactions
+        if any("Br" in reaction for reaction in values):
+            raise ValueError("invalid molecule")
+        results = [
+            {"mapped_rxn": f"mapped:{reaction}", "template": "T", "confident": True}
+            for reaction in values
+        ]
+        return results[0] if isinstance(reactions, str) else results
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    socket_path = str(tmp_path / "mapper.sock")
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=mapping_daemon.serve_mapping_daemon,
+        args=(socket_path, FakeMapper()),
+        kwargs={"model_version": "202403", "ready": ready},
+        daemon=True,
+    )
+    thread.start()
+    ready.wait(5)
+    yield socket_path
+    try:
+        mapping_daemon.query_mapping_daemon(socket_path, "stop")
+    except OSError:
+        pass
+    thread.join(5)
+
+
+def test_mapping_commands_use_a_running_daemon(daemon, monkeypatch):
+    def no_local_mapper(**_kwargs):
+        raise AssertionError("LocalMapper was loaded in process.")
+
+    monkeypatch.setattr(atom_mapping, "create_localmapper", no_local_mapper)
+    atom_mapping.configure_mapping_daemon(daemon)
+    try:
+        result = atom_mapping.add_atom_mapping_columns(
+            pd.DataFrame({"model_rxn": [["CC>CO", "CC>CBr"], "CC>CO"]}),
+            "model_rxn",
+            "model",
+        )
+    finally:
+        atom_mapping.configure_mapping_daemon(None)
+
+    assert result["model_mapped_rxn"].tolist() == [["mapped:CC>>CO", None], ["mapped:CC>>CO"]]
+    assert "invalid molecule" in result["model_mapping_error"][0][1]
+    status = mapping_daemon.query_mapping_daemon(daemon)
+    assert status["model_version"] == "202403"
+    assert status["reactions"] == 2
+    assert status["isolation_passes"] >= 1
+
+
+def test_daemon_for_another_model_version_is_ignored(daemon):
+    client = mapping_daemon.connect_mapping_daemon(daemon, "202501", fallback=FakeMapper)
+
+    assert client is None
+
+
+def test_daemon_on_another_device_is_ignored(daemon):
+    assert mapping_daemon.connect_mapping_daemon(
+        daemon, "202403", fallback=FakeMapper, device="cuda:0"
+    ) is None
+    assert mapping_daemon.connect_mapping_daemon(
+        daemon, "202403", fallback=FakeMapper, device="cpu"
+    ) is not None
+
+
+def test_client_maps_in_process_when_daemon_results_do_not_match(daemon, monkeypatch):
+    client = mapping_daemon.connect_mapping_daemon(daemon, "202403", fallback=FakeMapper)
+    monkeypatch.setattr(
+        mapping_daemon,
+        "_request",
+        lambda *_args: {"results": [[]], "counters": {"model_reactions": 1}},
+    )
+    records = [atom_mapping._empty_mapping_record(localmapper_rxn="CC>>CO")]
+
+    mapped = list(client.map_batches([records]))
+    client.close()
+
+    assert mapped == [records]
+    assert records[0]["mapped_rxn"] == "mapped:CC>>CO"
+
+
+def test_daemon_socket_owned_by_another_user_is_ignored(daemon, monkeypatch):
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(daemon).st_uid + 1)
+
+    assert mapping_daemon.connect_mapping_daemon(daemon, "202403", fallback=FakeMapper) is None
+
+
+def test_regular_file_at_the_socket_path_is_ignored(tmp_path):
+    path = tmp_path / "mapper.sock"
+    path.write_text("{}", encoding="utf-8")
+
+    assert mapping_daemon.connect_mapping_daemon(str(path), "202403", fallback=FakeMapper) is None
+
+
+def test_client_maps_in_process_when_daemon_results_lack_fields(daemon, monkeypatch):
+    client = mapping_daemon.connect_mapping_daemon(daemon, "202403", fallback=FakeMapper)
+    monkeypatch.setattr(
+        mapping_daemon,
+        "_request",
+        lambda *_args: {"results": [[{"mapped_rxn": "poisoned"}]], "counters": {}},
+    )
+    records = [atom_mapping._empty_mapping_record(localmapper_rxn="CC>>CO")]
+
+    mapped = list(client.map_batches([records]))
+    client.close()
+
+    assert mapped == [records]
+    assert records[0]["mapped_rxn"] == "mapped:CC>>CO"
+
+
+def test_client_maps_in_process_when_the_daemon_hangs(tmp_path, monkeypatch):
+    # A socket that accepts connections but never answers.
+    socket_path = str(tmp_path / "hung.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    monkeypatch.setattr(mapping_daemon, "MAP_REQUEST_TIMEOUT_SECONDS", 0.1)
+    client = mapping_daemon.MappingDaemonClient(socket_path, {"workers": 1}, FakeMapper)
+    records = [atom_mapping._empty_mapping_record(localmapper_rxn="CC>>CO")]
+
+    try:
+        mapped = list(client.map_batches([records]))
+    finally:
+        client.close()
+        listener.close()
+
+    assert mapped == [records]
+    assert records[0]["mapped_rxn"] == "mapped:CC>>CO"
+
+
+def test_client_falls_back_in_process_when_the_daemon_stops(daemon):
+    client = mapping_daemon.connect_mapping_daemon(daemon, "202403", fallback=FakeMapper)
+    mapping_daemon.query_mapping_daemon(daemon, "stop")
+    deadline = time.monotonic() + 5
+    while Path(daemon).exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    records = [atom_mapping._empty_mapping_record(localmapper_rxn="CC>>CO")]
+
+    mapped = list(client.map_batches([records]))
+    client.close()
+
+    assert mapped == [records]
+    assert records[0]["mapped_rxn"] == "mapped:CC>>CO"
@@ -0,0 +1,64 @@
+import pickle
+import sqlite3
+
+from uspto_revisit import smiles_fetch
+from uspto_revisit.name_store import NameStore
+
+
+def test_name_store_appends_and_indexes_normalized_names(tmp_path):
+    path = tmp_path / "names.sqlite"
+    with NameStore(path, key_function=smiles_fetch.normalize_name_key) as store:
+        store.put("Ethyl acetate", "CCOC(C)=O", "OPSIN")
+        store.put("ethyl-acetate", "CCOC(C)=O", "PubChem")
+        store.commit()
+
+        with NameStore(path) as reader:
+            assert reader.get("Ethyl acetate") == "CCOC(C)=O"
+            assert len(reader) == 2
+
+        assert store.lookup_normalized("ethylacetate") == [
+            ("Ethyl acetate", "CCOC(C)=O"),
+            ("ethyl-acetate", "CCOC(C)=O"),
+        ]
+        assert store.conflicts() == []
+
+
+def test_open_name_store_migrates_pickle_cache_once(tmp_path):
+    legacy = tmp_path / "smiles_cache.pkl"
+    legacy.write_bytes(pickle.dumps({"ethanol": "C(C)O", "bad": "not-smiles"}))
+
+    with smiles_fetch.open_name_store(legacy) as store:
+        assert store.get("ethanol") == "CCO"
+        assert "bad" not in store
+        store.put("ethanol", "OCC", "test")
+        store.commit()
+
+    with smiles_fetch.open_name_store(tmp_path / "smiles_cache.sqlite") as store:
+        assert store.get("ethanol") == "OCC"
+
+
+def test_stored_smiles_are_flagged_canonical_after_first_reparse(tmp_path, monkeypatch):
+    path = tmp_path / "names.sqlite"
+    with sqlite3.connect(path) as legacy:
+        legacy.execute(
+            "CREATE TABLE names (name TEXT PRIMARY KEY, normalized_name TEXT NOT NULL, "
+            "smiles TEXT NOT NULL, source TEXT, updated_at REAL NOT NULL)"
+        )
+        legacy.execute("INSERT INTO names VALUES ('ethanol', 'ethanol', 'OCC', NULL, 0)")
+
+    store = NameStore(path, key_function=smiles_fetch.normalize_name_key)
+    monkeypatch.setattr(smiles_fetch, "smiles_cache", store)
+    smiles_fetch.configure_canonical_cache(8)
+    try:
+        assert store.get_entry("ethanol") == ("OCC", False)
+        assert smiles_fetch._stored_smiles("ethanol") == "CCO"
+        assert store.get_entry("ethanol") == ("CCO", True)
+        assert smiles_fetch._stored_smiles("ethanol") == "CCO"
+        assert smiles_fetch.canonicalize_smiles(" OCC ") == "CCO"
+
+        stats = smiles_fetch.canonical_cache_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["store_skips"] >= 1
+    finally:
+        smiles_fetch.configure_canonical_cache()
+        store.close()
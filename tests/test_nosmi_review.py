@@ -159,3 +159,79 @@ def test_apply_review_excludes_confirmed_nonmapping_component(tmp_path):
     assert "(NoSmi)" not in result.loc[0, "model-a_rxn"]
     assert "A" not in result.loc[0, "model-a_skeleton"]
     assert summary["models"]["model-a"]["excluded_components"] == 1
+
+
+def test_apply_review_remaps_only_changed_rows(tmp_path, monkeypatch):
+    spec = _write_model(tmp_path, "model-a", ["compound 3", "other", "other"])
+    frame = pd.read_csv(spec.csv_path)
+    for suffix in ("localmapper_rxn", "mapping_template", "mapping_confident"):
+        frame[f"model-a_{suffix}"] = "['old']"
+    frame.to_csv(spec.csv_path, index=False)
+    review = build_review_queue([spec], audit_path=None)
+    review.loc[review["row_zero_based"] == 0, "review_decision"] = "use_smiles"
+    review.loc[review["row_zero_based"] == 0, "reviewed_smiles"] = "C(C)O"
+    review.loc[review["row_zero_based"] == 0, "evidence"] = "patent row 0"
+    review_path = tmp_path / "review.csv"
+    review.to_csv(review_path, index=False)
+    mapped_batches = []
+
+    class FakeMapper:
+        def get_atom_map(self, reactions, return_dict=False):
+            mapped_batches.append(reactions)
+            return [{"mapped_rxn": f"mapped:{reaction}"} for reaction in reactions]
+
+    monkeypatch.setattr(
+        "uspto_revisit.nosmi_review.create_mapper",
+        lambda device, model_version, workers: FakeMapper(),
+    )
+    output_dir = tmp_path / "reviewed"
+    apply_review(
+        [spec],
+        review_path,
+        output_dir=output_dir,
+        summary_path=output_dir / "summary.json",
+        map_atoms=True,
+    )
+
+    result = pd.read_csv(output_dir / "model-a_reaction_smiles_final.csv")
+    assert mapped_batches == [["CCO>>CCO"]]
+    assert result["model-a_mapped_rxn"].tolist() == [
+        "['mapped:CCO>>CCO']",
+        "['old']",
+        "['old']",
+    ]
+    assert result.loc[1, "model-a_mapping_template"] == "['old']"
+
+
+def test_apply_review_closes_the_mapper_when_remapping_fails(tmp_path, monkeypatch):
+    spec = _write_model(tmp_path, "model-a", ["compound 3"])
+    review = build_review_queue([spec], audit_path=None)
+    review["review_decision"] = "use_smiles"
+    review["reviewed_smiles"] = "C(C)O"
+    review["evidence"] = "patent row 0"
+    review_path = tmp_path / "review.csv"
+    review.to_csv(review_path, index=False)
+    closed = []
+
+    class FakeMapper:
+        def close(self):
+            closed.append(True)
+
+    def failing_remap(*_args, **_kwargs):
+        raise RuntimeError("mapping worker died")
+
+    monkeypatch.setattr(
+        "uspto_revisit.nosmi_review.create_mapper",
+        lambda device, model_version, workers: FakeMapper(),
+    )
+    monkeypatch.setattr("uspto_revisit.nosmi_review._remap_changed_rows", failing_remap)
+
+    with pytest.raises(RuntimeError, match="worker died"):
+        apply_review(
+            [spec],
+            review_path,
+            output_dir=tmp_path / "reviewed",
+            summary_path=tmp_path / "reviewed" / "summary.json",
+            map_atoms=True,
+        )
+    assert closed == [True]
@@ -0,0 +1,73 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from uspto_revisit import host_limits, smiles_fetch
+from uspto_revisit.resolver_standin import (
+    StandinConfig,
+    standin_base_urls,
+    start_standin,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_resolver_urls():
+    yield
+    smiles_fetch.configure_resolver_urls()
+    host_limits.configure_host_limits()
+
+
+def _resolve_against_standin(config, coroutine_factory):
+    async def run():
+        runner, base_url = await start_standin(config)
+        try:
+            smiles_fetch.configure_resolver_urls(standin_base_urls(base_url))
+            host_limits.configure_host_limits()
+            async with aiohttp.ClientSession() as session:
+                result = await coroutine_factory(session, asyncio.Semaphore(4))
+                async with session.get(f"{base_url}/stats") as response:
+                    stats = await response.json()
+            return result, stats
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_standin_serves_every_resolver_url_shape():
+    config = StandinConfig(fixtures={"Paracetamol": "CC(=O)Nc1ccc(O)cc1"})
+
+    async def lookups(session, semaphore):
+        return [
+            await resolver(session, "paracetamol", semaphore, 1)
+            for resolver in (
+                smiles_fetch.get_smiles_from_pubchem,
+                smiles_fetch.get_smiles_from_opsin,
+                smiles_fetch.get_smiles_from_cir,
+                smiles_fetch.get_smiles_from_chebi,
+            )
+        ]
+
+    results, stats = _resolve_against_standin(config, lookups)
+
+    assert [source for _smiles, source in results] == ["PubChem", "OPSIN", "CIR", "ChEBI"]
+    assert {smiles for smiles, _source in results} == {"CC(=O)Nc1ccc(O)cc1"}
+    assert stats["CIR:found"] == 1
+
+
+def test_standin_injects_busy_responses():
+    config = StandinConfig(fixtures={"ethanol": "CCO"}, rate_429=1.0)
+
+    async def lookup(session, semaphore):
+        return await smiles_fetch.fetch_smiles(
+            session,
+            f"{smiles_fetch.resolver_base_urls['OPSIN']}/ethanol.smi",
+            semaphore,
+            max_retries=1,
+        )
+
+    result, stats = _resolve_against_standin(config, lookup)
+
+    assert result is None
+    assert stats["OPSIN:429"] == 1
@@ -0,0 +1,106 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from uspto_revisit import cli, sharding, smiles_fetch
+
+
+@pytest.mark.parametrize("strategy", ["range", "hash"])
+def test_select_shard_partitions_every_row_once(strategy):
+    frame = pd.DataFrame({"responses": [f"row {index}" for index in range(11)]})
+
+    shards = [
+        sharding.select_shard(frame, index, 3, strategy, key_column="responses")
+        for index in range(3)
+    ]
+
+    rows = sorted(row for shard in shards for row in shard["source_row"])
+    assert rows == list(range(11))
+    assert shards[0].equals(
+        sharding.select_shard(frame, 0, 3, strategy, key_column="responses")
+    )
+
+
+@pytest.mark.parametrize("strategy", ["range", "hash"])
+def test_write_shard_input_streams_the_rows_select_shard_picks(tmp_path, strategy):
+    input_path = tmp_path / "responses.csv"
+    pd.DataFrame(
+        {
+            "responses": [f"row {index}\nline two" if index % 3 else "" for index in range(23)],
+            "count": [index if index % 4 else None for index in range(23)],
+        }
+    ).to_csv(input_path, index=False)
+    frame = pd.read_csv(input_path)
+
+    for index in range(3):
+        output_path = tmp_path / f"shard-{index}.csv"
+        rows = sharding.write_shard_input(
+            input_path,
+            output_path,
+            index,
+            3,
+            strategy,
+            key_column="responses",
+            chunk_rows=4,
+        )
+        expected = sharding.select_shard(frame, index, 3, strategy, key_column="responses")
+        written = pd.read_csv(output_path)
+        assert rows == len(expected)
+        pd.testing.assert_frame_equal(written, expected.reset_index(drop=True))
+
+
+def test_sharded_runs_merge_into_one_output_and_name_store(tmp_path, monkeypatch):
+    input_path = tmp_path / "responses.csv"
+    pd.DataFrame({"responses": [f'{{"row": {index}}}' for index in range(5)]}).to_csv(
+        input_path,
+        index=False,
+    )
+
+    async def fake_process_batch(
+        batch, session, fix_name_bool, semaphore, resolution_cache
+    ):
+        # Each shard resolves "ethanol" to a different structure.
+        smiles_fetch.smiles_cache.put("ethanol", f"C{'C' * len(batch)}O", "test")
+        return [{"A": "CCO"} for _ in batch]
+
+    monkeypatch.setattr(cli, "process_batch", fake_process_batch)
+    monkeypatch.setattr(cli, "aiohttp_ssl_context", lambda: None)
+    output_path = tmp_path / "out.csv"
+    batch_dir = tmp_path / "batches"
+
+    for index in range(2):
+        args = cli.build_parser().parse_args(
+            [
+                "--input",
+                str(input_path),
+                "--model-column",
+                "responses",
+                "--batch-dir",
+                str(batch_dir),
+                "--output",
+                str(output_path),
+                "--log-file",
+                str(tmp_path / "run.log"),
+                "--skip-reprocess",
+                "--shard-count",
+                "2",
+                "--shard-index",
+                str(index),
+            ]
+        )
+        try:
+            shard_output = asyncio.run(cli.run_pipeline(args))
+        finally:
+            cli.load_cache(":memory:")
+        assert shard_output == sharding.shard_output_path(output_path, index, 2)
+
+    summary = sharding.merge_shards(output_path, batch_dir, 2)
+
+    merged = pd.read_csv(output_path)
+    assert summary["rows"] == 5
+    assert summary["shard_disagreements"] == 1
+    assert "source_row" not in merged.columns
+    assert merged["responses"].tolist() == [f'{{"row": {index}}}' for index in range(5)]
+    with smiles_fetch.open_name_store(batch_dir / "smiles_cache.sqlite") as store:
+        assert store.get("ethanol") == "CCCCO"
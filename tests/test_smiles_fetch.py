@@ -1,7 +1,12 @@
 import asyncio
 import json
+import logging
+import sys
+from collections import Counter
 
-from uspto_revisit import smiles_fetch
+import pytest
+
+from uspto_revisit import opsin_local, smiles_fetch
 
 
 def test_extract_pubchem_smiles_accepts_current_field():
@@ -165,3 +170,480 @@ def test_chebi_does_not_accept_short_acronym_synonym(monkeypatch):
     )
 
     assert result == (None, None)
+
+
+def test_audit_name_smiles_consistency_reads_name_store(tmp_path):
+    cache_path = tmp_path / "smiles_cache.sqlite"
+    with smiles_fetch.open_name_store(cache_path) as store:
+        store.put("Propanol", "CCCO")
+        store.put("pro-panol", "CC(C)O")
+        store.put("ethanol", "CCO")
+
+    output = tmp_path / "audit.csv"
+    assert smiles_fetch.audit_name_smiles_consistency(cache_path, output) == 1
+    text = output.read_text(encoding="utf-8-sig")
+    assert "propanol,CC(C)O,pro-panol" in text
+    assert "ethanol" not in text
+
+
+def test_negative_cache_skips_names_every_resolver_failed_on(monkeypatch, tmp_path):
+    calls = []
+
+    async def failed_lookup(session, compound_name, semaphore, max_retries):
+        calls.append(compound_name)
+        return None, None
+
+    async def failed_chemspider(compound_name):
+        return None, None
+
+    for resolver in ("pubchem", "opsin", "cir", "chebi"):
+        monkeypatch.setattr(smiles_fetch, f"get_smiles_from_{resolver}", failed_lookup)
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_chemspider_async", failed_chemspider)
+    monkeypatch.setattr(
+        smiles_fetch,
+        "smiles_cache",
+        smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key),
+    )
+
+    def resolve():
+        return asyncio.run(
+            smiles_fetch.resolve_no_smi_name("hopeless name", object(), object())
+        )
+
+    assert resolve() == (None, None)
+    failure = smiles_fetch.smiles_cache.get_failure("hopeless name")
+    assert failure["sources"] == list(smiles_fetch.NO_SMI_SOURCES)
+    assert failure["outcomes"]["ChemSpider"] == "not_found"
+    assert resolve() == (None, "NegativeCache")
+    assert len(calls) == 4
+
+    override_path = tmp_path / "overrides.json"
+    override_path.write_text(json.dumps({"overrides": []}), encoding="utf-8")
+    try:
+        smiles_fetch.load_resolution_overrides(override_path)
+        assert resolve() == (None, None)
+        assert len(calls) == 8
+    finally:
+        smiles_fetch.load_resolution_overrides(None)
+
+
+def test_negative_cache_ignores_transient_resolver_failures(monkeypatch, caplog):
+    import aiohttp
+
+    class FakeResponse:
+        status = 503
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *_args):
+            return None
+
+        async def text(self):
+            return "unavailable"
+
+        def raise_for_status(self):
+            raise aiohttp.ClientResponseError(None, (), status=self.status)
+
+    class FakeSession:
+        def get(self, url):
+            return FakeResponse()
+
+    async def failed_lookup(session, compound_name, semaphore, max_retries):
+        return None, None
+
+    async def unavailable_cir(session, compound_name, semaphore, max_retries):
+        url = f"https://cir.example/{compound_name}"
+        await smiles_fetch.fetch_smiles(session, url, asyncio.Semaphore(1), 1)
+        return None, None
+
+    async def failed_chemspider(compound_name):
+        return None, None
+
+    for resolver in ("pubchem", "opsin", "chebi"):
+        monkeypatch.setattr(smiles_fetch, f"get_smiles_from_{resolver}", failed_lookup)
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_cir", unavailable_cir)
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_chemspider_async", failed_chemspider)
+    monkeypatch.setattr(
+        smiles_fetch,
+        "smiles_cache",
+        smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key),
+    )
+    smiles_fetch.resolution_stats.clear()
+    caplog.set_level(logging.INFO)
+
+    result = asyncio.run(
+        smiles_fetch.resolve_no_smi_name("unlucky name", FakeSession(), object())
+    )
+
+    assert result == (None, None)
+    assert smiles_fetch.smiles_cache.get_failure("unlucky name") is None
+    assert smiles_fetch.resolution_stats["transient_failures"] == 1
+    assert "'cir.example': '503'" in caplog.text
+    assert smiles_fetch._is_definitive_outcome("404")
+    assert not smiles_fetch._is_definitive_outcome("429")
+    assert not smiles_fetch._is_definitive_outcome("circuit_open")
+
+
+def test_normalized_cache_reuse_keeps_enantiomers_apart(monkeypatch):
+    calls = []
+
+    async def failed_lookup(session, compound_name, semaphore, max_retries):
+        calls.append(compound_name)
+        return None, None
+
+    async def failed_chemspider(compound_name):
+        return None, None
+
+    for resolver in ("pubchem", "opsin", "cir", "chebi"):
+        monkeypatch.setattr(smiles_fetch, f"get_smiles_from_{resolver}", failed_lookup)
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_chemspider_async", failed_chemspider)
+    store = smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key)
+    store.put("(+)-camphor", "C[C@@]12CC[C@@H](CC1=O)C2(C)C")
+    monkeypatch.setattr(smiles_fetch, "smiles_cache", store)
+    monkeypatch.setattr(smiles_fetch, "negative_cache_ttl_seconds", 0)
+
+    def resolve(name):
+        return asyncio.run(smiles_fetch.resolve_no_smi_name(name, object(), object()))
+
+    smiles, source = resolve("(+) Camphor")
+    assert source == "Cache"
+    assert smiles == smiles_fetch.canonicalize_smiles("C[C@@]12CC[C@@H](CC1=O)C2(C)C")
+    assert calls == []
+    assert resolve("(-)-camphor") == (None, None)
+    assert calls == ["(-)-camphor"] * 4
+
+    store.put("(-)-camphor", "C[C@]12CC[C@H](CC1=O)C2(C)C")
+    assert resolve("camphor") == (None, None)
+    assert len(calls) == 8
+
+
+def test_process_batch_resolves_each_distinct_name_once(monkeypatch):
+    calls = []
+
+    async def fake_get_smiles(session, compound_name, fix_name_bool, semaphore):
+        calls.append(compound_name)
+        return ("CCOC(C)=O", "test") if "acetate" in compound_name else (None, None)
+
+    monkeypatch.setattr(smiles_fetch, "get_smiles", fake_get_smiles)
+    response = json.dumps(
+        {
+            "Reactants, Solvents, Catalysts": {"A": "ethyl acetate", "B": "mystery"},
+            "Products": {"C": "ethyl  acetate"},
+        }
+    )
+    resolution_cache = {}
+
+    for _ in range(2):
+        results = asyncio.run(
+            smiles_fetch.process_batch(
+                [response, response],
+                session=object(),
+                fix_name_bool=False,
+                semaphore=object(),
+                resolution_cache=resolution_cache,
+            )
+        )
+
+    assert sorted(calls) == ["ethyl acetate", "mystery", "mystery"]
+    assert results[1] == {
+        "A": "CCOC(C)=O",
+        "B": "[mystery (NoSmi)]",
+        "C": "CCOC(C)=O",
+    }
+
+
+def test_priority_resolution_cancels_slower_sources(monkeypatch):
+    cancelled = []
+
+    def resolver(source, delay, smiles):
+        async def lookup(session, compound_name, semaphore, max_retries):
+            try:
+                async with semaphore:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(source)
+                raise
+            return (smiles, source) if smiles else (None, None)
+
+        return lookup
+
+    async def no_chemspider(compound_name):
+        return None, None
+
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_pubchem", resolver("PubChem", 0, None))
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_opsin", resolver("OPSIN", 0.01, "CCO"))
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_cir", resolver("CIR", 30, "CC"))
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_chebi", resolver("ChEBI", 30, None))
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_chemspider_async", no_chemspider)
+    monkeypatch.setattr(
+        smiles_fetch,
+        "smiles_cache",
+        smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key),
+    )
+
+    async def run():
+        semaphore = asyncio.Semaphore(5)
+        result = await asyncio.wait_for(
+            smiles_fetch.resolve_no_smi_name("ethanol-like", object(), semaphore),
+            timeout=5,
+        )
+        return result, semaphore._value
+
+    (smiles, source), free_slots = asyncio.run(run())
+
+    assert (smiles, source) == ("CCO", "OPSIN")
+    assert set(cancelled) == {"CIR", "ChEBI"}
+    assert free_slots == 5
+
+
+def test_pubchem_batcher_coalesces_names_without_repeating_failed_posts(monkeypatch):
+    requests = []
+
+    async def fake_fetch(session, url, semaphore, max_retries, data=None):
+        requests.append(("POST" if data else "GET", data["name"] if data else url))
+        if data and data["name"] == "busy name":
+            smiles_fetch._record_outcome(url, "503")
+            return None
+        smiles_fetch._record_outcome(url, "200")
+        return json.dumps({"PropertyTable": {"Properties": [{"SMILES": "OCC"}]}})
+
+    monkeypatch.setattr(smiles_fetch, "fetch_smiles", fake_fetch)
+
+    async def run():
+        batcher = smiles_fetch.PubChemBatcher(object(), object(), window=0.01)
+        return await asyncio.gather(
+            batcher.lookup("Ethanol"),
+            batcher.lookup("ethanol"),
+            batcher.lookup("busy name"),
+        )
+
+    results = asyncio.run(run())
+
+    assert results == [("CCO", "PubChem"), ("CCO", "PubChem"), (None, None)]
+    assert requests == [("POST", "Ethanol"), ("POST", "busy name")]
+
+
+def test_reprocess_no_smi_resumes_from_committed_deltas(tmp_path, monkeypatch):
+    initial = tmp_path / "smiles_dict_initial.json"
+    final = tmp_path / "smiles_dict_final.json"
+    initial.write_text(
+        json.dumps(
+            [
+                {"A": "[ethanol (NoSmi)]"},
+                {"A": "[killer (NoSmi)]"},
+                {"A": "[methanol (NoSmi)]"},
+            ]
+        ),
+        encoding="utf-8-sig",
+    )
+    seen = []
+
+    async def fake_resolve(compound_name, session, semaphore):
+        seen.append(compound_name)
+        if compound_name == "killer" and seen.count("killer") == 1:
+            raise RuntimeError("killed")
+        return {"ethanol": ("CCO", "OPSIN"), "methanol": ("CO", "PubChem")}.get(
+            compound_name, (None, None)
+        )
+
+    monkeypatch.setattr(smiles_fetch, "resolve_no_smi_name", fake_resolve)
+    monkeypatch.setattr(smiles_fetch, "pubchem_batch_window", 0)
+
+    def run():
+        asyncio.run(smiles_fetch.reprocess_no_smi(initial, final, object(), object(), 1))
+
+    with pytest.raises(RuntimeError, match="killed"):
+        run()
+    assert not final.exists()
+    delta_lines = smiles_fetch.no_smi_delta_path(final).read_text(encoding="utf-8").splitlines()
+    assert json.loads(delta_lines[1]) == {
+        "row": 0,
+        "code": "A",
+        "smiles": "CCO",
+        "source": "OPSIN",
+    }
+
+    run()
+
+    assert seen == ["ethanol", "killer", "killer", "methanol"]
+    assert json.loads(final.read_text(encoding="utf-8-sig")) == [
+        {"A": "CCO"},
+        {"A": "[killer (NoSmi)]"},
+        {"A": "CO"},
+    ]
+    assert not smiles_fetch.no_smi_delta_path(final).exists()
+
+
+def test_reprocess_no_smi_resumes_twice_after_a_torn_delta_line(tmp_path, monkeypatch):
+    initial = tmp_path / "smiles_dict_initial.json"
+    final = tmp_path / "smiles_dict_final.json"
+    initial.write_text(
+        json.dumps(
+            [
+                {"A": "[ethanol (NoSmi)]"},
+                {"A": "[first killer (NoSmi)]"},
+                {"A": "[methanol (NoSmi)]"},
+                {"A": "[second killer (NoSmi)]"},
+                {"A": "[propanol (NoSmi)]"},
+            ]
+        ),
+        encoding="utf-8-sig",
+    )
+    seen = []
+
+    async def fake_resolve(compound_name, session, semaphore):
+        seen.append(compound_name)
+        if compound_name.endswith("killer") and seen.count(compound_name) == 1:
+            raise RuntimeError("killed")
+        return {
+            "ethanol": ("CCO", "OPSIN"),
+            "methanol": ("CO", "PubChem"),
+            "propanol": ("CCCO", "CIR"),
+        }.get(compound_name, (None, None))
+
+    monkeypatch.setattr(smiles_fetch, "resolve_no_smi_name", fake_resolve)
+    monkeypatch.setattr(smiles_fetch, "pubchem_batch_window", 0)
+    delta_path = smiles_fetch.no_smi_delta_path(final)
+
+    def run():
+        asyncio.run(smiles_fetch.reprocess_no_smi(initial, final, object(), object(), 1))
+
+    with pytest.raises(RuntimeError, match="killed"):
+        run()
+    # The process died halfway through writing a delta.
+    with delta_path.open("a", encoding="utf-8") as handle:
+        handle.write('{"row": 1, "co')
+    with pytest.raises(RuntimeError, match="killed"):
+        run()
+    lines = delta_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines][-1] == {"committed_rows": 3}
+
+    run()
+
+    assert seen == [
+        "ethanol",
+        "first killer",
+        "first killer",
+        "methanol",
+        "second killer",
+        "second killer",
+        "propanol",
+    ]
+    assert json.loads(final.read_text(encoding="utf-8-sig")) == [
+        {"A": "CCO"},
+        {"A": "[first killer (NoSmi)]"},
+        {"A": "CO"},
+        {"A": "[second killer (NoSmi)]"},
+        {"A": "CCCO"},
+    ]
+
+
+def test_local_opsin_is_tried_before_the_opsin_web_service(monkeypatch, tmp_path):
+    # Stands in for ``java -jar opsin.jar -osmi``: one answer line per name.
+    fake_java = tmp_path / "java"
+    fake_java.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "answers = {'ethanol': 'OCC', 'benzene': 'c1ccccc1'}\n"
+        "for line in sys.stdin:\n"
+        "    print(answers.get(line.strip(), ''), flush=True)\n",
+        encoding="utf-8",
+    )
+    fake_java.chmod(0o755)
+    jar = tmp_path / "opsin.jar"
+    jar.write_bytes(b"")
+    remote_calls = []
+
+    async def fake_remote_opsin(session, compound_name, semaphore, max_retries):
+        remote_calls.append(compound_name)
+        return None, None
+
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_opsin", fake_remote_opsin)
+    monkeypatch.setattr(
+        smiles_fetch,
+        "smiles_cache",
+        smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key),
+    )
+    monkeypatch.setattr(opsin_local, "opsin_stats", Counter())
+    smiles_fetch.configure_local_opsin(jar, java=str(fake_java))
+
+    async def resolve_all():
+        return await asyncio.gather(
+            *(
+                smiles_fetch.get_smiles(object(), name, False, object())
+                for name in ("ethanol", "benzene", "mystery")
+            )
+        )
+
+    try:
+        results = asyncio.run(resolve_all())
+    finally:
+        smiles_fetch.configure_local_opsin(None)
+
+    assert results == [("CCO", "OPSIN-local"), ("c1ccccc1", "OPSIN-local"), (None, None)]
+    assert remote_calls == ["mystery"]
+    assert opsin_local.opsin_stats["batches"] == 1
+    assert smiles_fetch.smiles_cache.get_entry("ethanol") == ("CCO", True)
+
+
+def test_local_opsin_answers_names_the_negative_cache_remembers(monkeypatch, tmp_path):
+    fake_java = tmp_path / "java"
+    fake_java.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "for line in sys.stdin:\n"
+        "    print('OCC' if line.strip() == 'ethanol' else '', flush=True)\n",
+        encoding="utf-8",
+    )
+    fake_java.chmod(0o755)
+    jar = tmp_path / "opsin.jar"
+    jar.write_bytes(b"")
+    monkeypatch.setattr(
+        smiles_fetch,
+        "smiles_cache",
+        smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key),
+    )
+    # Every online resolver failed on the name before the jar was configured.
+    smiles_fetch.smiles_cache.record_failure(
+        "ethanol",
+        smiles_fetch.NO_SMI_SOURCES,
+        {source: "not_found" for source in smiles_fetch.NO_SMI_SOURCES},
+    )
+    smiles_fetch.configure_local_opsin(jar, java=str(fake_java))
+    try:
+        result = asyncio.run(smiles_fetch.resolve_no_smi_name("ethanol", object(), object()))
+    finally:
+        smiles_fetch.configure_local_opsin(None)
+
+    assert result == ("CCO", "OPSIN-local")
+
+
+def test_local_opsin_disables_itself_when_the_process_dies(tmp_path):
+    fake_java = tmp_path / "java"
+    fake_java.write_text(f"#!{sys.executable}\nimport sys\nsys.exit(1)\n", encoding="utf-8")
+    fake_java.chmod(0o755)
+    jar = tmp_path / "opsin.jar"
+    jar.write_bytes(b"")
+    backend = opsin_local.LocalOpsin(jar, java=str(fake_java), timeout=5)
+
+    assert backend.resolve_many(["ethanol", "benzene"]) == [None, None]
+    assert backend.disabled
+    with pytest.raises(FileNotFoundError):
+        opsin_local.LocalOpsin(tmp_path / "missing.jar")
+
+
+def test_classify_name_cleans_aliases_fixes_and_screens_in_one_call():
+    classified = smiles_fetch.classify_name("  DIEA ")
+    assert classified.cleaned == "DIEA"
+    assert classified.alias == "DIPEA"
+    assert classified.skip_reason is None
+
+    fixed = smiles_fetch.classify_name("Tetrakis(triphenylphosphine)palladium (anhydrous)")
+    assert fixed.fixed == "tetrakis(triphenylphosphine)palladium(0)"
+
+    assert smiles_fetch.classify_name("Silica gel").skip_reason == "ambiguous name"
+    assert smiles_fetch.classify_name("12-3").skip_reason == r"^[A-Za-z]?\d+(?:[-.]\d+)*$"
+    # The one case-sensitive pattern keeps its flags inside the combined scan.
+    assert smiles_fetch.classify_name("AB12").skip_reason is None
+    assert "resin" in smiles_fetch.classify_name("Merrifield RESIN").skip_reason
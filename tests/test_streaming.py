@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from uspto_revisit import atom_mapping, streaming
+
+
+class FakeMapper:
+    def get_atom_map(self, reactions, return_dict=False):
+        return [{"mapped_rxn": f"mapped:{reaction}"} for reaction in reactions]
+
+
+RESPONSE = json.dumps(
+    {
+        "Reactants, Solvents, Catalysts": {"A": "ethanol"},
+        "Products": {"B": "mystery"},
+        "Reaction Steps": {"1 (Reaction, Add)": "A->B"},
+    }
+)
+
+
+def test_stream_reaction_smiles_writes_chunks_in_order(tmp_path, monkeypatch):
+    resolved_chunks = []
+
+    async def fake_process_batch(
+        batch, session, fix_name_bool, semaphore, resolution_cache
+    ):
+        resolved_chunks.append(len(batch))
+        return [{"A": "CCO", "B": "[mystery (NoSmi)]"} for _ in batch]
+
+    async def fake_process_batch_final(smiles_dict_list, session, semaphore):
+        for smiles_dict in smiles_dict_list:
+            smiles_dict["B"] = "CC=O"
+
+    monkeypatch.setattr(streaming, "process_batch", fake_process_batch)
+    monkeypatch.setattr(streaming, "process_batch_final", fake_process_batch_final)
+    frame = pd.DataFrame({"idx": range(5), "responses": [RESPONSE] * 5})
+    output_path = tmp_path / "out.csv"
+
+    rows = asyncio.run(
+        streaming.stream_reaction_smiles(
+            iter([frame.iloc[0:2], frame.iloc[2:4], frame.iloc[4:5]]),
+            output_path,
+            model_column="responses",
+            output_prefix="model",
+            session=object(),
+            map_atoms=True,
+            mapper=FakeMapper(),
+            queue_size=1,
+        )
+    )
+
+    written = pd.read_csv(output_path)
+    assert rows == 5
+    assert resolved_chunks == [2, 2, 1]
+    assert "idx" not in written.columns
+    assert written["model_rxn"].tolist() == ["['CCO>CC=O']"] * 5
+    assert written["model_mapped_rxn"].tolist() == ["['mapped:CCO>>CC=O']"] * 5
+
+
+def test_stream_reaction_smiles_maps_through_the_mapping_cache(tmp_path, monkeypatch):
+    async def fake_process_batch(
+        batch, session, fix_name_bool, semaphore, resolution_cache
+    ):
+        return [{"A": "CCO", "B": "CC=O"} for _ in batch]
+
+    monkeypatch.setattr(streaming, "process_batch", fake_process_batch)
+    frame = pd.DataFrame({"idx": range(3), "responses": [RESPONSE] * 3})
+    cache_path = tmp_path / "mapping.sqlite"
+
+    def run(output_path):
+        return asyncio.run(
+            streaming.stream_reaction_smiles(
+                iter([frame.iloc[0:2], frame.iloc[2:3]]),
+                output_path,
+                model_column="responses",
+                output_prefix="model",
+                session=object(),
+                skip_reprocess=True,
+                map_atoms=True,
+                mapper=FakeMapper(),
+            )
+        )
+
+    atom_mapping.mapping_stats.clear()
+    try:
+        # The cache is opened here and used from the mapping thread.
+        atom_mapping.configure_mapping_cache(cache_path)
+        assert run(tmp_path / "first.csv") == 3
+        assert run(tmp_path / "second.csv") == 3
+        stats = dict(atom_mapping.mapping_stats)
+    finally:
+        atom_mapping.configure_mapping_cache(None)
+
+    written = pd.read_csv(tmp_path / "second.csv")
+    assert written["model_mapped_rxn"].tolist() == ["['mapped:CCO>>CC=O']"] * 3
+    assert stats["model_reactions"] == 1
+    assert stats["cache_hits"] == 3
+
+
+def test_stream_reaction_smiles_stops_every_stage_on_failure(tmp_path, monkeypatch):
+    async def failing_process_batch(
+        batch, session, fix_name_bool, semaphore, resolution_cache
+    ):
+        raise RuntimeError("resolver down")
+
+    monkeypatch.setattr(streaming, "process_batch", failing_process_batch)
+    frame = pd.DataFrame({"responses": [RESPONSE]})
+
+    with pytest.raises(RuntimeError, match="resolver down"):
+        asyncio.run(
+            asyncio.wait_for(
+                streaming.stream_reaction_smiles(
+                    iter([frame]),
+                    tmp_path / "out.csv",
+                    model_column="responses",
+                    output_prefix="model",
+                    session=object(),
+                ),
+                timeout=5,
+            )
+        )
@@ -0,0 +1,114 @@
+import asyncio
+import gzip
+
+from uspto_revisit import smiles_fetch, synonym_index
+
+
+def write_dumps(tmp_path):
+    synonyms = tmp_path / "CID-Synonym-filtered.gz"
+    with gzip.open(synonyms, "wt", encoding="utf-8") as handle:
+        handle.write("702\tethanol\n702\tEthyl alcohol\n1031\t1-propanol\n3776\t2-propanol\n")
+        # The same normalized synonym on two different structures.
+        handle.write("1031\tpropanol\n3776\tPropanol\n")
+    smiles = tmp_path / "CID-SMILES.gz"
+    with gzip.open(smiles, "wt", encoding="utf-8") as handle:
+        handle.write("702\tCCO\n1031\tCCCO\n3776\tCC(C)O\n9999\tC\n")
+    return synonyms, smiles
+
+
+def test_build_synonym_index_flags_names_with_several_structures(tmp_path):
+    synonyms, smiles = write_dumps(tmp_path)
+    index_path = tmp_path / "synonyms.sqlite"
+
+    summary = synonym_index.build_synonym_index(
+        synonyms,
+        smiles,
+        index_path,
+        key_function=smiles_fetch.normalize_name_key,
+        chunk_size=2,
+    )
+
+    assert summary["names"] == 5
+    assert summary["ambiguous_names"] == 1
+    with synonym_index.SynonymIndex(
+        index_path,
+        key_function=smiles_fetch.normalize_name_key,
+    ) as index:
+        assert index.lookup("ethyl-alcohol") == {"cid": 702, "smiles": "CCO", "structures": 1}
+        assert index.lookup("PROPANOL")["structures"] == 2
+        assert index.lookup("methane") is None
+    output = tmp_path / "ambiguous.csv"
+    assert synonym_index.export_ambiguous_synonyms(index_path, output) == 1
+    text = output.read_text(encoding="utf-8-sig")
+    assert "propanol,CC(C)O,3776" in text
+    assert "propanol,CCCO,1031" in text
+
+
+def test_resolve_no_smi_name_uses_the_index_before_network_sources(monkeypatch, tmp_path):
+    synonyms, smiles = write_dumps(tmp_path)
+    index_path = tmp_path / "synonyms.sqlite"
+    synonym_index.build_synonym_index(
+        synonyms,
+        smiles,
+        index_path,
+        key_function=smiles_fetch.normalize_name_key,
+    )
+    calls = []
+
+    async def network_lookup(session, compound_name, semaphore, max_retries):
+        calls.append(compound_name)
+        return None, None
+
+    async def no_chemspider(compound_name):
+        return None, None
+
+    for resolver in ("pubchem", "opsin", "cir", "chebi"):
+        monkeypatch.setattr(smiles_fetch, f"get_smiles_from_{resolver}", network_lookup)
+    monkeypatch.setattr(smiles_fetch, "get_smiles_from_chemspider_async", no_chemspider)
+    monkeypatch.setattr(
+        smiles_fetch,
+        "smiles_cache",
+        smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key),
+    )
+    smiles_fetch.configure_synonym_index(index_path)
+
+    def resolve(name):
+        return asyncio.run(smiles_fetch.resolve_no_smi_name(name, object(), object()))
+
+    try:
+        assert resolve("Ethyl alcohol") == ("CCO", "PubChem-index")
+        assert calls == []
+        assert resolve("propanol") == (None, None)
+        assert len(calls) == 4
+    finally:
+        smiles_fetch.configure_synonym_index(None)
+    assert smiles_fetch.smiles_cache.get_entry("Ethyl alcohol") == ("CCO", True)
+
+
+def test_index_answers_names_the_negative_cache_remembers(monkeypatch, tmp_path):
+    synonyms, smiles = write_dumps(tmp_path)
+    index_path = tmp_path / "synonyms.sqlite"
+    synonym_index.build_synonym_index(
+        synonyms,
+        smiles,
+        index_path,
+        key_function=smiles_fetch.normalize_name_key,
+    )
+    monkeypatch.setattr(
+        smiles_fetch,
+        "smiles_cache",
+        smiles_fetch.NameStore(key_function=smiles_fetch.normalize_name_key),
+    )
+    # Every online resolver failed on the name before the index existed.
+    smiles_fetch.smiles_cache.record_failure(
+        "Ethyl alcohol",
+        smiles_fetch.NO_SMI_SOURCES,
+        {source: "not_found" for source in smiles_fetch.NO_SMI_SOURCES},
+    )
+    smiles_fetch.configure_synonym_index(index_path)
+    try:
+        assert asyncio.run(
+            smiles_fetch.resolve_no_smi_name("Ethyl alcohol", object(), object())
+        ) == ("CCO", "PubChem-index")
+    finally:
+        smiles_fetch.configure_synonym_index(None)